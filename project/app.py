@@ -1,48 +1,93 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for
+from flask import Blueprint, Flask, Response, current_app, g, render_template, request, jsonify, redirect, url_for
 from flask_sock import Sock
 from flask_login import (
     LoginManager, UserMixin, login_user, logout_user,
     login_required, current_user
 )
 from werkzeug.security import check_password_hash, generate_password_hash
-import sqlite3
 import time
 import json
 import os
 import sys
-from uuid import uuid4
+import functools
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-import ku_jobs_scraper
-from davidsscraper import scrape_remoteok
 import database_helpers as dbh
+import responses
+import circuit_breaker
+import dedup
+import ingest_leader
+import job_marks
+import metrics
+import percolator
+import profile_skills
+import tracing
 
 # ---------------------------------------------------------
 # APP SETUP
 # ---------------------------------------------------------
-app = Flask(__name__)
-app.secret_key = "supersecretkey"
+bp = Blueprint("main", __name__)
+sock = Sock()
+login_manager = LoginManager()
+login_manager.login_view = "main.login"
 
-# Profile photo folder
-app.config["UPLOAD_FOLDER"] = os.path.join(app.root_path, "static", "uploads")
-os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
 
-sock = Sock(app)
-_db_conn = dbh.setup_db()
-dbh.close_db(_db_conn)
+def _start_request_timer():
+    g.request_started = time.perf_counter()
 
-# ---------------------------------------------------------
-# LOGIN MANAGER SETUP
-# ---------------------------------------------------------
-login_manager = LoginManager()
-login_manager.init_app(app)
-login_manager.login_view = "login"
+
+def _record_request_time(response):
+    started = g.pop("request_started", None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else "<unmatched>"
+        metrics.HTTP_REQUEST_SECONDS.labels(route, request.method, response.status_code).observe(
+            time.perf_counter() - started
+        )
+    return response
+
+
+def create_app(config=None):
+    """Build the app. The scraper stack is imported on first use, and the
+    schema check is one PRAGMA read per database when both are current."""
+    app = Flask(__name__)
+    app.secret_key = "supersecretkey"
+    app.json = responses.FastJSONProvider(app)
+
+    # Profile photo folder
+    app.config["UPLOAD_FOLDER"] = os.path.join(app.root_path, "static", "uploads")
+    # Seconds between background scrapes by the ingestion leader; 0 fetches per request
+    app.config["INGEST_INTERVAL"] = float(os.environ.get("JOBS_INGEST_INTERVAL", 0))
+    # Detail-page parse processes the ingestion leader may start (0: parse in its own thread)
+    app.config["PARSE_PROCESSES"] = int(os.environ.get("JOBS_PARSE_PROCESSES", 2))
+    # Snapshot (job_snapshot.py) to warm an empty job store from at startup
+    app.config["JOBS_SNAPSHOT"] = os.environ.get("JOBS_SNAPSHOT")
+    app.config.update(config or {})
+    os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
+
+    app.after_request(responses.compress_response)
+    tracing.init_app(app)
+    app.before_request(_start_request_timer)
+    app.after_request(_record_request_time)
+    app.before_request(_start_ingest_worker)
+
+    login_manager.init_app(app)
+    app.register_blueprint(bp)
+    sock.init_app(app)
+
+    dbh.close_db(dbh.setup_db())
+    dbh.setup_users_db()
+    if app.config["JOBS_SNAPSHOT"]:
+        import job_snapshot
+
+        job_snapshot.import_snapshot(app.config["JOBS_SNAPSHOT"], only_if_empty=True)
+    return app
 
 
 # ---------------------------------------------------------
 # USER MODEL + HELPERS
 # ---------------------------------------------------------
 def get_user_by_username(username):
-    conn = sqlite3.connect("users.db")
+    conn = dbh.get_users_connection()
     row = conn.execute(
         "SELECT id, username, password_hash FROM users WHERE username=?",
         (username,),
@@ -52,7 +97,7 @@ def get_user_by_username(username):
 
 
 def get_user_by_id(uid):
-    conn = sqlite3.connect("users.db")
+    conn = dbh.get_users_connection()
     row = conn.execute(
         "SELECT id, username, password_hash FROM users WHERE id=?",
         (uid,),
@@ -79,21 +124,21 @@ def _derive_job_identifier(job: dict) -> str:
         value = job.get(key)
         if value:
             return str(value)
-    return uuid4().hex
+    return dedup.stable_job_id(job)
 
 
 # ---------------------------------------------------------
 # ROUTES
 # ---------------------------------------------------------
 
-@app.route("/")
+@bp.route("/")
 @login_required
 def index():
     return render_template("index.html")
 
 
 # ------------------ LOGIN ------------------
-@app.route("/login", methods=["GET", "POST"])
+@bp.route("/login", methods=["GET", "POST"])
 def login():
     if request.method == "POST":
         username = request.form["username"]
@@ -105,7 +150,7 @@ def login():
             if check_password_hash(pwhash, password):
                 user = User(uid, uname, pwhash)
                 login_user(user)
-                return redirect(url_for("index"))
+                return redirect(url_for("main.index"))
 
         return "Invalid credentials", 401
 
@@ -113,13 +158,13 @@ def login():
 
 
 # ------------------ REGISTER ------------------
-@app.route("/register", methods=["GET", "POST"])
+@bp.route("/register", methods=["GET", "POST"])
 def register():
     if request.method == "POST":
         username = request.form["username"]
         password = request.form["password"]
 
-        conn = sqlite3.connect("users.db")
+        conn = dbh.get_users_connection()
         cur = conn.cursor()
 
         exists = cur.execute(
@@ -134,80 +179,392 @@ def register():
         )
         conn.commit()
         conn.close()
-        return redirect(url_for("login"))
+        return redirect(url_for("main.login"))
 
     return render_template("register.html")
 
 
 # ------------------ LOGOUT ------------------
-@app.route("/logout")
+@bp.route("/logout")
 @login_required
 def logout():
     logout_user()
-    return redirect(url_for("login"))
+    return redirect(url_for("main.login"))
 
 
 # ---------------------------------------------------------
 # JOB SEARCH
 # ---------------------------------------------------------
-@app.route("/get_jobs", methods=["POST"])
-@login_required
-def get_jobs():
-    skills = request.form["skills"]
-
-    out = []
+def _normalize_title(job: dict) -> dict:
+    job["title"] = (
+        job.get("title")
+        or job.get("name")
+        or job.get("role")
+        or job.get("position")
+        or job.get("job_title")
+        or "Untitled Role"
+    )
+    return job
+
+
+def _fetch_ku_jobs(enrich_processes=None):
+    """KU listings; with enrich_processes, skills from every detail page as well."""
+    import ku_jobs_scraper  # deferred: pulls in requests, bs4 and lxml
 
-    # ------------------------
-    # KU job scraper
-    # ------------------------
     session = ku_jobs_scraper.get_session()
     try:
-        html = ku_jobs_scraper.fetch_html_text(session, ku_jobs_scraper.LIST_URL)
-        jobs = ku_jobs_scraper.parse_listings_table(html)
+        with metrics.SOURCE_SECONDS.labels("KU Jobs", "fetch").time():
+            html = ku_jobs_scraper.fetch_html_text(session, ku_jobs_scraper.LIST_URL)
+        with metrics.SOURCE_SECONDS.labels("KU Jobs", "parse").time():
+            jobs = ku_jobs_scraper.parse_listings_table(html)
+        if enrich_processes is not None:
+            texts = {}
+            with metrics.SOURCE_SECONDS.labels("KU Jobs", "enrich").time():
+                ku_jobs_scraper.enrich_rows_with_skills(session, jobs, processes=enrich_processes, texts=texts)
+            now = time.time()
+            _save_detail_text([(url, text, now) for url, text in texts.items()])
+        out = [_normalize_title(job.to_api_format()) for job in jobs]
+    except Exception as e:
+        outcome = "timeout" if isinstance(e, ku_jobs_scraper.requests.Timeout) else "error"
+        metrics.record_source("KU Jobs", outcome)
+        raise  # the source's circuit breaker counts it
+    metrics.record_source("KU Jobs", "success")
+    return out
+
+
+def _save_detail_text(entries):
+    conn = dbh.get_db_connection()
+    try:
+        dbh.save_job_details(conn, entries)
+    finally:
+        dbh.close_db(conn)
+
+
+def _release_parse_pool():
+    # Only the leader enriches, so a demoted worker gives its parse processes back
+    ku_jobs_scraper = sys.modules.get("ku_jobs_scraper")
+    if ku_jobs_scraper is not None:
+        ku_jobs_scraper.shutdown_parse_pool()
+
+
+def _fetch_remote_jobs(limit=10):
+    from davidsscraper import scrape_remoteok
+
+    return [_normalize_title(job) for job in scrape_remoteok(limit=limit, raise_errors=True) or []]
+
 
-        for job in jobs:
-            j = job.to_api_format()
+def _fetch_remote_feed():
+    # The whole streamed feed (descriptions dropped); too slow per request
+    return _fetch_remote_jobs(limit=None)
 
-            # Normalize title
-            j["title"] = (
-                j.get("title")
-                or j.get("name")
-                or j.get("role")
-                or j.get("position")
-                or j.get("job_title")
-                or "Untitled Role"
-            )
 
-            out.append(j)
+# Job sources in display order: (source name, fetch function)
+JOB_SOURCES = [
+    ("KU Jobs", _fetch_ku_jobs),
+    ("RemoteOK", _fetch_remote_jobs),
+]
 
+
+def _ingest_sources(parse_processes):
+    """What the ingestion leader fetches for JOB_SOURCES; its snapshots are
+    served in their place and upserted into the jobs table."""
+    return [
+        ("KU Jobs", functools.partial(_fetch_ku_jobs, enrich_processes=parse_processes)),
+        ("RemoteOK", _fetch_remote_feed),
+    ]
+
+
+_source_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="job-source")
+
+
+_snapshots = ingest_leader.SnapshotReader()
+
+
+def _start_ingest_worker():
+    # Started lazily so each gunicorn worker gets its own thread after the fork
+    interval = current_app.config["INGEST_INTERVAL"]
+    if interval > 0:
+        ingest_leader.ensure_worker(
+            _ingest_sources(current_app.config["PARSE_PROCESSES"]), interval,
+            on_batch=lambda name, jobs: _percolate_new_jobs(jobs), on_demote=_release_parse_pool,
+        )
+
+
+def _snapshot_max_age():
+    """How old a leader snapshot may be and still be served (0: always fetch live)."""
+    return 2 * current_app.config["INGEST_INTERVAL"]
+
+
+def _fresh_snapshots(max_age):
+    if max_age <= 0:
+        return {}
+    conn = dbh.get_db_connection()
+    try:
+        found = {}
+        for name, _ in JOB_SOURCES:
+            jobs = _snapshots.get(conn, name, max_age)
+            if jobs is not None:
+                found[name] = jobs
+        return found
     except Exception as e:
-        print(f"Error fetching KU jobs: {e}", file=sys.stderr)
+        print(f"Error reading job snapshots: {e}", file=sys.stderr)
+        return {}
+    finally:
+        dbh.close_db(conn)
 
-    # ------------------------
-    # RemoteOK scraper
-    # ------------------------
-    remote_jobs = scrape_remoteok()
-    if remote_jobs:
-        for job in remote_jobs:
-
-            # Normalize title
-            job["title"] = (
-                job.get("title")
-                or job.get("name")
-                or job.get("role")
-                or job.get("position")
-                or job.get("job_title")
-                or "Untitled Role"
-            )
-
-            out.append(job)
+
+# Last successful live fetch per source in this process: name -> (jobs, fetched_at)
+_last_good = {}
+
+
+def _last_known_good(name):
+    """(jobs, fetched_at) of the newest good copy of a source, here or from the leader; None if none."""
+    found = _last_good.get(name)
+    try:
+        conn = dbh.get_db_connection()
+        try:
+            fetched_at = dbh.get_source_snapshot_time(conn, name)
+            if fetched_at is not None and (found is None or fetched_at > found[1]):
+                jobs = _snapshots.get(conn, name, float("inf"))
+                if jobs is not None:
+                    found = (jobs, fetched_at)
+        finally:
+            dbh.close_db(conn)
+    except Exception as e:
+        print(f"Error reading job snapshots: {e}", file=sys.stderr)
+    return found
+
+
+# stale_since for a source that failed with no last-known-good copy to serve
+NO_FALLBACK = 0.0
+
+
+def _guarded_fetch(name, fetch):
+    """Fetch a source through its circuit breaker: (jobs, stale_since).
+
+    stale_since is None for a live result. When the fetch fails or comes
+    back empty (most likely broken upstream markup, as in ingest_leader),
+    or the breaker is open, it is the fetched_at of the last-known-good
+    copy served instead, or NO_FALLBACK when there is none.
+    """
+    breaker = circuit_breaker.get(name)
+    if breaker.allow():
+        try:
+            jobs = fetch()
+        except Exception as e:
+            breaker.record_failure()
+            print(f"Error fetching {name} jobs: {e}", file=sys.stderr)
+        else:
+            if jobs:
+                breaker.record_success()
+                _last_good[name] = (jobs, time.time())
+                return jobs, None
+            breaker.record_failure()
+            metrics.record_source(name, "empty")
+            print(f"{name} returned no jobs; treating it as a failure", file=sys.stderr)
+    else:
+        metrics.record_source(name, "short_circuit")
+    return _last_known_good(name) or ([], NO_FALLBACK)
+
+
+def _stale_marker(stale_since):
+    if stale_since == NO_FALLBACK:
+        return {"fetched_at": None, "age_seconds": None, "unavailable": True}
+    return {"fetched_at": stale_since, "age_seconds": round(time.time() - stale_since)}
+
+
+def _iter_source_batches(snapshot_max_age=0):
+    """Run all job sources concurrently; yield (name, jobs, seconds, stale_since) as each finishes.
+
+    Sources with a leader snapshot younger than snapshot_max_age are served
+    from it instead of being scraped again. A failing source, or one whose
+    circuit breaker is open, is served from its last-known-good copy with
+    stale_since set to when that copy was fetched.
+    """
+    started = time.perf_counter()
+    cached = _fresh_snapshots(snapshot_max_age)
+    futures = {
+        _source_pool.submit(tracing.propagate(tracing.traced(f"source.{name}")(_guarded_fetch)), name, fetch): name
+        for name, fetch in JOB_SOURCES
+        if name not in cached
+    }
+    for name, jobs in cached.items():
+        # The leader already percolated these when it stored them
+        yield name, jobs, time.perf_counter() - started, None
+    for fut in as_completed(futures):
+        name = futures[fut]
+        try:
+            jobs, stale_since = fut.result()
+        except Exception as e:
+            print(f"Error fetching {name} jobs: {e}", file=sys.stderr)
+            jobs, stale_since = [], None
+        if jobs and stale_since is None and snapshot_max_age <= 0:
+            # No leader to percolate these: match them off the request path
+            _queue_percolation(name, jobs)
+        yield name, jobs, time.perf_counter() - started, stale_since
+
+
+# Saved-search matching for live fetches gets one thread of its own, so it
+# neither occupies the source pool nor runs several writers at once
+_percolate_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="percolate")
+# Job keys per source last queued for matching in this process
+_percolated = {}
+
+
+def _queue_percolation(name, jobs):
+    """Queue the jobs of name not queued before; repeated fetches add no writes."""
+    previous = _percolated.get(name, frozenset())
+    new_jobs = [j for j in jobs if job_marks.job_key(j) not in previous]
+    if new_jobs:
+        _percolated[name] = frozenset(job_marks.job_key(j) for j in jobs)
+        _percolate_pool.submit(_percolate_new_jobs, new_jobs)
+
+
+def _percolate_new_jobs(jobs):
+    conn = dbh.get_db_connection()
+    try:
+        percolator.percolate(conn, jobs)
+    except Exception as e:
+        print(f"Error matching saved searches: {e}", file=sys.stderr)
+    finally:
+        dbh.close_db(conn)
+
+
+def _mark_kinds():
+    """Mark sets /get_jobs filters out: hidden unless include_hidden=1, seen too with unseen=1."""
+    kinds = []
+    if not request.values.get("include_hidden"):
+        kinds.append(job_marks.HIDDEN)
+    if request.values.get("unseen"):
+        kinds.append(job_marks.SEEN)
+    return kinds
+
+
+def _profile_match():
+    """(profile skill bits, drop non-matching) for match_profile=1 / profile_only=1, else None."""
+    only = bool(request.values.get("profile_only"))
+    if not (only or request.values.get("match_profile")):
+        return None
+    conn = dbh.get_db_connection()
+    try:
+        return dbh.get_profile_skill_mask(conn, current_user.username), only
+    finally:
+        dbh.close_db(conn)
+
+
+def _score_for_profile(jobs, match):
+    # Copies: snapshot job lists are shared between requests
+    mask, only = match
+    scored = [{**job, "profile_score": profile_skills.score(mask, job)} for job in jobs]
+    return [j for j in scored if j["profile_score"]] if only else scored
+
+
+def _stream_jobs(dumps, skills, columnar, user, kinds, snapshot_max_age=0, profile_match=None):
+    # Runs after the request context is gone, so the app's dumps is passed in
+    def line(obj):
+        return dumps(obj) + "\n"
+
+    total = 0
+    duplicates = 0
+    filtered = 0
+    sources = {}
+    deduper = dedup.JobDeduper()
+    conn = dbh.get_db_connection() if kinds else None
+    try:
+        for name, jobs, elapsed, stale_since in _iter_source_batches(snapshot_max_age):
+            # Batches already sent cannot be merged into, so later duplicates are dropped
+            unique = deduper.add_batch(jobs)
+            duplicates += len(jobs) - len(unique)
+            jobs = unique
+            if conn is not None:
+                visible = job_marks.filter_jobs(conn, user, jobs, kinds)
+                filtered += len(jobs) - len(visible)
+                jobs = visible
+            if profile_match is not None:
+                scored = _score_for_profile(jobs, profile_match)
+                filtered += len(jobs) - len(scored)
+                jobs = scored
+            total += len(jobs)
+            sources[name] = {"count": len(jobs), "ms": round(elapsed * 1000)}
+            batch = {"type": "batch", "source": name}
+            if stale_since is not None:
+                batch["stale"] = sources[name]["stale"] = _stale_marker(stale_since)
+            if columnar:
+                batch.update(format="columnar", **responses.to_columnar(jobs))
+            else:
+                batch["jobs"] = jobs
+            yield line(batch)
+    finally:
+        if conn is not None:
+            dbh.close_db(conn)
+    yield line({
+        "type": "done",
+        "message": f"Received skills: {skills}",
+        "count": total,
+        "duplicates": duplicates,
+        "filtered": filtered,
+        "sources": sources,
+    })
+
+
+@bp.route("/get_jobs", methods=["POST"])
+@login_required
+def get_jobs():
+    skills = request.form["skills"]
+
+    # NDJSON streaming: one line per source as soon as it finishes, then a summary
+    if request.values.get("stream"):
+        return Response(
+            tracing.bind_iter(_stream_jobs(
+                current_app.json.dumps, skills, responses.wants_columnar(), current_user.username, _mark_kinds(),
+                _snapshot_max_age(), _profile_match(),
+            )),
+            mimetype="application/x-ndjson",
+            headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+        )
+
+    by_source = {}
+    stale = {}
+    for name, jobs, _, stale_since in _iter_source_batches(_snapshot_max_age()):
+        by_source[name] = jobs
+        if stale_since is not None:
+            stale[name] = _stale_marker(stale_since)
+    out = []
+    for name, _ in JOB_SOURCES:
+        out.extend(by_source.get(name, []))
+    out = dedup.dedupe_jobs(out)
+
+    # Drop the jobs this user hid (and, with unseen=1, has already seen)
+    kinds = _mark_kinds()
+    if kinds:
+        conn = dbh.get_db_connection()
+        try:
+            out = job_marks.filter_jobs(conn, current_user.username, out, kinds)
+        finally:
+            dbh.close_db(conn)
+
+    # match_profile=1: score by the profile's skills, best matches first (profile_only=1 drops the rest)
+    profile_match = _profile_match()
+    if profile_match is not None:
+        out = sorted(_score_for_profile(out, profile_match), key=lambda j: -j["profile_score"])
 
     # ------------------------
     # Return final results
     # ------------------------
+    # Sources served from a last-known-good copy: {name: {"fetched_at", "age_seconds"}}
+    extra = {"stale_sources": stale} if stale else {}
+    if responses.wants_columnar():
+        return jsonify({
+            "message": f"Received skills: {skills}",
+            "format": "columnar",
+            **responses.to_columnar(out),
+            **extra,
+        })
+
     return jsonify({
         "message": f"Received skills: {skills}",
-        "jobs": out
+        "jobs": out,
+        **extra,
     })
 
 
@@ -215,13 +572,13 @@ def get_jobs():
 # ---------------------------------------------------------
 # PROFILE PAGE + API
 # ---------------------------------------------------------
-@app.route("/profile")
+@bp.route("/profile")
 @login_required
 def profile_page():
     return render_template("profile.html")
 
 
-@app.route("/api/profile", methods=["GET", "POST"])
+@bp.route("/api/profile", methods=["GET", "POST"])
 @login_required
 def api_profile():
     conn = dbh.get_db_connection()
@@ -251,7 +608,7 @@ def api_profile():
         dbh.close_db(conn)
 
 
-@app.route("/api/profile/photo", methods=["POST"])
+@bp.route("/api/profile/photo", methods=["POST"])
 @login_required
 def upload_profile_photo():
     if "photo" not in request.files:
@@ -267,7 +624,7 @@ def upload_profile_photo():
         return jsonify({"error": "invalid_type"}), 400
 
     filename = f"profile_photo.{ext}"
-    save_path = os.path.join(app.config["UPLOAD_FOLDER"], filename)
+    save_path = os.path.join(current_app.config["UPLOAD_FOLDER"], filename)
     file.save(save_path)
 
     rel_path = f"uploads/{filename}"
@@ -285,9 +642,69 @@ def upload_profile_photo():
 # ---------------------------------------------------------
 # WEBSOCKET
 # ---------------------------------------------------------
-@sock.route("/job_socket")
+@sock.route("/job_socket", bp=bp)
 @login_required
 def websocket(ws):
+    metrics.WEBSOCKET_CONNECTIONS.inc()
+    try:
+        _push_jobs(ws)
+    finally:
+        metrics.WEBSOCKET_CONNECTIONS.dec()
+
+
+def _push_jobs(ws):
+    user = current_user.username
+    conn = dbh.get_db_connection()
+    try:
+        _push_job_batches(ws, conn, user)
+    finally:
+        dbh.close_db(conn)
+
+
+def _send_jobs(ws, conn, user, batch, track_seen=True):
+    """Push the jobs the user has not hidden.
+
+    With track_seen, jobs already sent are skipped and the rest marked
+    seen; only real job keys qualify, since the demo ids restart at 1 on
+    every connection.
+    """
+    kinds = job_marks.KINDS if track_seen else (job_marks.HIDDEN,)
+    batch = job_marks.filter_jobs(conn, user, batch, kinds)
+    if batch:
+        ws.send(json.dumps({"type": "jobs", "data": batch}))
+        if track_seen:
+            job_marks.mark(conn, user, job_marks.SEEN, [job_marks.job_key(j) for j in batch])
+
+
+def _new_snapshot_jobs(conn, known, max_age):
+    """Jobs added to the leader's snapshots since the last call.
+
+    known maps source -> (jobs, job keys) as last seen and is updated in
+    place; a source's first snapshot only seeds it.
+    """
+    added = []
+    for name, _ in JOB_SOURCES:
+        jobs = _snapshots.get(conn, name, max_age)
+        previous = known.get(name)
+        if jobs is None or (previous is not None and previous[0] is jobs):
+            continue
+        keys = {job_marks.job_key(j) for j in jobs}
+        if previous is not None:
+            added.extend(j for j in jobs if job_marks.job_key(j) not in previous[1])
+        known[name] = (jobs, keys)
+    return added
+
+
+def _send_search_matches(ws, conn, user):
+    matches = dbh.take_saved_search_matches(conn, user)
+    if matches:
+        ws.send(json.dumps({"type": "search_matches", "data": matches}))
+
+
+SEARCH_MATCH_PUSH_SECONDS = 5
+
+
+def _push_job_batches(ws, conn, user):
     job_counter = 1
 
     # initial batch
@@ -306,10 +723,27 @@ def websocket(ws):
         },
     ]
     job_counter += 2
-    ws.send(json.dumps({"type": "jobs", "data": batch}))
+    _send_jobs(ws, conn, user, batch, track_seen=False)
+
+    _send_search_matches(ws, conn, user)
 
-    last_sent = time.time()
+    # With an ingestion leader, also push postings its refreshes add; the
+    # seen set keeps each one to a single push per user across connections
+    max_age = _snapshot_max_age()
+    known = {}
+    if max_age > 0:
+        _new_snapshot_jobs(conn, known, max_age)
+
+    last_sent = last_matches = time.time()
     while True:
+        time.sleep(1)
+        if time.time() - last_matches >= SEARCH_MATCH_PUSH_SECONDS:
+            _send_search_matches(ws, conn, user)
+            if max_age > 0:
+                added = _new_snapshot_jobs(conn, known, max_age)
+                if added:
+                    _send_jobs(ws, conn, user, added)
+            last_matches = time.time()
         if time.time() - last_sent >= 8:
             job = {
                 "id": str(job_counter),
@@ -318,35 +752,64 @@ def websocket(ws):
                 "skills": ["example", "sample"],
             }
             job_counter += 1
-            ws.send(json.dumps({"type": "jobs", "data": [job]}))
+            _send_jobs(ws, conn, user, [job], track_seen=False)
             last_sent = time.time()
 
 
 # ---------------------------------------------------------
 # EXTRA PAGES
 # ---------------------------------------------------------
-@app.route("/job_updates")
+@bp.route("/job_updates")
 @login_required
 def job_updates():
     return render_template("job_updates.html")
 
 
-@app.route("/save_job", methods=["POST"])
+MAX_SAVED_CHANGES = 500  # per /saved_jobs/batch or /saved_jobs/sync request
+SAVED_SYNC_PAGE = 500  # saved/removed jobs per /saved_jobs/sync reply
+
+
+def _clean_job_payload(payload):
+    """Round-trip a client job through JSON; None if it is not a serializable dict."""
+    if not isinstance(payload, dict):
+        return None
+    try:
+        return json.loads(json.dumps(payload, separators=(",", ":")))
+    except (TypeError, ValueError):
+        return None
+
+
+def _saved_changes_from(payload):
+    """(saves, unsaves) from {"save": [job, ...], "unsave": [job id, ...]}; None if malformed."""
+    save = payload.get("save") or []
+    unsave = payload.get("unsave") or []
+    if not isinstance(save, list) or not isinstance(unsave, list):
+        return None
+    if len(save) + len(unsave) > MAX_SAVED_CHANGES:
+        return None
+    saves = []
+    for job in save:
+        job_clean = _clean_job_payload(job)
+        if job_clean is None:
+            return None
+        saves.append((_derive_job_identifier(job_clean), job_clean))
+    return saves, [str(job_id) for job_id in unsave if job_id]
+
+
+@bp.route("/save_job", methods=["POST"])
 @login_required
 def save_job():
     payload = request.get_json(silent=True)
     if not isinstance(payload, dict):
         return jsonify({"ok": False, "error": "invalid_payload"}), 400
 
-    job_id = _derive_job_identifier(payload)
-    saved_id = f"{current_user.username}:{job_id}"
-
-    try:
-        serialized = json.dumps(payload, separators=(",", ":"))
-        job_clean = json.loads(serialized)
-    except (TypeError, ValueError):
+    job_clean = _clean_job_payload(payload)
+    if job_clean is None:
         return jsonify({"ok": False, "error": "unserializable_job"}), 400
 
+    job_id = _derive_job_identifier(job_clean)
+    saved_id = f"{current_user.username}:{job_id}"
+
     conn = dbh.get_db_connection()
     try:
         dbh.upsert_saved_job(conn, saved_id, current_user.username, job_clean)
@@ -356,7 +819,7 @@ def save_job():
     return jsonify({"ok": True, "saved_id": saved_id})
 
 
-@app.route("/saved_jobs", methods=["GET"])
+@bp.route("/saved_jobs", methods=["GET"])
 @login_required
 def saved_jobs():
     conn = dbh.get_db_connection()
@@ -364,11 +827,245 @@ def saved_jobs():
         jobs = dbh.fetch_saved_jobs(conn, current_user.username, limit=200)
     finally:
         dbh.close_db(conn)
+    if responses.wants_columnar():
+        return jsonify({"ok": True, "format": "columnar", **responses.to_columnar(jobs)})
     return jsonify({"ok": True, "data": jobs})
 
 
+@bp.route("/saved_jobs/batch", methods=["POST"])
+@login_required
+def saved_jobs_batch():
+    """Save/unsave many jobs in one transaction: {"save": [job, ...], "unsave": [id, ...]}."""
+    payload = request.get_json(silent=True)
+    changes = _saved_changes_from(payload) if isinstance(payload, dict) else None
+    if changes is None:
+        return jsonify({"ok": False, "error": "invalid_payload"}), 400
+    saves, unsaves = changes
+
+    conn = dbh.get_db_connection()
+    try:
+        version = dbh.apply_saved_job_changes(conn, current_user.username, saves, unsaves)
+    finally:
+        dbh.close_db(conn)
+
+    return jsonify({
+        "ok": True,
+        "saved": [job_id for job_id, _ in saves],
+        "removed": unsaves,
+        "sync_token": str(version),
+    })
+
+
+def _parse_sync_cursor(value):
+    """(full, version, after) from a "full:version:after" cursor; None if malformed."""
+    try:
+        full, version, after = str(value).split(":")
+        return full == "1", int(version), int(after)
+    except (TypeError, ValueError):
+        return None
+
+
+@bp.route("/saved_jobs/sync", methods=["POST"])
+@login_required
+def saved_jobs_sync():
+    """Delta sync with the browser's local store.
+
+    The client sends {"sync_token", "save", "unsave"} with only the changes
+    made since its last sync; the reply carries the jobs saved and the ids
+    removed after that token (from any device) plus the new token. A missing
+    or unknown token returns the full list with "full": true.
+
+    Replies hold at most SAVED_SYNC_PAGE changes. While "cursor" is set the
+    client posts {"cursor"} for the next page; "sync_token" is only issued
+    on the last one.
+    """
+    payload = request.get_json(silent=True)
+    changes = _saved_changes_from(payload) if isinstance(payload, dict) else None
+    if changes is None:
+        return jsonify({"ok": False, "error": "invalid_payload"}), 400
+    saves, unsaves = changes
+    cursor = None
+    if payload.get("cursor"):
+        cursor = _parse_sync_cursor(payload["cursor"])
+        if cursor is None or saves or unsaves:
+            return jsonify({"ok": False, "error": "invalid_cursor"}), 400
+    try:
+        since = int(payload.get("sync_token") or 0)
+    except (TypeError, ValueError):
+        since = 0
+
+    conn = dbh.get_db_connection()
+    try:
+        dbh.apply_saved_job_changes(conn, current_user.username, saves, unsaves)
+        delta = dbh.saved_jobs_since(conn, current_user.username, since, limit=SAVED_SYNC_PAGE, cursor=cursor)
+    finally:
+        dbh.close_db(conn)
+
+    next_cursor = delta["cursor"]
+    return jsonify({
+        "ok": True,
+        "full": delta["full"],
+        "saved": delta["saved"],
+        "removed": delta["removed"],
+        "cursor": f"{int(next_cursor[0])}:{next_cursor[1]}:{next_cursor[2]}" if next_cursor else None,
+        "sync_token": None if next_cursor else str(delta["version"]),
+    })
+
+
+@bp.route("/api/job_marks", methods=["GET", "POST"])
+@login_required
+def api_job_marks():
+    """Hidden/seen job sets. POST {"hide", "unhide", "seen": [job ids], "clear": ["hidden"|"seen"]}."""
+    user = current_user.username
+    conn = dbh.get_db_connection()
+    try:
+        if request.method == "POST":
+            data = request.get_json(silent=True)
+            if not isinstance(data, dict):
+                return jsonify({"ok": False, "error": "invalid_payload"}), 400
+            for kind in data.get("clear") or []:
+                if kind in job_marks.KINDS:
+                    job_marks.unmark(conn, user, kind)
+            if data.get("unhide"):
+                job_marks.unmark(conn, user, job_marks.HIDDEN, [str(k) for k in data["unhide"]])
+            if data.get("hide"):
+                job_marks.mark(conn, user, job_marks.HIDDEN, [str(k) for k in data["hide"]])
+            if data.get("seen"):
+                job_marks.mark(conn, user, job_marks.SEEN, [str(k) for k in data["seen"]])
+
+        return jsonify({
+            "ok": True,
+            "hidden": job_marks.marked_keys(conn, user, job_marks.HIDDEN),
+            "seen_count": len(job_marks.marks_for(conn, user, job_marks.SEEN)),
+        })
+    finally:
+        dbh.close_db(conn)
+
+
+# /api/jobs/recent and /api/analytics/* read the jobs table and its demand
+# rollups, which only ingestion writes: the ingestion leader
+# (JOBS_INGEST_INTERVAL > 0, as run_gunicorn.sh sets) or the davidsscraper
+# CLI. With per-request fetching alone they stay empty.
+@bp.route("/api/jobs/recent")
+@login_required
+def recent_jobs():
+    """Ingested postings newest first: ?days=N (posted in the last N days), ?source=, ?limit=."""
+    try:
+        days = int(request.args["days"]) if request.args.get("days") else None
+        limit = min(int(request.args.get("limit", 100)), 1000)
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid_params"}), 400
+    conn = dbh.get_db_connection()
+    try:
+        jobs = dbh.get_recent_jobs(conn, days=days, source=request.args.get("source"), limit=limit)
+    finally:
+        dbh.close_db(conn)
+    if responses.wants_columnar():
+        return jsonify({"ok": True, "format": "columnar", **responses.to_columnar(jobs)})
+    return jsonify({"ok": True, "jobs": jobs})
+
+
+@bp.route("/api/analytics/skills")
+@login_required
+def skill_demand():
+    """Top skills from the demand rollups: ?days=N, ?by=source,category, ?source=, ?category=, ?limit=."""
+    try:
+        days = int(request.args["days"]) if request.args.get("days") else None
+        limit = min(int(request.args.get("limit", 20)), 500)
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid_params"}), 400
+    by = [g for g in request.args.get("by", "").split(",") if g]
+    if any(g not in dbh.DEMAND_GROUPS for g in by):
+        return jsonify({"ok": False, "error": "invalid_group"}), 400
+    conn = dbh.get_db_connection()
+    try:
+        skills = dbh.get_skill_demand(
+            conn, days=days, by=by, source=request.args.get("source"),
+            category=request.args.get("category"), limit=limit,
+        )
+    finally:
+        dbh.close_db(conn)
+    return jsonify({"ok": True, "days": days, "by": by, "skills": skills})
+
+
+@bp.route("/api/analytics/skills/<skill>")
+@login_required
+def skill_demand_trend(skill):
+    """Daily posted/expired counts for one skill: ?days=N (default 90), ?source=, ?category=."""
+    try:
+        days = min(int(request.args.get("days", 90)), 3650)
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid_params"}), 400
+    conn = dbh.get_db_connection()
+    try:
+        trend = dbh.get_skill_demand_trend(
+            conn, skill, days=days, source=request.args.get("source"), category=request.args.get("category"),
+        )
+    finally:
+        dbh.close_db(conn)
+    return jsonify({"ok": True, "skill": skill, "days": days, "trend": trend})
+
+
+@bp.route("/api/saved_searches", methods=["GET", "POST"])
+@login_required
+def api_saved_searches():
+    """List or create saved searches: POST {"name", "skills", "keywords", "filters"}."""
+    conn = dbh.get_db_connection()
+    try:
+        if request.method == "POST":
+            data = request.get_json(silent=True)
+            if not isinstance(data, dict):
+                return jsonify({"ok": False, "error": "invalid_payload"}), 400
+            query = percolator.parse_query(data)
+            if not (query["skills"] or query["keywords"] or query["filters"]):
+                return jsonify({"ok": False, "error": "empty_search"}), 400
+            name = (data.get("name") or "").strip() or ", ".join(query["skills"] + query["keywords"])
+            search_id = dbh.create_saved_search(conn, current_user.username, name, query)
+            return jsonify({"ok": True, "id": search_id, "name": name, **query}), 201
+
+        searches = dbh.list_saved_searches(conn, current_user.username)
+        return jsonify({"ok": True, "data": searches})
+    finally:
+        dbh.close_db(conn)
+
+
+@bp.route("/api/saved_searches/<int:search_id>", methods=["DELETE"])
+@login_required
+def delete_saved_search(search_id):
+    conn = dbh.get_db_connection()
+    try:
+        deleted = dbh.delete_saved_search(conn, current_user.username, search_id)
+    finally:
+        dbh.close_db(conn)
+    if not deleted:
+        return jsonify({"ok": False, "error": "not_found"}), 404
+    return jsonify({"ok": True})
+
+
+@bp.route("/api/saved_searches/digest")
+@login_required
+def saved_searches_digest():
+    """New postings matched to the user's saved searches since the last digest or push.
+
+    peek=1 returns them without marking them delivered.
+    """
+    conn = dbh.get_db_connection()
+    try:
+        matches = dbh.take_saved_search_matches(
+            conn, current_user.username, mark_delivered=not request.args.get("peek")
+        )
+    finally:
+        dbh.close_db(conn)
+    return jsonify({"ok": True, "data": matches})
+
+
+@bp.route("/metrics")
+def metrics_endpoint():
+    return Response(metrics.render_latest(), content_type=metrics.CONTENT_TYPE)
+
+
 # ---------------------------------------------------------
 # RUN APP
 # ---------------------------------------------------------
 if __name__ == "__main__":
-    app.run(debug=True)
+    create_app().run(debug=True)
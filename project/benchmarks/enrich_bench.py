@@ -0,0 +1,46 @@
+"""
+Skill-enrichment benchmark: in-process parsing vs the process-pool parse stage.
+
+Detail pages come from the local stub job board, so only the fetch
+round-trip is real.
+
+Usage: python benchmarks/enrich_bench.py [n_rows] [processes]
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import ku_jobs_scraper as ku
+from stub_server import running_stub
+
+
+def run(rows, processes):
+    ku.DETAIL_CACHE.clear()
+    for r in rows:
+        r.skills = None
+    t0 = time.perf_counter()
+    ku.enrich_rows_with_skills(None, rows, processes=processes)
+    return [r.skills for r in rows], time.perf_counter() - t0
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    ku.MAX_CACHE_SIZE = 10 ** 6
+    with running_stub():
+        rows = ku.parse_listings_table(ku.fetch_html_text(ku.get_session(), ku.LIST_URL))[:n]
+        # Warm the process pool so worker start-up is not billed to the run
+        run(rows[:processes], processes)
+        inline_skills, inline_s = run(rows, 0)
+        pool_skills, pool_s = run(rows, processes)
+
+    assert inline_skills == pool_skills
+    print(f"{len(rows)} detail pages, {os.cpu_count()} cores")
+    print(f"threads only (parse in-process)  {inline_s * 1000:>9.1f} ms")
+    print(f"fetch threads + {processes} parse procs   {pool_s * 1000:>9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+"""
+Load generator for the Flask app.
+
+Simulates concurrent user sessions (login, /get_jobs with varied skills,
+saving and listing jobs, profile reads and writes) plus long-lived
+/job_socket connections, and reports throughput, latency percentiles,
+error rates and the server process's CPU and RSS.
+
+By default the app is started in a child process against the stub job
+board and a throwaway database, so nothing touches the network or the
+real jobs.db / users.db. Pass --target to load an already running server
+instead (add --server-pid to sample its CPU and memory).
+
+Usage:
+  python benchmarks/load_test.py [--users 20] [--ws 10] [--duration 30]
+                                 [--think-ms 200] [--ingest-interval 0]
+                                 [--target URL --server-pid PID] [--out load.json]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import requests
+
+BENCH_DIR = Path(__file__).resolve().parent
+PROJECT_DIR = BENCH_DIR.parent
+sys.path.append(str(PROJECT_DIR))
+sys.path.append(str(BENCH_DIR))
+
+SKILL_SETS = [
+    "python", "python, sql", "javascript, react", "aws, devops", "java",
+    "c#, .net", "excel", "data analysis, sql", "node, typescript", "marketing",
+]
+
+# Relative weight of each session action
+ACTIONS = [
+    ("get_jobs", 30),
+    ("get_jobs[stream]", 15),
+    ("save_job", 15),
+    ("saved_jobs", 20),
+    ("profile[get]", 15),
+    ("profile[post]", 5),
+]
+
+
+# ---------------- server under test ----------------
+
+def serve(port, workdir):
+    """Child process: the app on the werkzeug threaded server, sources stubbed."""
+    import logging
+
+    from werkzeug.serving import make_server
+
+    import database_helpers as dbh
+    from stub_server import running_stub
+
+    os.chdir(workdir)
+    dbh.DB_PATH = Path(workdir) / "jobs.db"
+    dbh.USERS_DB_PATH = Path(workdir) / "users.db"
+    with running_stub():
+        import app as app_module
+
+        flask_app = app_module.create_app({"UPLOAD_FOLDER": str(Path(workdir) / "uploads")})
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)  # no per-request access log
+        server = make_server("127.0.0.1", port, flask_app, threaded=True)
+        print(f"READY {server.server_port}", flush=True)
+        server.serve_forever()
+
+
+def start_server(ingest_interval, workdir):
+    env = {**os.environ, "JOBS_INGEST_INTERVAL": str(ingest_interval)}
+    proc = subprocess.Popen(
+        [sys.executable, __file__, "--serve", "0", "--workdir", workdir],
+        cwd=PROJECT_DIR, env=env, stdout=subprocess.PIPE, text=True,
+    )
+    line = proc.stdout.readline()
+    if not line.startswith("READY"):
+        stop_server(proc)
+        raise RuntimeError(f"server did not start: {line!r}")
+    return proc, f"http://127.0.0.1:{line.split()[1]}"
+
+
+def stop_server(proc):
+    proc.terminate()
+    try:
+        proc.wait(10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+class ResourceSampler(threading.Thread):
+    """Samples a process's CPU time and RSS from /proc (Linux only)."""
+
+    def __init__(self, pid, interval=0.5):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.rss_samples = []
+        self.cpu_start = self.cpu_end = None
+        self._stop_event = threading.Event()
+
+    def _cpu_seconds(self):
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+    def _rss_mb(self):
+        with open(f"/proc/{self.pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+        return 0.0
+
+    def run(self):
+        try:
+            self.cpu_start = self._cpu_seconds()
+            self.started = time.perf_counter()
+            while not self._stop_event.wait(self.interval):
+                self.rss_samples.append(self._rss_mb())
+            self.cpu_end = self._cpu_seconds()
+            self.elapsed = time.perf_counter() - self.started
+        except (OSError, ValueError):
+            pass  # no /proc, or the process exited
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def report(self):
+        if self.cpu_end is None or not self.rss_samples:
+            return None
+        return {
+            "cpu_percent": round(100 * (self.cpu_end - self.cpu_start) / self.elapsed, 1),
+            "rss_mb_peak": round(max(self.rss_samples), 1),
+            "rss_mb_mean": round(statistics.mean(self.rss_samples), 1),
+        }
+
+
+# ---------------- load ----------------
+
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds, ok):
+        with self._lock:
+            self.latencies[name].append(seconds * 1000)
+            if not ok:
+                self.errors[name] += 1
+
+    def summary(self, elapsed):
+        out = {}
+        for name in sorted(self.latencies):
+            samples = sorted(self.latencies[name])
+            out[name] = {
+                "requests": len(samples),
+                "rps": round(len(samples) / elapsed, 2),
+                "errors": self.errors[name],
+                "error_rate": round(self.errors[name] / len(samples), 4),
+                "p50_ms": round(_percentile(samples, 50), 2),
+                "p95_ms": round(_percentile(samples, 95), 2),
+                "p99_ms": round(_percentile(samples, 99), 2),
+                "max_ms": round(samples[-1], 2),
+            }
+        return out
+
+
+def _percentile(sorted_samples, pct):
+    # nearest-rank
+    k = max(0, min(len(sorted_samples) - 1, round(pct / 100 * len(sorted_samples) + 0.5) - 1))
+    return sorted_samples[k]
+
+
+def _timed(stats, name, fn):
+    t0 = time.perf_counter()
+    try:
+        ok = fn()
+    except requests.RequestException:
+        ok = False
+    stats.record(name, time.perf_counter() - t0, ok)
+    return ok
+
+
+def _login(base, stats, username):
+    session = requests.Session()
+    session.post(f"{base}/register", data={"username": username, "password": "load"}, allow_redirects=False)
+    ok = _timed(stats, "login", lambda: session.post(
+        f"{base}/login", data={"username": username, "password": "load"}, allow_redirects=False
+    ).status_code == 302)
+    return session if ok else None
+
+
+def _action(base, session, name, rng, seen):
+    if name.startswith("get_jobs"):
+        data = {"skills": rng.choice(SKILL_SETS)}
+        if name == "get_jobs[stream]":
+            data["stream"] = "1"
+            with session.post(f"{base}/get_jobs", data=data, stream=True) as resp:
+                lines = [json.loads(line) for line in resp.iter_lines() if line]
+            for batch in lines:
+                seen.extend(batch.get("jobs") or [])
+            return resp.status_code == 200 and lines and lines[-1].get("type") == "done"
+        resp = session.post(f"{base}/get_jobs", data=data)
+        if resp.status_code == 200:
+            seen.extend(resp.json().get("jobs") or [])
+        return resp.status_code == 200
+    if name == "save_job":
+        job = rng.choice(seen) if seen else {"id": f"load-{rng.randrange(10 ** 6)}", "title": "Load test job"}
+        return session.post(f"{base}/save_job", json=job).status_code == 200
+    if name == "saved_jobs":
+        return session.get(f"{base}/saved_jobs").status_code == 200
+    if name == "profile[get]":
+        return session.get(f"{base}/api/profile").status_code == 200
+    if name == "profile[post]":
+        payload = {"name": "Load User", "info": f"run {rng.randrange(1000)}", "soft_skills": "teamwork"}
+        return session.post(f"{base}/api/profile", json=payload).status_code == 200
+    raise ValueError(name)
+
+
+def user_session(base, stats, index, deadline, think_ms, seed):
+    rng = random.Random(seed + index)
+    session = _login(base, stats, f"load{index}")
+    if session is None:
+        return
+    names = [n for n, _ in ACTIONS]
+    weights = [w for _, w in ACTIONS]
+    seen = []
+    while time.time() < deadline:
+        name = rng.choices(names, weights)[0]
+        _timed(stats, name, lambda: _action(base, session, name, rng, seen))
+        del seen[:-200]
+        if think_ms:
+            time.sleep(rng.expovariate(1000 / think_ms))
+
+
+def socket_session(base, stats, index, deadline, counts):
+    """Holds one /job_socket connection open until the deadline, counting pushes."""
+    import simple_websocket
+
+    session = _login(base, stats, f"loadws{index}")
+    if session is None:
+        return
+    cookie = "; ".join(f"{k}={v}" for k, v in session.cookies.items())
+    t0 = time.perf_counter()
+    try:
+        ws = simple_websocket.Client.connect(
+            base.replace("http", "ws", 1) + "/job_socket", headers={"Cookie": cookie}
+        )
+    except Exception:
+        stats.record("job_socket[connect]", time.perf_counter() - t0, False)
+        return
+    first = True
+    try:
+        while time.time() < deadline:
+            msg = ws.receive(timeout=max(0.1, min(1.0, deadline - time.time())))
+            if msg is None:
+                continue
+            if first:
+                # connect + first push, what a user waits for on the updates page
+                stats.record("job_socket[connect]", time.perf_counter() - t0, True)
+                first = False
+            counts[index] += 1
+    except simple_websocket.ConnectionClosed:
+        stats.record("job_socket[dropped]", time.perf_counter() - t0, False)
+    finally:
+        ws.close()
+
+
+def run_load(base, users, sockets, duration, think_ms, seed):
+    stats = Stats()
+    counts = [0] * sockets
+    deadline = time.time() + duration
+    threads = [
+        threading.Thread(target=user_session, args=(base, stats, i, deadline, think_ms, seed), daemon=True)
+        for i in range(users)
+    ] + [
+        threading.Thread(target=socket_session, args=(base, stats, i, deadline, counts), daemon=True)
+        for i in range(sockets)
+    ]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(duration + 60)
+    elapsed = time.perf_counter() - started
+    return stats, sum(counts), elapsed
+
+
+# ---------------- driver ----------------
+
+def print_report(report):
+    print(f"\n{'endpoint':<22}{'reqs':>7}{'rps':>8}{'err%':>7}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    for name, r in report["endpoints"].items():
+        print(
+            f"{name:<22}{r['requests']:>7}{r['rps']:>8.1f}{100 * r['error_rate']:>6.1f}%"
+            f"{r['p50_ms']:>7.1f}ms{r['p95_ms']:>7.1f}ms{r['p99_ms']:>7.1f}ms{r['max_ms']:>7.1f}ms"
+        )
+    t = report["totals"]
+    print(f"\ntotal {t['requests']} requests in {t['seconds']:.1f}s = {t['rps']:.1f} req/s, "
+          f"{t['errors']} errors, {t['socket_messages']} websocket messages")
+    if report["server"]:
+        s = report["server"]
+        print(f"server cpu {s['cpu_percent']}%  rss peak {s['rss_mb_peak']} MB (mean {s['rss_mb_mean']} MB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=20, help="concurrent HTTP sessions")
+    parser.add_argument("--ws", type=int, default=10, help="concurrent /job_socket connections")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of load")
+    parser.add_argument("--think-ms", type=float, default=200, help="mean pause between a user's requests")
+    parser.add_argument("--ingest-interval", type=float, default=0,
+                        help="JOBS_INGEST_INTERVAL for the local server (0: live fetch per request)")
+    parser.add_argument("--target", help="base URL of a running server instead of a local one")
+    parser.add_argument("--server-pid", type=int, help="pid to sample CPU/RSS from with --target")
+    parser.add_argument("--seed", type=int, default=581)
+    parser.add_argument("--out", help="write JSON results here")
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve is not None:
+        serve(args.serve, args.workdir)
+        return
+
+    proc = workdir = None
+    if args.target:
+        base, pid = args.target.rstrip("/"), args.server_pid
+    else:
+        # Throwaway database and uploads, removed once the server has exited
+        workdir = tempfile.TemporaryDirectory(prefix="jobs-load-")
+        try:
+            proc, base = start_server(args.ingest_interval, workdir.name)
+        except BaseException:
+            workdir.cleanup()
+            raise
+        pid = proc.pid
+    sampler = ResourceSampler(pid) if pid else None
+    try:
+        if sampler:
+            sampler.start()
+        stats, socket_messages, elapsed = run_load(
+            base, args.users, args.ws, args.duration, args.think_ms, args.seed
+        )
+        if sampler:
+            sampler.stop()
+    finally:
+        if proc is not None:
+            stop_server(proc)
+        if workdir is not None:
+            workdir.cleanup()
+
+    endpoints = stats.summary(elapsed)
+    total = sum(r["requests"] for r in endpoints.values())
+    report = {
+        "config": {k: v for k, v in vars(args).items() if k not in ("serve", "workdir", "out")},
+        "endpoints": endpoints,
+        "totals": {
+            "requests": total,
+            "errors": sum(r["errors"] for r in endpoints.values()),
+            "seconds": round(elapsed, 2),
+            "rps": round(total / elapsed, 2),
+            "socket_messages": socket_messages,
+        },
+        "server": sampler.report() if sampler else None,
+    }
+    print_report(report)
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2))
+        print(f"\nwrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Regenerate the offline HTML/JSON fixtures used by the benchmarks.
+
+The pages mirror the structure of employment.ku.edu (Drupal chrome around a
+views table) so the parsers exercise the same code paths as in production.
+
+Usage: python benchmarks/make_fixtures.py [n_listings]
+"""
+import json
+import random
+import sys
+from pathlib import Path
+
+FIXTURE_DIR = Path(__file__).resolve().parent / "fixtures"
+DETAIL_FIXTURES = 40
+
+DEPARTMENTS = [
+    "Information Technology", "School of Engineering", "KU Libraries", "Athletics",
+    "Biology", "Chemistry", "Physics & Astronomy", "KU Medical Center Research",
+    "Business", "Journalism", "Student Housing", "Financial Aid",
+]
+CAMPUSES = ["Lawrence", "KU Medical Center", "Edwards", "Wichita", "Salina"]
+CATEGORIES = ["staff", "faculty", "students"]
+TITLES = [
+    "Software Developer", "Research Assistant", "Data Analyst", "Systems Administrator",
+    "Lab Technician", "Assistant Professor", "Student Web Developer", "Program Coordinator",
+]
+SKILL_SENTENCES = [
+    "Experience with Python and SQL is preferred.",
+    "Familiarity with Linux, Bash and Git.",
+    "Build dashboards in Tableau or Power BI using Excel exports.",
+    "Develop React front ends backed by Node.js and a REST API.",
+    "Deploy services to AWS with Docker and Kubernetes.",
+    "Analyze data with pandas, numpy and scikit-learn.",
+    "Maintain Java and C# applications against an Oracle database.",
+]
+
+_CHROME_HEAD = """<!DOCTYPE html>
+<html lang="en" dir="ltr">
+<head>
+<meta charset="utf-8">
+<title>{title} | KU Employment</title>
+<link rel="stylesheet" href="/themes/ku/css/style.css">
+<script>window.dataLayer = window.dataLayer || [];</script>
+</head>
+<body class="path-jobs">
+<header class="site-header"><nav class="navbar">
+{nav}
+</nav></header>
+"""
+_CHROME_FOOT = """<footer class="site-footer"><div class="footer-links">
+{links}
+</div><p>The University of Kansas prohibits discrimination on the basis of race,
+color, ethnicity, religion, sex, national origin, age, ancestry, disability,
+status as a veteran, sexual orientation, marital status, parental status,
+gender identity, gender expression, and genetic information.</p></footer>
+</body>
+</html>
+"""
+
+
+def _chrome(rng, title):
+    nav = "\n".join(
+        f'<a class="nav-link" href="/section/{i}">Section {i}</a>' for i in range(40)
+    )
+    links = "\n".join(
+        f'<a href="https://ku.edu/link/{rng.randint(1, 10**6)}">Resource {i}</a>' for i in range(60)
+    )
+    return _CHROME_HEAD.format(title=title, nav=nav), _CHROME_FOOT.format(links=links)
+
+
+def listing_rows(n, seed=581):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        cat = rng.choice(CATEGORIES)
+        posting_id = f"{30000 + i}BR"
+        title = rng.choice(TITLES)
+        if rng.random() < 0.05:
+            title = f"[**Internal Only**] {title}"
+        rows.append({
+            "title": title,
+            "href": f"/jobs/{cat}/{posting_id.lower()}-{title.split()[-1].lower()}",
+            "id": posting_id,
+            "department": rng.choice(DEPARTMENTS),
+            "campus": rng.choice(CAMPUSES),
+            "reg_temp": rng.choice(["Regular", "Temporary"]),
+            "review_begins": f"{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}/2025",
+        })
+    return rows
+
+
+def listing_html(rows, seed=581):
+    rng = random.Random(seed)
+    head, foot = _chrome(rng, "Jobs")
+    parts = [head, '<main role="main"><div class="region-content">']
+    # A couple of unrelated layout tables before the listings, as on the live site
+    for t in range(3):
+        parts.append(f'<table class="layout"><tr><td>Filter {t}</td><td><select name="f{t}">')
+        parts.extend(f"<option>Option {k}</option>" for k in range(25))
+        parts.append("</select></td></tr></table>")
+    parts.append('<table class="views-table cols-6"><thead><tr>')
+    parts.extend(
+        f'<th scope="col">{h}</th>'
+        for h in ("Posting Title", "ID", "Department", "Primary Campus", "Reg/Temp", "Review Begins")
+    )
+    parts.append("</tr></thead><tbody>")
+    for r in rows:
+        parts.append(
+            f'<tr><td class="views-field views-field-title"><a href="{r["href"]}" hreflang="en">{r["title"]}</a></td>'
+            f'<td class="views-field">{r["id"]}</td>'
+            f'<td class="views-field">{r["department"]}</td>'
+            f'<td class="views-field">{r["campus"]}</td>'
+            f'<td class="views-field">{r["reg_temp"]}</td>'
+            f'<td class="views-field"><time>{r["review_begins"]}</time></td></tr>'
+        )
+    parts.append("</tbody></table></div></main>")
+    parts.append(foot)
+    return "\n".join(parts)
+
+
+def detail_html(row, seed=0):
+    rng = random.Random(f"{seed}:{row['id']}")
+    head, foot = _chrome(rng, row["title"])
+    body = [
+        f"<p>The {row['department']} department seeks a {row['title']} "
+        f"on the {row['campus']} campus.</p>",
+        "<h2>Job Description</h2>",
+        "<ul>" + "".join(f"<li>{rng.choice(SKILL_SENTENCES)}</li>" for _ in range(6)) + "</ul>",
+        "<h2>Required Qualifications</h2>",
+        "<p>" + " ".join(rng.choice(SKILL_SENTENCES) for _ in range(8)) + "</p>",
+        "<script>trackView('%s');</script>" % row["id"],
+        "<p>Review of applications begins <strong>%s</strong>.</p>" % row["review_begins"],
+    ]
+    content = (
+        '<div class="field field--name-body">' + "\n".join(body) + "</div>"
+    )
+    # Mix the wrappers so every selector in DETAIL_SELECTORS gets exercised
+    variant = rng.randrange(3)
+    if variant == 0:
+        inner = f'<main><article class="node"><div class="node__content">{content}</div></article></main>'
+    elif variant == 1:
+        inner = f'<div role="main"><div class="region-content">{content}</div></div>'
+    else:
+        inner = f'<div class="layout-container"><div class="region-content">{content}</div></div>'
+    sidebar = "".join(f'<div class="block">Related posting {i}</div>' for i in range(30))
+    return "\n".join([head, inner, f'<aside class="sidebar">{sidebar}</aside>', foot])
+
+
+REMOTE_TAGS = [
+    "python", "javascript", "react", "golang", "devops", "aws", "backend", "frontend",
+    "senior", "saas", "design", "marketing", "sales", "support", "data", "machine learning",
+]
+
+
+def remoteok_feed(n, seed=581):
+    """Shape of https://remoteok.com/api: a legal/metadata object, then jobs."""
+    rng = random.Random(seed)
+    feed = [{
+        "last_updated": 1761000000,
+        "legal": "API Terms of Service: Please link back to the URL on Remote OK and mention Remote OK as a source.",
+    }]
+    for i in range(n):
+        job_id = str(1100000 + i)
+        company = f"{rng.choice(['Acme', 'Globex', 'Initech', 'Umbrella', 'Hooli', 'Stark'])} {rng.choice(['Labs', 'Inc', 'Cloud', 'AI'])}"
+        position = rng.choice(TITLES + ["Senior Backend Engineer", "Product Designer", "DevOps Engineer"])
+        feed.append({
+            "slug": f"remote-{position.lower().replace(' ', '-')}-{job_id}",
+            "id": job_id,
+            "epoch": 1761000000 - i * 3600,
+            "date": f"2025-10-{1 + i % 28:02d}T{i % 24:02d}:00:00+00:00",
+            "company": company,
+            "company_logo": "",
+            "position": position,
+            "tags": rng.sample(REMOTE_TAGS, 4),
+            "description": "<p>" + " ".join(rng.choice(SKILL_SENTENCES) for _ in range(10)) + "</p>",
+            "location": rng.choice(["Remote", "Worldwide", "US only", "Europe"]),
+            "salary_min": 80000 + 1000 * rng.randint(0, 60),
+            "salary_max": 150000 + 1000 * rng.randint(0, 60),
+            "apply_url": f"https://remoteok.com/l/{job_id}",
+            "url": f"https://remoteok.com/remote-jobs/{job_id}",
+        })
+    return feed
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    FIXTURE_DIR.mkdir(exist_ok=True)
+    rows = listing_rows(n)
+    (FIXTURE_DIR / "ku_listings.html").write_text(listing_html(rows), encoding="utf-8")
+    detail_dir = FIXTURE_DIR / "ku_detail"
+    detail_dir.mkdir(exist_ok=True)
+    for r in rows[:DETAIL_FIXTURES]:
+        (detail_dir / f"{r['id']}.html").write_text(detail_html(r), encoding="utf-8")
+    (FIXTURE_DIR / "remoteok.json").write_text(json.dumps(remoteok_feed(n)), encoding="utf-8")
+    print(f"wrote fixtures for {n} listings to {FIXTURE_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Listing and detail-page parse-time benchmark on the saved KU fixtures.
+
+Usage: python benchmarks/parse_bench.py [repeat]
+"""
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import ku_jobs_scraper as ku
+from bs4 import BeautifulSoup
+
+FIXTURE = Path(__file__).resolve().parent / "fixtures" / "ku_listings.html"
+DETAIL_DIR = Path(__file__).resolve().parent / "fixtures" / "ku_detail"
+
+
+def bench(label, fn, html, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        rows = fn(html)
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    fn(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<28}{len(rows):>6} docs{best * 1000:>10.2f} ms{peak / 1024:>10.0f} KiB peak")
+    return rows
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    html = FIXTURE.read_text(encoding="utf-8")
+    print(f"{FIXTURE.name}: {len(html)} bytes")
+    slow = bench("BeautifulSoup", lambda h: ku.parse_listings_table(h, fast=False), html, repeat)
+    fast = bench("lxml iterparse", lambda h: ku.parse_listings_table(h, fast=True), html, repeat)
+    assert slow == fast, "fast parser output differs from BeautifulSoup parser"
+
+    pages = [p.read_bytes() for p in sorted(DETAIL_DIR.glob("*.html"))]
+    print(f"{len(pages)} detail pages: {sum(map(len, pages))} bytes")
+    slow = bench("BeautifulSoup + select_one", lambda ps: [ku._detail_text(BeautifulSoup(p, "lxml")) for p in ps], pages, repeat)
+    fast = bench("lxml + XPath", lambda ps: [ku.extract_detail_text(p) for p in ps], pages, repeat)
+    assert slow == fast, "detail extractor output differs from BeautifulSoup extractor"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Payload size / encode time benchmark for the /get_jobs response.
+
+Usage: python benchmarks/payload_bench.py [n_jobs]
+"""
+import gzip
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import responses
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def make_jobs(n):
+    jobs = []
+    for i in range(n):
+        if i % 2:
+            jobs.append({
+                "id": f"remote_{100000 + i}",
+                "name": f"Senior Backend Engineer {i}",
+                "title": f"Senior Backend Engineer {i}",
+                "short_description": f"Remote position at Company {i % 97}",
+                "url": f"https://remoteok.com/remote-jobs/{100000 + i}",
+                "source": "RemoteOK",
+                "company": f"Company {i % 97}",
+                "location": "Remote",
+                "date": "2025-11-02T08:00:07+00:00",
+                "posted_at": "2025-11-02",
+                "skills": ["python", "aws", "backend", "senior"],
+            })
+        else:
+            jobs.append({
+                "id": f"{30000 + i}BR",
+                "name": f"Research Assistant {i}",
+                "title": f"Research Assistant {i}",
+                "short_description": f"Department {i % 53} - Lawrence",
+                "url": f"https://employment.ku.edu/jobs/staff/{30000 + i}BR",
+                "source": "KU Jobs",
+                "category": "staff",
+                "department": f"Department {i % 53}",
+                "campus": "Lawrence",
+                "type": "Regular",
+                "review_begins": "11/15/2025",
+                "posted_at": "11/15/2025",
+                "skills": ["sql", "excel"],
+            })
+    return jobs
+
+
+def timed(fn, repeat=20):
+    best = float("inf")
+    out = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return out, best * 1000
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    jobs = make_jobs(n)
+    message = "Received skills: python"
+
+    def stdlib_rows():
+        return json.dumps({"message": message, "jobs": jobs}, separators=(",", ":")).encode()
+
+    def stdlib_cols():
+        return json.dumps({"message": message, **responses.to_columnar(jobs)}, separators=(",", ":")).encode()
+
+    cases = [("stdlib json, rows", stdlib_rows), ("stdlib json, columnar", stdlib_cols)]
+    if responses.orjson is not None:
+        orjson = responses.orjson
+        cases.append(("orjson, rows", lambda: orjson.dumps({"message": message, "jobs": jobs})))
+        cases.append(("orjson, columnar", lambda: orjson.dumps({"message": message, **responses.to_columnar(jobs)})))
+
+    print(f"{n} jobs")
+    print(f"{'encoder':<24}{'bytes':>10}{'encode ms':>11}{'gzip B':>10}{'gzip ms':>9}{'br B':>10}{'br ms':>8}")
+    for label, fn in cases:
+        body, enc_ms = timed(fn)
+        gz, gz_ms = timed(lambda: gzip.compress(body, compresslevel=responses.GZIP_LEVEL), repeat=5)
+        row = f"{label:<24}{len(body):>10}{enc_ms:>11.2f}{len(gz):>10}{gz_ms:>9.2f}"
+        if brotli is not None:
+            br, br_ms = timed(lambda: brotli.compress(body, quality=responses.BROTLI_QUALITY), repeat=5)
+            row += f"{len(br):>10}{br_ms:>8.2f}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
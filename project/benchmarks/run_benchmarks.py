@@ -0,0 +1,414 @@
+"""
+Offline benchmark suite.
+
+Replays the recorded fixtures through a local stub job board (no network
+access needed) and times the scraper, skill extraction, database helpers
+and the /get_jobs request end to end. Results are written as JSON so runs
+can be compared.
+
+Usage:
+  python benchmarks/run_benchmarks.py [--out results.json] [--compare baseline.json]
+                                      [--repeat N] [--only name,name] [--delay-ms N]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+PROJECT_DIR = BENCH_DIR.parent
+sys.path.append(str(PROJECT_DIR))
+sys.path.append(str(BENCH_DIR))
+
+import database_helpers as dbh
+import davidsscraper
+import ku_jobs_scraper as ku
+from stub_server import running_stub
+
+# A result is flagged as a regression when its median grows by more than this
+REGRESSION_RATIO = 1.20
+
+BENCHMARKS = []
+
+
+def benchmark(name, repeat=None):
+    def register(fn):
+        BENCHMARKS.append((name, fn, repeat))
+        return fn
+    return register
+
+
+def timed_runs(fn, repeat):
+    samples = []
+    items = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        items = fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return samples, items
+
+
+# ---------------- scraper ----------------
+
+@benchmark("ku.fetch_html_text")
+def bench_fetch_listings(ctx):
+    session = ku.get_session()
+    return lambda: len(ku.fetch_html_text(session, ku.LIST_URL))
+
+
+@benchmark("ku.parse_listings_table")
+def bench_parse_listings(ctx):
+    return lambda: len(ku.parse_listings_table(ctx["listings_html"]))
+
+
+@benchmark("ku.parse_listings_table[soup]")
+def bench_parse_listings_soup(ctx):
+    return lambda: len(ku.parse_listings_table(ctx["listings_html"], fast=False))
+
+
+@benchmark("ku.extract_detail_text")
+def bench_detail_text(ctx):
+    pages = ctx["detail_pages"]
+    return lambda: len([ku.extract_detail_text(p) for p in pages])
+
+
+@benchmark("ku.extract_skills_from_text")
+def bench_skill_tokens(ctx):
+    texts = ctx["detail_texts"]
+    return lambda: len([ku.extract_skills_from_text(t) for t in texts])
+
+
+@benchmark("ku._extract_given_skills_from_text")
+def bench_given_skills(ctx):
+    texts = ctx["detail_texts"]
+    given = ["Python", "sql", "node", "ts", "power bi", "c#"]
+    return lambda: len([ku._extract_given_skills_from_text(t, given) for t in texts])
+
+
+@benchmark("ku.enrich_rows_with_skills[cold]", repeat=3)
+def bench_enrich_cold(ctx):
+    rows = ku.parse_listings_table(ctx["listings_html"])[:120]
+
+    def run():
+        ku.DETAIL_CACHE.clear()
+        ku.enrich_rows_with_skills(None, rows)
+        return len(rows)
+    return run
+
+
+@benchmark("ku.enrich_rows_with_skills[cached]")
+def bench_enrich_cached(ctx):
+    rows = ku.parse_listings_table(ctx["listings_html"])[:120]
+    ku.DETAIL_CACHE.clear()
+    ku.enrich_rows_with_skills(None, rows)
+    return lambda: (ku.enrich_rows_with_skills(None, rows), len(rows))[1]
+
+
+@benchmark("remoteok.scrape_remoteok", repeat=3)
+def bench_remoteok(ctx):
+    return lambda: len(davidsscraper.scrape_remoteok())
+
+
+@benchmark("remoteok.ingest_remoteok[full feed]", repeat=3)
+def bench_remoteok_ingest(ctx):
+    return lambda: davidsscraper.ingest_remoteok()
+
+
+# ---------------- database_helpers ----------------
+
+@benchmark("dbh.setup_db")
+def bench_setup_db(ctx):
+    return lambda: dbh.close_db(dbh.setup_db()) or 1
+
+
+@benchmark("dbh.add_job+add_skill_to_job", repeat=3)
+def bench_db_writes(ctx):
+    jobs = ctx["api_jobs"][::4]
+
+    def run():
+        conn = dbh.get_db_connection()
+        try:
+            for j in jobs:
+                dbh.add_job(conn, j["title"], j.get("short_description"))
+                job_id = dbh.get_job_id(conn, j["title"])
+                for s in j.get("skills") or []:
+                    dbh.add_skill_to_job(conn, s, job_id)
+        finally:
+            dbh.close_db(conn)
+        return len(jobs)
+    return run
+
+
+@benchmark("dbh.get_job_for_skill")
+def bench_db_reads(ctx):
+    def run():
+        conn = dbh.get_db_connection()
+        try:
+            return sum(len(dbh.get_job_for_skill(conn, s)) for s in ("python", "aws", "react", "devops"))
+        finally:
+            dbh.close_db(conn)
+    return run
+
+
+@benchmark("dbh.upsert_saved_job", repeat=3)
+def bench_saved_writes(ctx):
+    jobs = ctx["api_jobs"][::4]
+
+    def run():
+        conn = dbh.get_db_connection()
+        try:
+            for j in jobs:
+                dbh.upsert_saved_job(conn, f"bench:{j['id']}", "bench", j)
+        finally:
+            dbh.close_db(conn)
+        return len(jobs)
+    return run
+
+
+@benchmark("dbh.apply_saved_job_changes[batch]", repeat=3)
+def bench_saved_batch(ctx):
+    saves = [(j["id"], j) for j in ctx["api_jobs"][::4]]
+
+    def run():
+        conn = dbh.get_db_connection()
+        try:
+            dbh.apply_saved_job_changes(conn, "bench-batch", saves)
+        finally:
+            dbh.close_db(conn)
+        return len(saves)
+    return run
+
+
+@benchmark("dbh.fetch_saved_jobs")
+def bench_saved_reads(ctx):
+    def run():
+        conn = dbh.get_db_connection()
+        try:
+            return len(dbh.fetch_saved_jobs(conn, "bench", limit=200))
+        finally:
+            dbh.close_db(conn)
+    return run
+
+
+@benchmark("dbh.get_skill_demand[by source+category]")
+def bench_skill_demand(ctx):
+    def run():
+        conn = dbh.get_db_connection()
+        try:
+            return len(dbh.get_skill_demand(conn, by=("source", "category"), limit=50))
+        finally:
+            dbh.close_db(conn)
+    return run
+
+
+# ---------------- saved searches ----------------
+
+@benchmark("percolator.match[5000 searches]")
+def bench_percolate(ctx):
+    import random
+    import percolator
+
+    rng = random.Random(581)
+    vocab = sorted({percolator.normalize_term(s) for j in ctx["api_jobs"] for s in j.get("skills") or []})
+    # Real saved searches span far more skills than one fixture feed carries
+    vocab += [f"skill{i}" for i in range(2000)]
+    searches = [
+        percolator.SavedSearch(i, f"user{i % 300}", f"search {i}", rng.sample(vocab, 2))
+        for i in range(5000)
+    ]
+    index = percolator.Percolator(searches)
+    jobs = ctx["api_jobs"]
+    return lambda: sum(len(index.match(j)) for j in jobs)
+
+
+# ---------------- snapshots ----------------
+
+@benchmark("job_snapshot.import_snapshot[fresh db]", repeat=3)
+def bench_snapshot_import(ctx):
+    import job_snapshot
+
+    davidsscraper.ingest_remoteok()
+    path = Path(tempfile.mkdtemp(prefix="jobs-snap-")) / "jobs.snap"
+    job_snapshot.export_snapshot(path)
+
+    def run():
+        # a new instance: empty database, schema migrated, then the bulk load
+        saved_path = dbh.DB_PATH
+        dbh.DB_PATH = path.with_name(f"fresh-{time.perf_counter_ns()}.db")
+        try:
+            conn = dbh.setup_db()
+            try:
+                return job_snapshot.import_snapshot(path, conn)["jobs"]
+            finally:
+                dbh.close_db(conn)
+        finally:
+            dbh.DB_PATH = saved_path
+    return run
+
+
+# ---------------- end to end ----------------
+
+def _logged_in_client(flask_app):
+    from werkzeug.security import generate_password_hash
+
+    conn = dbh.get_users_connection()
+    conn.execute(
+        "INSERT OR IGNORE INTO users (username, password_hash) VALUES (?, ?)",
+        ("bench", generate_password_hash("bench")),
+    )
+    conn.commit()
+    conn.close()
+    client = flask_app.test_client()
+    client.post("/login", data={"username": "bench", "password": "bench"})
+    return client
+
+
+@benchmark("app.create_app[new process]", repeat=5)
+def bench_boot(ctx):
+    # What a gunicorn worker pays before serving: interpreter, imports, factory
+    code = (
+        "import database_helpers as dbh; "
+        f"dbh.DB_PATH = {str(dbh.DB_PATH)!r}; "
+        "import app; app.create_app()"
+    )
+    env = {**os.environ, "PYTHONPATH": str(PROJECT_DIR)}
+
+    def run():
+        subprocess.run([sys.executable, "-c", code], cwd=os.getcwd(), env=env, check=True)
+        return 1
+    return run
+
+
+@benchmark("app./get_jobs", repeat=3)
+def bench_get_jobs(ctx):
+    client = ctx["client"]
+
+    def run():
+        resp = client.post("/get_jobs", data={"skills": "python"})
+        assert resp.status_code == 200, resp.status_code
+        return len(resp.get_json()["jobs"])
+    return run
+
+
+@benchmark("app./get_jobs[stream,first-batch]", repeat=3)
+def bench_get_jobs_first_batch(ctx):
+    client = ctx["client"]
+
+    def run():
+        resp = client.post("/get_jobs", data={"skills": "python", "stream": "1"}, buffered=False)
+        first = next(iter(resp.response))
+        resp.close()
+        return len(json.loads(first).get("jobs", []))
+    return run
+
+
+# ---------------- driver ----------------
+
+def build_context():
+    listings_html = (BENCH_DIR / "fixtures" / "ku_listings.html").read_text(encoding="utf-8")
+    detail_pages = [p.read_bytes() for p in sorted((BENCH_DIR / "fixtures" / "ku_detail").glob("*.html"))]
+    remote = json.loads((BENCH_DIR / "fixtures" / "remoteok.json").read_text(encoding="utf-8"))
+    api_jobs = [r.to_api_format() for r in ku.parse_listings_table(listings_html)]
+    api_jobs += [
+        {"id": f"remote_{j['id']}", "title": j["position"], "short_description": j["company"], "skills": j["tags"]}
+        for j in remote[1:]
+    ]
+    return {
+        "listings_html": listings_html,
+        "detail_pages": detail_pages,
+        "detail_texts": [ku.extract_detail_text(p) for p in detail_pages],
+        "api_jobs": api_jobs,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(results, baseline_path):
+    baseline = json.loads(Path(baseline_path).read_text())["results"]
+    regressions = 0
+    print(f"\n{'benchmark':<40}{'baseline':>12}{'current':>12}{'ratio':>8}")
+    for name, res in results.items():
+        old = baseline.get(name)
+        if not old:
+            continue
+        ratio = res["median_ms"] / old["median_ms"] if old["median_ms"] else float("inf")
+        flag = "  REGRESSION" if ratio > REGRESSION_RATIO else ""
+        regressions += bool(flag)
+        print(f"{name:<40}{old['median_ms']:>10.2f}ms{res['median_ms']:>10.2f}ms{ratio:>8.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--out", help="write JSON results here")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--only", help="comma-separated benchmark names")
+    parser.add_argument("--delay-ms", type=int, default=0, help="stub server latency per request")
+    args = parser.parse_args()
+    only = set(args.only.split(",")) if args.only else None
+
+    workdir = tempfile.mkdtemp(prefix="jobs-bench-")
+    os.chdir(workdir)  # app.py keeps users.db in the working directory
+    dbh.DB_PATH = Path(workdir) / "jobs.db"
+    ku.MAX_CACHE_SIZE = 10 ** 6
+
+    results = {}
+    with running_stub(delay_ms=args.delay_ms) as stub:
+        import app as app_module
+        ctx = build_context()
+        ctx["client"] = _logged_in_client(app_module.create_app({"TESTING": True}))
+        dbh.close_db(dbh.setup_db())
+
+        for name, factory, repeat in BENCHMARKS:
+            if only and name not in only:
+                continue
+            fn = factory(ctx)
+            samples, items = timed_runs(fn, repeat or args.repeat)
+            results[name] = {
+                "median_ms": round(statistics.median(samples), 3),
+                "min_ms": round(min(samples), 3),
+                "max_ms": round(max(samples), 3),
+                "runs": len(samples),
+                "items": items,
+            }
+            print(f"{name:<40}{results[name]['median_ms']:>10.2f} ms  (min {results[name]['min_ms']:.2f}, n={len(samples)}, items={items})")
+        stub_hits = stub.hits
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "stub_delay_ms": args.delay_ms,
+            "stub_requests": stub_hits,
+        },
+        "results": results,
+    }
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2))
+        print(f"\nwrote {args.out}")
+    if args.compare:
+        if compare(results, args.compare):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Local stub of employment.ku.edu and remoteok.com serving the recorded fixtures.
+
+Routes:
+  /jobs                       KU listings page
+  /jobs/<category>/<slug>     KU detail page (fixtures are reused round-robin)
+  /api                        RemoteOK JSON feed
+
+Run standalone with: python benchmarks/stub_server.py [port] [delay_ms]
+"""
+import sys
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+FIXTURE_DIR = Path(__file__).resolve().parent / "fixtures"
+
+
+class StubJobBoard(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, delay_ms=0):
+        super().__init__(address, StubHandler)
+        self.delay = delay_ms / 1000
+        self.listings = (FIXTURE_DIR / "ku_listings.html").read_bytes()
+        self.remoteok = (FIXTURE_DIR / "remoteok.json").read_bytes()
+        self.details = {p.stem.lower(): p.read_bytes() for p in sorted((FIXTURE_DIR / "ku_detail").glob("*.html"))}
+        self._detail_list = list(self.details.values())
+        self.hits = 0
+
+    def handle_error(self, request, client_address):
+        # Streaming clients hang up once they have read enough; that is not an error here
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+        super().handle_error(request, client_address)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def detail_for(self, slug):
+        posting_id = slug.split("-", 1)[0].lower()
+        page = self.details.get(posting_id)
+        if page is None:
+            page = self._detail_list[zlib.crc32(slug.encode()) % len(self._detail_list)]
+        return page
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, body, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        server.hits += 1
+        if server.delay:
+            time.sleep(server.delay)
+        path = self.path.split("?", 1)[0].rstrip("/")
+        if path == "/jobs":
+            self._send(server.listings, "text/html; charset=utf-8")
+        elif path.startswith("/jobs/") and path.count("/") == 3:
+            self._send(server.detail_for(path.rsplit("/", 1)[1]), "text/html; charset=utf-8")
+        elif path == "/api":
+            self._send(server.remoteok, "application/json")
+        else:
+            self.send_error(404)
+
+
+@contextmanager
+def running_stub(delay_ms=0):
+    """Start a stub board on a free port and point both scrapers at it."""
+    sys.path.append(str(Path(__file__).resolve().parent.parent))
+    import davidsscraper
+    import ku_jobs_scraper
+
+    server = StubJobBoard(("127.0.0.1", 0), delay_ms=delay_ms)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    saved = (ku_jobs_scraper.BASE_URL, ku_jobs_scraper.LIST_URL, davidsscraper.REMOTEOK_API_URL)
+    ku_jobs_scraper.BASE_URL = server.base_url
+    ku_jobs_scraper.LIST_URL = f"{server.base_url}/jobs"
+    davidsscraper.REMOTEOK_API_URL = f"{server.base_url}/api"
+    try:
+        yield server
+    finally:
+        ku_jobs_scraper.BASE_URL, ku_jobs_scraper.LIST_URL, davidsscraper.REMOTEOK_API_URL = saved
+        server.shutdown()
+        server.server_close()
+
+
+def main():
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8581
+    delay_ms = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    server = StubJobBoard(("127.0.0.1", port), delay_ms=delay_ms)
+    print(f"stub job board on {server.base_url} (delay {delay_ms} ms)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
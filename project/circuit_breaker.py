@@ -0,0 +1,93 @@
+"""
+Per-source circuit breakers for the upstream job boards.
+
+A breaker starts closed. After failure_threshold consecutive failures it
+opens: callers are refused at once (and serve a fallback) until the
+cool-down has passed. The first caller after that runs a single probe
+(half-open) while the others keep being refused. A successful probe
+closes the breaker and resets the cool-down; a failed one reopens it
+with the cool-down doubled, up to max_cooldown.
+
+State is per process, so each gunicorn worker trips on its own failures.
+"""
+from __future__ import annotations
+
+import time
+from threading import Lock
+from typing import Callable, Dict
+
+import metrics
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = 3, cooldown: float = 5.0,
+                 max_cooldown: float = 300.0, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.cooldown = cooldown
+        self.opened_at = 0.0
+        self._lock = Lock()
+        self._gauge = metrics.SOURCE_BREAKER_STATE.labels(name)
+        self._gauge.set(_STATE_VALUES[CLOSED])
+
+    def _set_state(self, state: str) -> None:
+        self.state = state
+        self._gauge.set(_STATE_VALUES[state])
+
+    def allow(self) -> bool:
+        """True if the caller may hit the upstream (it must then report the outcome)."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and self.clock() - self.opened_at >= self.cooldown:
+                self._set_state(HALF_OPEN)
+                return True  # this caller is the probe
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.cooldown = self.base_cooldown
+            self._set_state(CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN:
+                self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+            elif self.failures < self.failure_threshold:
+                return
+            self.opened_at = self.clock()
+            self._set_state(OPEN)
+
+    def retry_in(self) -> float:
+        """Seconds until the next probe is allowed (0 unless open)."""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.cooldown - (self.clock() - self.opened_at))
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_registry_lock = Lock()
+
+
+def get(name: str, **settings) -> CircuitBreaker:
+    """This process's breaker for source name (settings apply on first use only)."""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _registry_lock:
+            breaker = _breakers.get(name)
+            if breaker is None:
+                breaker = _breakers[name] = CircuitBreaker(name, **settings)
+    return breaker
@@ -1,10 +1,25 @@
 import json
 import sqlite3
+import sys
 from pathlib import Path
 
+import metrics
+import migrations
+import posting_dates
+import profile_skills
+
 
 BASE_DIR = Path(__file__).resolve().parent
 DB_PATH = BASE_DIR / "jobs.db"
+# Relative to the working directory, where app.py has always kept it
+USERS_DB_PATH = "users.db"
+
+# Postings no ingestion run has seen for this long are archived
+RETENTION_DAYS = 30
+# A full run only archives a source's missing postings when it saw at least
+# this share of the rows already stored (a rate-limited or truncated reply
+# must not wipe the table)
+MIN_FEED_SHARE = 0.5
 
 
 def get_db_connection():
@@ -14,106 +29,41 @@ def get_db_connection():
     conn.row_factory = sqlite3.Row
     return conn
 
+def get_users_connection():
+    return sqlite3.connect(USERS_DB_PATH)
+
+@metrics.timed_db
 def setup_db():
+    """Open jobs.db, migrating its schema first when it is behind."""
     conn = get_db_connection()
-    cur = conn.cursor()
-
-    # --- existing jobs/skills tables ---
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS jobs (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT NOT NULL,
-        description TEXT
-    )
-    """)
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS skills (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT NOT NULL UNIQUE
-    )
-    """)
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS job_skills (
-      id INTEGER PRIMARY KEY AUTOINCREMENT,
-      job_id INTEGER NOT NULL,
-      skill_id INTEGER NOT NULL,
-      FOREIGN KEY (job_id) REFERENCES jobs(id),
-      FOREIGN KEY (skill_id) REFERENCES skills(id)
-    )
-    """)
-    cur.execute("""
-    CREATE UNIQUE INDEX IF NOT EXISTS idx_job_skills_pair
-        ON job_skills(job_id, skill_id)
-    """)
-    cur.execute("""
-    CREATE INDEX IF NOT EXISTS idx_job_skills_job
-        ON job_skills(job_id)
-    """)
-    cur.execute("""
-    CREATE INDEX IF NOT EXISTS idx_job_skills_skill
-        ON job_skills(skill_id)
-    """)
-
-    # --- NEW: user_profile table (per-user rows) ---
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS user_profile (
-        user TEXT PRIMARY KEY,
-        name TEXT,
-        info TEXT,
-        soft_skills TEXT,
-        photo_path TEXT
-    )
-    """)
-
-    # If the table was created with the legacy integer id column, migrate it.
-    profile_cols = [row[1] for row in cur.execute("PRAGMA table_info(user_profile)").fetchall()]
-    if "user" not in profile_cols and "id" in profile_cols:
-        cur.execute("ALTER TABLE user_profile RENAME TO user_profile_legacy")
-        cur.execute("""
-        CREATE TABLE user_profile (
-            user TEXT PRIMARY KEY,
-            name TEXT,
-            info TEXT,
-            soft_skills TEXT,
-            photo_path TEXT
-        )
-        """)
-        cur.execute(
-            """
-            INSERT OR IGNORE INTO user_profile (user, name, info, soft_skills, photo_path)
-            SELECT 'default', name, info, soft_skills, photo_path
-            FROM user_profile_legacy
-            WHERE id = 1
-            """
-        )
-        cur.execute("DROP TABLE user_profile_legacy")
-
-    # --- NEW: saved jobs table ---
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS saved_jobs (
-        id TEXT PRIMARY KEY,
-        user TEXT NOT NULL,
-        job_json TEXT NOT NULL,
-        saved_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
-    )
-    """)
-    cur.execute("""
-    CREATE INDEX IF NOT EXISTS idx_saved_jobs_user
-        ON saved_jobs(user)
-    """)
-
-    conn.commit()
+    migrations.migrate(conn, migrations.JOBS_DB)
     return conn
 
+@metrics.timed_db
+def setup_users_db():
+    conn = get_users_connection()
+    try:
+        migrations.migrate(conn, migrations.USERS_DB)
+    finally:
+        conn.close()
+
 
 # ---------------- existing job helper functions ----------------
 
+def skill_key(name):
+    """The stored form of a skill name; every skills.name read or write goes through it."""
+    return str(name).strip().lower()
+
+
+@metrics.timed_db
 def add_job(conn, name, description):
     cur = conn.cursor()
     cur.execute("INSERT INTO jobs (name, description) VALUES (?, ?)", (name, description))
     conn.commit()
 
+@metrics.timed_db
 def add_skill_to_job(conn, skill_name, job_id):
+    skill_name = skill_key(skill_name)
     cur = conn.cursor()
     cur.execute("INSERT OR IGNORE INTO skills (name) VALUES (?)", (skill_name,))
     skill_row = cur.execute("SELECT id FROM skills WHERE name = ?", (skill_name,)).fetchone()
@@ -126,10 +76,198 @@ def add_skill_to_job(conn, skill_name, job_id):
     )
     conn.commit()
 
+@metrics.timed_db
+def upsert_jobs_bulk(conn, jobs):
+    """Insert or refresh many normalized API-format jobs in one transaction.
+
+    Jobs are keyed by their "id" (stored as external_id); skills are linked
+    through job_skills. Returns the number of jobs written.
+    """
+    cur = conn.cursor()
+    rows = []
+    for j in jobs:
+        posted = posting_dates.parse_posting_date(j.get("posted_at") or j.get("date"))
+        rows.append((
+            j["id"], j.get("title") or j.get("name") or "", j.get("description") or j.get("short_description"),
+            j.get("source"), j.get("url"), j.get("company"), j.get("location"), j.get("category"),
+            posted.isoformat() if posted else None, posting_dates.day_number(posted),
+        ))
+    cur.executemany(
+        """
+        INSERT INTO jobs (external_id, name, description, source, url, company, location,
+                          category, posted_at, posted_day, last_seen_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(external_id) DO UPDATE SET
+            name = excluded.name,
+            description = excluded.description,
+            source = excluded.source,
+            url = excluded.url,
+            company = excluded.company,
+            location = excluded.location,
+            category = excluded.category,
+            posted_at = excluded.posted_at,
+            posted_day = excluded.posted_day,
+            last_seen_at = excluded.last_seen_at
+        """,
+        rows,
+    )
+
+    skill_names = {skill_key(s) for j in jobs for s in j.get("skills") or [] if skill_key(s)}
+    if skill_names:
+        cur.executemany("INSERT OR IGNORE INTO skills (name) VALUES (?)", [(s,) for s in skill_names])
+        skill_ids = {}
+        job_ids = {}
+        names = list(skill_names)
+        ext_ids = [j["id"] for j in jobs]
+        # chunk the IN lists to stay under SQLite's bound-parameter limit
+        for chunk in _chunks(names):
+            marks = ",".join("?" * len(chunk))
+            skill_ids.update(cur.execute(f"SELECT name, id FROM skills WHERE name IN ({marks})", chunk).fetchall())
+        for chunk in _chunks(ext_ids):
+            marks = ",".join("?" * len(chunk))
+            job_ids.update(cur.execute(f"SELECT external_id, id FROM jobs WHERE external_id IN ({marks})", chunk).fetchall())
+        links = {
+            (job_ids[j["id"]], skill_ids[skill_key(s)])
+            for j in jobs
+            for s in j.get("skills") or []
+            if skill_key(s)
+        }
+        cur.executemany("INSERT OR IGNORE INTO job_skills (job_id, skill_id) VALUES (?, ?)", list(links))
+
+    conn.commit()
+    return len(rows)
+
+@metrics.timed_db
+def get_recent_jobs(conn, days=None, source=None, limit=100):
+    """Stored postings, newest first; days keeps only those posted in the last N days."""
+    where, params = ["posted_day IS NOT NULL"], []
+    if days is not None:
+        where.append("posted_day >= ?")
+        params.append(posting_dates.today_day_number() - int(days))
+    if source:
+        where.append("source = ?")
+        params.append(source)
+    rows = conn.execute(
+        f"""
+        SELECT id, external_id, name, description, source, url, company, location, posted_at
+        FROM jobs
+        WHERE {" AND ".join(where)}
+        ORDER BY posted_day DESC, id DESC
+        LIMIT ?
+        """,
+        (*params, limit)
+    ).fetchall()
+    skills = {}
+    ids = [r["id"] for r in rows]
+    for chunk in _chunks(ids):
+        marks = ",".join("?" * len(chunk))
+        for job_id, name in conn.execute(
+            f"""
+            SELECT js.job_id, s.name FROM job_skills js JOIN skills s ON s.id = js.skill_id
+            WHERE js.job_id IN ({marks})
+            """,
+            chunk
+        ):
+            skills.setdefault(job_id, []).append(name)
+    return [
+        {
+            "id": r["external_id"] or str(r["id"]),
+            "title": r["name"],
+            "short_description": r["description"],
+            "source": r["source"],
+            "url": r["url"],
+            "company": r["company"],
+            "location": r["location"],
+            "posted_at": r["posted_at"],
+            "skills": skills.get(r["id"], []),
+        }
+        for r in rows
+    ]
+
+
+@metrics.timed_db
+def expire_jobs(conn, source=None, seen_before=None, unseen_days=RETENTION_DAYS):
+    """Archive and delete postings that are gone upstream.
+
+    A posting from source is gone when its last_seen_at is older than
+    seen_before (the start of an ingestion run that saw the full feed);
+    any posting not seen for unseen_days is dropped as well, together with
+    percolated_jobs keys no run has seen and detail text fetched that long ago.
+    Returns the number of postings removed.
+    """
+    conditions, params = [], []
+    if source is not None and seen_before is not None:
+        conditions.append("(source = ? AND last_seen_at < ?)")
+        params += [source, seen_before]
+    if unseen_days is not None:
+        conditions.append("last_seen_at < datetime('now', ?)")
+        params.append(f"-{int(unseen_days)} days")
+    if not conditions:
+        return 0
+    cur = conn.cursor()
+    stale = [row[0] for row in cur.execute(
+        f"SELECT id FROM jobs WHERE external_id IS NOT NULL AND ({' OR '.join(conditions)})", params
+    ).fetchall()]
+    if unseen_days is not None:
+        cur.execute("DELETE FROM percolated_jobs WHERE seen_at < datetime('now', ?)", (f"-{int(unseen_days)} days",))
+        cur.execute(
+            "DELETE FROM job_details WHERE fetched_at < CAST(strftime('%s', 'now', ?) AS REAL)",
+            (f"-{int(unseen_days)} days",)
+        )
+    for chunk in _chunks(stale):
+        marks = ",".join("?" * len(chunk))
+        cur.execute(
+            f"""
+            INSERT OR REPLACE INTO jobs_archive (external_id, source, name, url, company, posted_at, last_seen_at)
+            SELECT external_id, source, name, url, company, posted_at, last_seen_at FROM jobs WHERE id IN ({marks})
+            """,
+            chunk
+        )
+        cur.execute(f"DELETE FROM job_skills WHERE job_id IN ({marks})", chunk)
+        cur.execute(f"DELETE FROM jobs WHERE id IN ({marks})", chunk)
+    conn.commit()
+    return len(stale)
+
+
+def expire_missing(conn, source, fetched, stored, seen_before):
+    """After a full run of source that wrote fetched jobs over stored existing
+    ones, archive its postings the run did not see. Returns the number
+    removed, or None when the run looked partial and nothing was touched."""
+    if fetched <= 0 or fetched < MIN_FEED_SHARE * stored:
+        print(f"{source} returned {fetched} jobs for {stored} stored; skipping expiry", file=sys.stderr)
+        return None
+    return expire_jobs(conn, source, seen_before=seen_before, unseen_days=None)
+
+
+@metrics.timed_db
+def count_source_jobs(conn, source):
+    """Number of stored postings from source."""
+    return conn.execute("SELECT COUNT(*) FROM jobs WHERE source = ?", (source,)).fetchone()[0]
+
+
+@metrics.timed_db
+def optimize_db(conn, vacuum_pages=None):
+    """Refresh planner statistics and release free pages (after retention)."""
+    conn.execute("ANALYZE")
+    if vacuum_pages is None:
+        conn.execute("PRAGMA incremental_vacuum").fetchall()
+    else:
+        conn.execute(f"PRAGMA incremental_vacuum({int(vacuum_pages)})").fetchall()
+    conn.commit()
+
+
+@metrics.timed_db
+def db_timestamp(conn):
+    """The database's CURRENT_TIMESTAMP, comparable with last_seen_at."""
+    return conn.execute("SELECT CURRENT_TIMESTAMP").fetchone()[0]
+
+
+@metrics.timed_db
 def get_jobs(conn):
     cur = conn.cursor()
     return cur.execute("SELECT * FROM jobs").fetchall()
 
+@metrics.timed_db
 def get_skills_for_job(conn, job_id):
     cur = conn.cursor()
     return cur.execute(
@@ -137,9 +275,10 @@ def get_skills_for_job(conn, job_id):
         (job_id,)
     ).fetchall()
 
+@metrics.timed_db
 def get_job_for_skill(conn, skill_name):
     cur = conn.cursor()
-    skill_id = cur.execute("SELECT id FROM skills WHERE name = ?", (skill_name, )).fetchone()
+    skill_id = cur.execute("SELECT id FROM skills WHERE name = ?", (skill_key(skill_name), )).fetchone()
     if skill_id is None:
         print("No such skill")
         return []
@@ -152,6 +291,7 @@ def get_job_for_skill(conn, skill_name):
         (skill_id,)
     ).fetchall()
 
+@metrics.timed_db
 def get_job_id(conn, job_name):
     cur = conn.cursor()
     res = cur.execute("SELECT id FROM jobs WHERE name = ?", (job_name,)).fetchone()
@@ -166,6 +306,7 @@ def close_db(conn):
 
 # ---------------- NEW: profile helper functions ----------------
 
+@metrics.timed_db
 def get_user_profile(conn, user):
     """Return the profile for the given user, creating a blank one if needed."""
     cur = conn.cursor()
@@ -185,7 +326,8 @@ def get_user_profile(conn, user):
             "name": "",
             "info": "",
             "soft_skills": "",
-            "photo_path": ""
+            "photo_path": "",
+            "skills": []
         }
 
     return {
@@ -193,27 +335,53 @@ def get_user_profile(conn, user):
         "name": row[1] or "",
         "info": row[2] or "",
         "soft_skills": row[3] or "",
-        "photo_path": row[4] or ""
+        "photo_path": row[4] or "",
+        "skills": profile_skills.skills_of(get_profile_skill_mask(conn, user))
     }
 
 
+@metrics.timed_db
 def save_user_profile(conn, user, name, info, soft_skills, photo_path=None):
     """Update name/info/soft_skills for the given user."""
     current = get_user_profile(conn, user)
     new_photo_path = photo_path if photo_path is not None else current["photo_path"]
 
+    # Skills are extracted here, once per save, not when searching
+    mask = profile_skills.mask_of(profile_skills.extract(info, soft_skills))
     cur = conn.cursor()
     cur.execute(
         """
         UPDATE user_profile
-        SET name = ?, info = ?, soft_skills = ?, photo_path = ?
+        SET name = ?, info = ?, soft_skills = ?, photo_path = ?,
+            version = version + 1, skill_vector = ?, skill_vocab = ?
         WHERE user = ?
         """,
-        (name, info, soft_skills, new_photo_path, user)
+        (name, info, soft_skills, new_photo_path,
+         profile_skills.encode(mask), profile_skills.vocabulary()[2], user)
     )
     conn.commit()
 
 
+@metrics.timed_db
+def get_profile_skill_mask(conn, user):
+    """The user's profile skills as a profile_skills bitmask (0 without a profile).
+
+    Read-only: vectors from before step 9 or from another vocabulary are
+    recomputed from the profile text here and stored by the next save.
+    """
+    row = conn.execute(
+        "SELECT skill_vector, skill_vocab, info, soft_skills FROM user_profile WHERE user = ?",
+        (user,)
+    ).fetchone()
+    if row is None:
+        return 0
+    vector, vocab, info, soft_skills = row
+    if vocab == profile_skills.vocabulary()[2]:
+        return profile_skills.decode(vector)
+    return profile_skills.mask_of(profile_skills.extract(info, soft_skills))
+
+
+@metrics.timed_db
 def update_profile_photo(conn, user, photo_path):
     """Update only the photo_path for the given user."""
     _ = get_user_profile(conn, user)
@@ -232,30 +400,129 @@ def update_profile_photo(conn, user, photo_path):
 
 # ----------------saved jobs helper functions ----------------
 
-def upsert_saved_job(conn, saved_id, user, job_dict):
-    payload = json.dumps(job_dict, separators=(",", ":"))
-    cur = conn.cursor()
+def _saved_job_key(saved_id, user):
+    # saved ids are "<user>:<job id>"
+    prefix = f"{user}:"
+    return saved_id[len(prefix):] if saved_id.startswith(prefix) else saved_id.split(":", 1)[-1]
+
+
+def _bump_saved_version(cur, user, count):
+    """Reserve count versions for user; returns the highest one."""
     cur.execute(
         """
-        INSERT INTO saved_jobs (id, user, job_json)
-        VALUES (?, ?, ?)
+        INSERT INTO saved_job_versions (user, version) VALUES (?, ?)
+        ON CONFLICT(user) DO UPDATE SET version = version + excluded.version
+        """,
+        (user, count)
+    )
+    return cur.execute("SELECT version FROM saved_job_versions WHERE user = ?", (user,)).fetchone()[0]
+
+
+@metrics.timed_db
+def apply_saved_job_changes(conn, user, saves=(), unsaves=()):
+    """Save and unsave many jobs for user in one transaction.
+
+    saves is a list of (job_id, job_dict), unsaves a list of job ids.
+    Returns the user's new sync version.
+    """
+    saves = list(saves)
+    unsaves = [j for j in dict.fromkeys(unsaves) if j not in {job_id for job_id, _ in saves}]
+    cur = conn.cursor()
+    if not saves and not unsaves:
+        row = cur.execute("SELECT version FROM saved_job_versions WHERE user = ?", (user,)).fetchone()
+        return row[0] if row else 0
+
+    top = _bump_saved_version(cur, user, len(saves) + len(unsaves))
+    version = top - len(saves) - len(unsaves)
+    save_rows = []
+    for job_id, job_dict in saves:
+        version += 1
+        save_rows.append((
+            f"{user}:{job_id}", user, json.dumps(job_dict, separators=(",", ":")), job_id, version,
+        ))
+    cur.executemany(
+        """
+        INSERT INTO saved_jobs (id, user, job_json, job_id, version, deleted)
+        VALUES (?, ?, ?, ?, ?, 0)
         ON CONFLICT(id) DO UPDATE SET
             user = excluded.user,
             job_json = excluded.job_json,
+            job_id = excluded.job_id,
+            version = excluded.version,
+            deleted = 0,
             saved_at = CURRENT_TIMESTAMP
         """,
-        (saved_id, user, payload)
+        save_rows
+    )
+    delete_rows = []
+    for job_id in unsaves:
+        version += 1
+        delete_rows.append((version, f"{user}:{job_id}", user))
+    cur.executemany(
+        "UPDATE saved_jobs SET deleted = 1, job_json = '{}', version = ? WHERE id = ? AND user = ? AND deleted = 0",
+        delete_rows
     )
     conn.commit()
+    return top
 
 
+@metrics.timed_db
+def saved_jobs_since(conn, user, since=0, limit=500, cursor=None):
+    """One page of changes to user's saved jobs after version since.
+
+    Returns {"version", "full", "saved": [job dicts], "removed": [job ids],
+    "cursor"}. since=0 (or a token from before a reset) pages through the
+    full live list. While "cursor" is set more pages remain: pass it back
+    (since is then ignored) and keep "version" only from the last page.
+    Every page is ordered by version, so changes made between pages show
+    up on a later page or in the next delta from the final version.
+    """
+    cur = conn.cursor()
+    if cursor:
+        full, version, after = cursor
+    else:
+        row = cur.execute("SELECT version FROM saved_job_versions WHERE user = ?", (user,)).fetchone()
+        version = row[0] if row else 0
+        full = not since or since > version
+        after = 0 if full else since
+    rows = cur.execute(
+        f"""
+        SELECT id, job_id, job_json, deleted, version FROM saved_jobs
+        WHERE user = ? AND version > ? {"AND deleted = 0" if full else ""}
+        ORDER BY version
+        LIMIT ?
+        """,
+        (user, after, limit + 1)
+    ).fetchall()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    saved, removed = [], []
+    for saved_id, job_id, job_json, deleted, _ in rows:
+        if deleted:
+            removed.append(job_id or _saved_job_key(saved_id, user))
+        else:
+            saved.append(json.loads(job_json))
+    return {
+        "version": version,
+        "full": full,
+        "saved": saved,
+        "removed": removed,
+        "cursor": (full, version, rows[-1][4]) if more else None,
+    }
+
+@metrics.timed_db
+def upsert_saved_job(conn, saved_id, user, job_dict):
+    apply_saved_job_changes(conn, user, saves=[(_saved_job_key(saved_id, user), job_dict)])
+
+
+@metrics.timed_db
 def fetch_saved_jobs(conn, user, limit=100):
     cur = conn.cursor()
     rows = cur.execute(
         """
         SELECT job_json FROM saved_jobs
-        WHERE user = ?
-        ORDER BY saved_at DESC
+        WHERE user = ? AND deleted = 0
+        ORDER BY saved_at DESC, version DESC
         LIMIT ?
         """,
         (user, limit)
@@ -263,18 +530,565 @@ def fetch_saved_jobs(conn, user, limit=100):
     return [json.loads(row[0]) for row in rows]
 
 
+@metrics.timed_db
 def delete_saved_job(conn, saved_id):
-    cur = conn.cursor()
-    cur.execute("DELETE FROM saved_jobs WHERE id = ?", (saved_id,))
-    conn.commit()
+    row = conn.execute("SELECT user FROM saved_jobs WHERE id = ?", (saved_id,)).fetchone()
+    if row is not None:
+        apply_saved_job_changes(conn, row[0], unsaves=[_saved_job_key(saved_id, row[0])])
 
 
+@metrics.timed_db
 def reassign_saved_jobs(conn, old_user, new_user):
     if not old_user or not new_user or old_user == new_user:
         return
     cur = conn.cursor()
+    rows = cur.execute(
+        "SELECT id, job_id FROM saved_jobs WHERE user = ? AND deleted = 0 ORDER BY version", (old_user,)
+    ).fetchall()
+    cur.execute("DELETE FROM saved_jobs WHERE user = ? AND deleted = 1", (old_user,))
+    cur.execute("DELETE FROM saved_job_versions WHERE user = ?", (old_user,))
+    if rows:
+        # Moved jobs are new changes for the receiving user's sync
+        top = _bump_saved_version(cur, new_user, len(rows))
+        first = top - len(rows) + 1
+        updates = []
+        for i, (saved_id, job_id) in enumerate(rows):
+            job_id = job_id or _saved_job_key(saved_id, old_user)
+            updates.append((f"{new_user}:{job_id}", new_user, job_id, first + i, saved_id))
+        cur.executemany(
+            "UPDATE OR REPLACE saved_jobs SET id = ?, user = ?, job_id = ?, version = ? WHERE id = ?",
+            updates
+        )
+    conn.commit()
+
+
+# ---------------- hidden/seen job mark helper functions ----------------
+
+def _chunks(items, size=500):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _bump_mark_version(cur, user):
     cur.execute(
-        "UPDATE saved_jobs SET user = ? WHERE user = ?",
-        (new_user, old_user)
+        """
+        INSERT INTO job_mark_versions (user, version) VALUES (?, 1)
+        ON CONFLICT(user) DO UPDATE SET version = version + 1
+        """,
+        (user,)
     )
+    return cur.execute("SELECT version FROM job_mark_versions WHERE user = ?", (user,)).fetchone()[0]
+
+
+@metrics.timed_db
+def get_job_mark_version(conn, user):
+    row = conn.execute("SELECT version FROM job_mark_versions WHERE user = ?", (user,)).fetchone()
+    return row[0] if row else 0
+
+
+@metrics.timed_db
+def get_job_marks(conn, user, kind):
+    """(key_id, key) pairs marked kind by user, ordered by key_id."""
+    rows = conn.execute(
+        """
+        SELECT m.key_id, k.key FROM job_marks m
+        JOIN job_keys k ON k.id = m.key_id
+        WHERE m.user = ? AND m.kind = ?
+        ORDER BY m.key_id
+        """,
+        (user, kind)
+    ).fetchall()
+    return [(row[0], row[1]) for row in rows]
+
+
+@metrics.timed_db
+def add_job_marks(conn, user, kind, keys):
+    """Mark job keys for user; returns the user's new mark version."""
+    keys = list(dict.fromkeys(str(k) for k in keys if k))
+    cur = conn.cursor()
+    cur.executemany("INSERT OR IGNORE INTO job_keys (key) VALUES (?)", [(k,) for k in keys])
+    for chunk in _chunks(keys):
+        marks = ",".join("?" * len(chunk))
+        cur.execute(
+            f"""
+            INSERT OR IGNORE INTO job_marks (user, kind, key_id)
+            SELECT ?, ?, id FROM job_keys WHERE key IN ({marks})
+            """,
+            (user, kind, *chunk)
+        )
+    version = _bump_mark_version(cur, user)
+    conn.commit()
+    return version
+
+
+@metrics.timed_db
+def remove_job_marks(conn, user, kind, keys=None):
+    """Unmark job keys for user (all of kind when keys is None); returns the new mark version."""
+    cur = conn.cursor()
+    if keys is None:
+        cur.execute("DELETE FROM job_marks WHERE user = ? AND kind = ?", (user, kind))
+    else:
+        keys = list(dict.fromkeys(str(k) for k in keys if k))
+        for chunk in _chunks(keys):
+            marks = ",".join("?" * len(chunk))
+            cur.execute(
+                f"""
+                DELETE FROM job_marks
+                WHERE user = ? AND kind = ?
+                  AND key_id IN (SELECT id FROM job_keys WHERE key IN ({marks}))
+                """,
+                (user, kind, *chunk)
+            )
+    version = _bump_mark_version(cur, user)
     conn.commit()
+    return version
+
+
+# ---------------- saved search helper functions ----------------
+
+def _bump_saved_search_version(cur):
+    cur.execute(
+        """
+        INSERT INTO saved_search_version (id, version) VALUES (1, 1)
+        ON CONFLICT(id) DO UPDATE SET version = version + 1
+        """
+    )
+
+
+@metrics.timed_db
+def get_saved_search_version(conn):
+    row = conn.execute("SELECT version FROM saved_search_version WHERE id = 1").fetchone()
+    return row[0] if row else 0
+
+
+@metrics.timed_db
+def create_saved_search(conn, user, name, query):
+    cur = conn.cursor()
+    cur.execute(
+        "INSERT INTO saved_searches (user, name, query_json) VALUES (?, ?, ?)",
+        (user, name, json.dumps(query, separators=(",", ":")))
+    )
+    search_id = cur.lastrowid
+    _bump_saved_search_version(cur)
+    conn.commit()
+    return search_id
+
+
+@metrics.timed_db
+def delete_saved_search(conn, user, search_id):
+    cur = conn.cursor()
+    cur.execute("DELETE FROM saved_searches WHERE id = ? AND user = ?", (search_id, user))
+    deleted = cur.rowcount > 0
+    if deleted:
+        _bump_saved_search_version(cur)
+    conn.commit()
+    return deleted
+
+
+@metrics.timed_db
+def list_saved_searches(conn, user=None):
+    """Saved searches as dicts (every user's when user is None)."""
+    sql = "SELECT id, user, name, query_json, created_at FROM saved_searches"
+    params = ()
+    if user is not None:
+        sql += " WHERE user = ?"
+        params = (user,)
+    rows = conn.execute(sql + " ORDER BY id", params).fetchall()
+    return [
+        {"id": r[0], "user": r[1], "name": r[2], "created_at": r[4], **json.loads(r[3])}
+        for r in rows
+    ]
+
+
+@metrics.timed_db
+def claim_new_job_keys(conn, keys):
+    """Record job keys as percolated; returns the ones not seen before."""
+    keys = list(dict.fromkeys(k for k in keys if k))
+    seen = set()
+    for chunk in _chunks(keys):
+        marks = ",".join("?" * len(chunk))
+        seen.update(row[0] for row in conn.execute(
+            f"SELECT job_key FROM percolated_jobs WHERE job_key IN ({marks})", chunk
+        ))
+    new = [k for k in keys if k not in seen]
+    # known keys get seen_at refreshed, so retention only drops delisted ones
+    conn.executemany(
+        """
+        INSERT INTO percolated_jobs (job_key) VALUES (?)
+        ON CONFLICT(job_key) DO UPDATE SET seen_at = CURRENT_TIMESTAMP
+        """,
+        [(k,) for k in keys]
+    )
+    conn.commit()
+    return new
+
+
+@metrics.timed_db
+def add_saved_search_matches(conn, matches):
+    """Store (search_id, job_key, job_dict) matches for delivery."""
+    conn.executemany(
+        "INSERT OR IGNORE INTO saved_search_matches (search_id, job_key, job_json) VALUES (?, ?, ?)",
+        [(sid, key, json.dumps(job, separators=(",", ":"))) for sid, key, job in matches]
+    )
+    conn.commit()
+
+
+@metrics.timed_db
+def take_saved_search_matches(conn, user, mark_delivered=True, limit=500):
+    """Undelivered matches for user's searches, grouped per search."""
+    cur = conn.cursor()
+    rows = cur.execute(
+        """
+        SELECT m.search_id, s.name, m.job_key, m.job_json
+        FROM saved_search_matches m
+        JOIN saved_searches s ON s.id = m.search_id
+        WHERE m.delivered = 0 AND s.user = ?
+        ORDER BY m.search_id, m.matched_at
+        LIMIT ?
+        """,
+        (user, limit)
+    ).fetchall()
+    grouped = {}
+    for search_id, name, _, job_json in rows:
+        entry = grouped.setdefault(search_id, {"search_id": search_id, "name": name, "jobs": []})
+        entry["jobs"].append(json.loads(job_json))
+    if mark_delivered and rows:
+        cur.executemany(
+            "UPDATE saved_search_matches SET delivered = 1 WHERE search_id = ? AND job_key = ?",
+            [(r[0], r[2]) for r in rows]
+        )
+        conn.commit()
+    return list(grouped.values())
+
+
+# ---------------- ingestion lease helper functions ----------------
+
+@metrics.timed_db
+def acquire_lease(conn, name, holder, ttl, now):
+    """Take or renew lease name for holder; True if holder now holds it.
+
+    Succeeds when the lease is free, expired, or already held by holder.
+    """
+    cur = conn.cursor()
+    cur.execute(
+        """
+        INSERT INTO leases (name, holder, acquired_at, heartbeat_at, expires_at)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(name) DO UPDATE SET
+            holder = excluded.holder,
+            acquired_at = CASE WHEN leases.holder = excluded.holder
+                               THEN leases.acquired_at ELSE excluded.acquired_at END,
+            heartbeat_at = excluded.heartbeat_at,
+            expires_at = excluded.expires_at
+        WHERE leases.holder = excluded.holder OR leases.expires_at < excluded.heartbeat_at
+        """,
+        (name, holder, now, now, now + ttl)
+    )
+    conn.commit()
+    return cur.rowcount > 0
+
+
+@metrics.timed_db
+def release_lease(conn, name, holder):
+    conn.execute("DELETE FROM leases WHERE name = ? AND holder = ?", (name, holder))
+    conn.commit()
+
+
+@metrics.timed_db
+def get_lease(conn, name):
+    row = conn.execute(
+        "SELECT holder, acquired_at, heartbeat_at, expires_at FROM leases WHERE name = ?", (name,)
+    ).fetchone()
+    return dict(row) if row else None
+
+
+@metrics.timed_db
+def save_source_snapshot(conn, source, jobs, fetched_at, lease_name, holder):
+    """Store source's job list, only while holder still holds lease_name (fencing).
+
+    Returns False when the lease was lost, so a deposed leader cannot
+    overwrite what the new one wrote.
+    """
+    cur = conn.cursor()
+    cur.execute(
+        """
+        INSERT INTO source_snapshots (source, jobs_json, job_count, fetched_at, holder)
+        SELECT ?, ?, ?, ?, ?
+        WHERE EXISTS (SELECT 1 FROM leases WHERE name = ? AND holder = ?)
+        ON CONFLICT(source) DO UPDATE SET
+            jobs_json = excluded.jobs_json,
+            job_count = excluded.job_count,
+            fetched_at = excluded.fetched_at,
+            holder = excluded.holder
+        """,
+        (source, json.dumps(jobs, separators=(",", ":")), len(jobs), fetched_at, holder, lease_name, holder)
+    )
+    conn.commit()
+    return cur.rowcount > 0
+
+
+@metrics.timed_db
+def get_source_snapshot_time(conn, source):
+    row = conn.execute("SELECT fetched_at FROM source_snapshots WHERE source = ?", (source,)).fetchone()
+    return row[0] if row else None
+
+
+@metrics.timed_db
+def get_source_snapshot(conn, source):
+    """(jobs, fetched_at) of the latest snapshot of source, or None."""
+    row = conn.execute(
+        "SELECT jobs_json, fetched_at FROM source_snapshots WHERE source = ?", (source,)
+    ).fetchone()
+    return (json.loads(row[0]), row[1]) if row else None
+
+
+# ---------------- job store snapshot helper functions ----------------
+
+# Columns of each table carried in a job store snapshot
+SNAPSHOT_COLUMNS = {
+    "jobs": ("id", "name", "description", "external_id", "source", "url", "company",
+             "location", "category", "posted_at", "posted_day", "last_seen_at"),
+    "skills": ("id", "name"),
+    "job_skills": ("job_id", "skill_id"),
+    "source_snapshots": ("source", "jobs_json", "job_count", "fetched_at", "holder"),
+}
+
+
+@metrics.timed_db
+def export_job_store(conn):
+    """Every snapshot table as {table: {column: [values]}} (column-major)."""
+    tables = {}
+    for table, columns in SNAPSHOT_COLUMNS.items():
+        rows = conn.execute(f"SELECT {', '.join(columns)} FROM {table}").fetchall()
+        tables[table] = {col: [row[i] for row in rows] for i, col in enumerate(columns)}
+    return tables
+
+
+def _snapshot_rows(tables, table):
+    # column-major back to rows, in SNAPSHOT_COLUMNS order; columns added
+    # since the snapshot was written come back as NULL
+    data = tables.get(table) or {}
+    columns = SNAPSHOT_COLUMNS[table]
+    n = len(data.get(columns[0]) or ())
+    return list(zip(*(data.get(col) or [None] * n for col in columns))) if n else []
+
+
+@metrics.timed_db
+def import_job_store(conn, tables, only_if_empty=False):
+    """Bulk-load an export_job_store() dict in one transaction.
+
+    Job and skill ids are remapped (jobs by external_id, else by name;
+    skills by name), so a snapshot merges into a store that already has
+    rows. Existing jobs and source snapshots are only replaced by newer
+    ones, and only inserted or replaced jobs get the snapshot's skill
+    links. Returns {table: rows in snapshot}, or None when only_if_empty
+    is set and jobs already has rows.
+    """
+    cur = conn.cursor()
+    cur.execute("BEGIN IMMEDIATE")
+    try:
+        if only_if_empty and cur.execute("SELECT 1 FROM jobs LIMIT 1").fetchone():
+            conn.rollback()
+            return None
+
+        skills = _snapshot_rows(tables, "skills")
+        cur.executemany("INSERT OR IGNORE INTO skills (name) VALUES (?)", [(skill_key(name),) for _, name in skills])
+        skill_ids = dict(cur.execute("SELECT name, id FROM skills").fetchall())
+        skill_map = {old_id: skill_ids[skill_key(name)] for old_id, name in skills}
+
+        jobs = _snapshot_rows(tables, "jobs")
+        # Only jobs this import inserts or replaces get the snapshot's skill links
+        local_seen = {}
+        for chunk in _chunks([job[3] for job in jobs if job[3] is not None]):
+            marks = ",".join("?" * len(chunk))
+            local_seen.update(cur.execute(
+                f"SELECT external_id, last_seen_at FROM jobs WHERE external_id IN ({marks})", chunk
+            ).fetchall())
+        applied = {
+            job[3] for job in jobs
+            if job[3] is not None and (
+                job[3] not in local_seen or local_seen[job[3]] is None
+                or (job[11] is not None and job[11] > local_seen[job[3]])
+            )
+        }
+        cur.executemany(
+            """
+            INSERT INTO jobs (name, description, external_id, source, url, company,
+                              location, category, posted_at, posted_day, last_seen_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(external_id) DO UPDATE SET
+                name = excluded.name,
+                description = excluded.description,
+                source = excluded.source,
+                url = excluded.url,
+                company = excluded.company,
+                location = excluded.location,
+                category = excluded.category,
+                posted_at = excluded.posted_at,
+                posted_day = excluded.posted_day,
+                last_seen_at = excluded.last_seen_at
+            WHERE excluded.last_seen_at > jobs.last_seen_at OR jobs.last_seen_at IS NULL
+            """,
+            [job[1:] for job in jobs if job[3] is not None],
+        )
+        external_ids = dict(cur.execute(
+            "SELECT external_id, id FROM jobs WHERE external_id IS NOT NULL"
+        ).fetchall())
+        named_ids = dict(cur.execute("SELECT name, id FROM jobs WHERE external_id IS NULL").fetchall())
+        job_map = {}
+        for job in jobs:
+            old_id, name, ext_id = job[0], job[1], job[3]
+            if ext_id is not None:
+                if ext_id in applied:
+                    job_map[old_id] = external_ids[ext_id]
+                continue
+            # Legacy rows from add_job() are keyed by name, as get_job_id() looks them up
+            if name not in named_ids:
+                cur.execute(
+                    "INSERT INTO jobs (name, description) VALUES (?, ?)", (name, job[2])
+                )
+                named_ids[name] = job_map[old_id] = cur.lastrowid
+
+        links = _snapshot_rows(tables, "job_skills")
+        cur.executemany(
+            "INSERT OR IGNORE INTO job_skills (job_id, skill_id) VALUES (?, ?)",
+            [
+                (job_map[job_id], skill_map[skill_id])
+                for job_id, skill_id in links
+                if job_id in job_map and skill_id in skill_map
+            ],
+        )
+
+        sources = _snapshot_rows(tables, "source_snapshots")
+        cur.executemany(
+            """
+            INSERT INTO source_snapshots (source, jobs_json, job_count, fetched_at, holder)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(source) DO UPDATE SET
+                jobs_json = excluded.jobs_json,
+                job_count = excluded.job_count,
+                fetched_at = excluded.fetched_at,
+                holder = excluded.holder
+            WHERE excluded.fetched_at > source_snapshots.fetched_at
+            """,
+            sources,
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return {"jobs": len(jobs), "skills": len(skills), "job_skills": len(links), "source_snapshots": len(sources)}
+
+
+@metrics.timed_db
+def save_job_details(conn, entries):
+    """Store (url, text, fetched_at) detail page text; newer text wins."""
+    conn.executemany(
+        """
+        INSERT INTO job_details (url, text, fetched_at) VALUES (?, ?, ?)
+        ON CONFLICT(url) DO UPDATE SET text = excluded.text, fetched_at = excluded.fetched_at
+        WHERE excluded.fetched_at > job_details.fetched_at
+        """,
+        list(entries)
+    )
+    conn.commit()
+
+
+@metrics.timed_db
+def get_job_details(conn):
+    """Every stored (url, text, fetched_at)."""
+    return [tuple(row) for row in conn.execute("SELECT url, text, fetched_at FROM job_details")]
+
+
+# ---------------- skill demand analytics helper functions ----------------
+# These read only the skill_demand_* rollups (maintained by triggers, see
+# migrations step 8), never jobs or job_skills.
+
+DEMAND_GROUPS = ("source", "category")
+
+
+def _demand_filters(source, category):
+    where, params = [], []
+    if source is not None:
+        where.append("source = ?")
+        params.append(source)
+    if category is not None:
+        where.append("category = ?")
+        params.append(category)
+    return where, params
+
+
+@metrics.timed_db
+def get_skill_demand(conn, days=None, by=(), source=None, category=None, limit=20):
+    """Top skills: links posted in the last days days (all time when None) and
+    links active now, optionally split by source and/or category.
+
+    All-time counts come from the running totals in skill_demand_current,
+    so their cost does not grow with the daily history.
+    """
+    by = [g for g in DEMAND_GROUPS if g in by]
+    cols = ", ".join(["skill_id", *by])
+    where, params = _demand_filters(source, category)
+
+    def clause(conditions):
+        return f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    rows = {}
+    if days is None:
+        for row in conn.execute(
+            f"""
+            SELECT {cols}, SUM(posted), SUM(expired), SUM(active) FROM skill_demand_current
+            {clause(where)} GROUP BY {cols}
+            """,
+            params
+        ):
+            rows[tuple(row[:-3])] = {"posted": row[-3], "expired": row[-2], "active": row[-1]}
+    else:
+        posted_where = ["day >= ?", *where]
+        posted_params = [posting_dates.today_day_number() - int(days), *params]
+        for row in conn.execute(
+            f"SELECT {cols}, SUM(posted), SUM(expired) FROM skill_demand_daily {clause(posted_where)} GROUP BY {cols}",
+            posted_params
+        ):
+            rows[tuple(row[:-2])] = {"posted": row[-2], "expired": row[-1], "active": 0}
+        for row in conn.execute(
+            f"SELECT {cols}, SUM(active) FROM skill_demand_current {clause(where)} GROUP BY {cols}", params
+        ):
+            entry = rows.setdefault(tuple(row[:-1]), {"posted": 0, "expired": 0, "active": 0})
+            entry["active"] = row[-1]
+
+    ranked = sorted(
+        ((key, v) for key, v in rows.items() if v["posted"] or v["active"]),
+        key=lambda kv: (-kv[1]["posted"], -kv[1]["active"], kv[0]),
+    )[:limit]
+    names = {}
+    skill_ids = list({key[0] for key, _ in ranked})
+    for chunk in _chunks(skill_ids):
+        marks = ",".join("?" * len(chunk))
+        names.update(conn.execute(f"SELECT id, name FROM skills WHERE id IN ({marks})", chunk).fetchall())
+    return [
+        {"skill": names.get(key[0]), **dict(zip(by, key[1:])), **counts}
+        for key, counts in ranked
+    ]
+
+
+@metrics.timed_db
+def get_skill_demand_trend(conn, skill, days=90, source=None, category=None):
+    """Per-day posted/expired counts for one skill over the last days days."""
+    row = conn.execute("SELECT id FROM skills WHERE name = ?", (skill_key(skill),)).fetchone()
+    if row is None:
+        return []
+    where, params = _demand_filters(source, category)
+    where = ["skill_id = ?", "day >= ?", *where]
+    params = [row[0], posting_dates.today_day_number() - int(days), *params]
+    return [
+        {"date": posting_dates.day_to_iso(day), "posted": posted, "expired": expired}
+        for day, posted, expired in conn.execute(
+            f"""
+            SELECT day, SUM(posted), SUM(expired) FROM skill_demand_daily
+            WHERE {" AND ".join(where)}
+            GROUP BY day ORDER BY day
+            """,
+            params
+        )
+    ]
@@ -1,67 +1,203 @@
-import requests
+import codecs
+import json
+import re
+import sys
 import time
-from datetime import datetime
 
-def scrape_remoteok():
-    url = "https://remoteok.com/api"
-    headers = {"User-Agent": "JobScraperBot/1.0 (+https://yourdomain.com/contact)"}
+import requests
+
+import database_helpers as dbh
+import metrics
+import percolator
+import posting_dates
+import tracing
 
-    print("Title | Category | ID | Department | Campus | Reg/Temp | Review Begins | URL")
-    print("-" * 120)
+REMOTEOK_API_URL = "https://remoteok.com/api"
+HEADERS = {"User-Agent": "JobScraperBot/1.0 (+https://yourdomain.com/contact)"}
+CHUNK_SIZE = 64 * 1024
+# (connect, read) seconds; the read timeout applies to each chunk of the stream
+TIMEOUT = (5, 20)
+_WHITESPACE = " \t\n\r"
+_TAG_RE = re.compile(r"<[^>]+>")
+_SPACE_RE = re.compile(r"\s+")
 
-    try:
-        response = requests.get(url, headers=headers)
+
+def _iter_json_array(chunks):
+    """Yield the elements of a top-level JSON array from an iterable of byte chunks.
+
+    Each element is decoded as soon as its bytes have arrived, so the
+    whole feed is never held as one parsed list.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buf = ""
+    pos = 0
+    started = False
+    chunks = iter(chunks)
+    eof = False
+
+    while True:
+        # skip separators between elements
+        while pos < len(buf) and buf[pos] in _WHITESPACE + ",":
+            pos += 1
+        if not started and pos < len(buf):
+            if buf[pos] != "[":
+                raise ValueError("expected a JSON array")
+            started = True
+            pos += 1
+            continue
+        if started and pos < len(buf) and buf[pos] == "]":
+            return
+        if pos < len(buf):
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                # a number at the end of the buffer might still be incomplete
+                if end < len(buf) or eof:
+                    yield value
+                    pos = end
+                    continue
+        if eof:
+            raise ValueError("truncated JSON array")
+        chunk = next(chunks, None)
+        if chunk is None:
+            eof = True
+            buf = buf[pos:] + utf8.decode(b"", final=True)
+        else:
+            buf = buf[pos:] + utf8.decode(chunk)
+        pos = 0
+
+
+def _is_metadata(item):
+    # The feed starts with a legal/last_updated object that is not a job
+    return not isinstance(item, dict) or "legal" in item or not item.get("id")
+
+
+def _normalize_remoteok_job(job):
+    title = job.get("position", "")
+    job_id = job.get("id", "")
+    department = job.get("company", "")
+    campus = job.get("location", "Remote")
+    review_begins = job.get("date", "")
+    return {
+        "id": f"remote_{job_id}",
+        "name": title,
+        "title": title,
+        "short_description": f"Remote position at {department}",
+        "url": job.get("url", ""),
+        "source": "RemoteOK",
+        "company": department,
+        "location": campus,
+        "date": review_begins,
+        "posted_at": posting_dates.iso_date(review_begins or job.get("epoch")),
+        "skills": job.get("tags", []),
+    }
+
+
+def iter_remoteok_jobs(tags=None, limit=None, session=None):
+    """Stream normalized jobs from the RemoteOK feed.
+
+    tags keeps only jobs carrying at least one of the tags (case-insensitive);
+    filtering happens while parsing, so skipped jobs are never normalized.
+    Stops reading the response once limit jobs have been yielded.
+    """
+    wanted = {t.strip().lower() for t in tags or [] if t.strip()}
+    http = session or requests
+    with metrics.SOURCE_SECONDS.labels("RemoteOK", "fetch").time():
+        response = http.get(REMOTEOK_API_URL, headers=HEADERS, stream=True, timeout=TIMEOUT)
         response.raise_for_status()
 
-        jobs = response.json()[1:]  # first element is metadata
+    count = 0
+    try:
+        for item in _iter_json_array(response.iter_content(CHUNK_SIZE)):
+            if _is_metadata(item):
+                continue
+            if wanted and not wanted.intersection(str(t).lower() for t in item.get("tags") or []):
+                continue
+            job = _normalize_remoteok_job(item)
+            job["description"] = _SPACE_RE.sub(" ", _TAG_RE.sub(" ", item.get("description") or "")).strip()
+            yield job
+            count += 1
+            if limit is not None and count >= limit:
+                return
+    finally:
+        response.close()
+
+
+@tracing.traced("remoteok.scrape_remoteok")
+def scrape_remoteok(limit=10, tags=None, raise_errors=False):
+    """Up to limit normalized jobs; on upstream errors [] (or the error with raise_errors)."""
+    parse_started = time.perf_counter()
+    try:
         api_jobs = []
-        for job in jobs:
-            title = job.get("position", "")
-            category = ", ".join(job.get("tags", []))
-            job_id = job.get("id", "")
-            department = job.get("company", "")
-            campus = job.get("location", "Remote")
-            reg_temp = "N/A"
-            review_begins = job.get("date", "")
-            job_url = job.get("url", "")
-
-            # print(f"{title} | {category} | {job_id} | {department} | {campus} | {reg_temp} | {review_begins} | {job_url}")
-
-            # convert to API dict format
-            api_job = {
-                "id": f"remote_{job_id}",
-                "name": title,
-                "title": title,
-                "short_description": f"Remote position at {department}",
-                "url": job_url,
-                "source": "RemoteOK",
-                "company": department,
-                "location": campus,
-                "date": review_begins,
-                "posted_at": _normalize_date_string(review_begins),
-                "skills": job.get("tags", [])
-            }
-
-            # adding break condition bc 100 jobs is a lot
-            api_jobs.append(api_job)
-            if len(api_jobs) >= 10:
-                break
-
-            time.sleep(0.2)  # polite delay
-
-        return api_jobs
-
-    except requests.RequestException as e:
-        print("error fetching data", e)
+        for job in iter_remoteok_jobs(tags=tags, limit=limit):
+            job.pop("description", None)
+            api_jobs.append(job)
+    except (requests.RequestException, ValueError) as e:
+        is_timeout = isinstance(e, requests.Timeout)
+        metrics.record_source("RemoteOK", "timeout" if is_timeout else "error")
+        if raise_errors:
+            raise
+        print("error fetching data", e, file=sys.stderr)
         return []
 
-def _normalize_date_string(s):
-    if not s:
-        return None
+    metrics.SOURCE_SECONDS.labels("RemoteOK", "parse").observe(time.perf_counter() - parse_started)
+    metrics.record_source("RemoteOK", "success")
+    return api_jobs
+
+
+@tracing.traced("remoteok.ingest_remoteok")
+def ingest_remoteok(conn=None, tags=None, batch_size=500):
+    """Ingest the complete RemoteOK feed into jobs.db in bulk; returns the job count.
+
+    New postings are matched against saved searches as each batch lands.
+    After a full (untagged) run whose feed held at least dbh.MIN_FEED_SHARE
+    of the stored RemoteOK rows, postings missing from the feed are archived,
+    as are postings unseen for dbh.RETENTION_DAYS. A run that fails part
+    way archives nothing.
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = dbh.get_db_connection()
+    total = 0
     try:
-        dt = datetime.fromisoformat(str(s).replace('Z', '+00:00'))
-        return dt.strftime('%Y-%m-%d')
-    except Exception:
-        return str(s)
+        started = dbh.db_timestamp(conn)
+        stored = dbh.count_source_jobs(conn, "RemoteOK")
+        batch = []
+        for job in iter_remoteok_jobs(tags=tags):
+            batch.append(job)
+            if len(batch) >= batch_size:
+                total += dbh.upsert_jobs_bulk(conn, batch)
+                percolator.percolate(conn, batch)
+                batch = []
+        if batch:
+            total += dbh.upsert_jobs_bulk(conn, batch)
+            percolator.percolate(conn, batch)
+
+        if not tags:
+            dbh.expire_missing(conn, "RemoteOK", total, stored, started)
+        dbh.expire_jobs(conn)
+        dbh.optimize_db(conn)
+    except Exception as e:
+        metrics.record_source("RemoteOK", "timeout" if isinstance(e, requests.Timeout) else "error")
+        raise
+    finally:
+        if own_conn:
+            dbh.close_db(conn)
+    metrics.record_source("RemoteOK", "success")
+    return total
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ingest the full RemoteOK feed into jobs.db")
+    parser.add_argument("--tags", help="comma-separated tags to keep (default: all jobs)")
+    args = parser.parse_args()
 
-# scrape_remoteok()
+    started = time.perf_counter()
+    n = ingest_remoteok(tags=args.tags.split(",") if args.tags else None)
+    print(f"ingested {n} RemoteOK jobs in {time.perf_counter() - started:.2f}s")
@@ -0,0 +1,195 @@
+"""
+Near-duplicate detection for merged job results.
+
+Each job is first keyed by a hash of its normalized title/company/location
+(exact duplicates), then by a MinHash signature over word shingles of
+title + company + description, bucketed with LSH so only jobs sharing a
+band are ever compared. Adding a job is O(bands), so a whole result set
+clusters in roughly linear time.
+
+Two jobs from the same source are only merged when they carry the same
+id: a board listing the same title twice means two openings.
+"""
+from __future__ import annotations
+
+import hashlib
+import random
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SHINGLE_SIZE = 2  # words
+NUM_PERM = 32
+BANDS = 8  # 8 bands x 4 rows: pairs above ~0.6 Jaccard usually become candidates
+SIMILARITY_THRESHOLD = 0.7
+
+# Each "permutation" is the 64-bit shingle hash XORed with a fixed random mask
+_rng = random.Random(581)
+_MASKS = [_rng.getrandbits(64) for _ in range(NUM_PERM)]
+_EMPTY_SIGNATURE = tuple([(1 << 64) - 1] * NUM_PERM)
+_ROWS_PER_BAND = NUM_PERM // BANDS
+
+_INTERNAL_ONLY = re.compile(r"^\[\*\*internal only\*\*\]\s*")
+_NON_WORD = re.compile(r"[^a-z0-9+#]+")
+
+
+def normalize_text(value) -> str:
+    text = str(value or "").lower()
+    text = _INTERNAL_ONLY.sub("", text)
+    return _NON_WORD.sub(" ", text).strip()
+
+
+def _company(job: dict) -> str:
+    return job.get("company") or job.get("department") or ""
+
+
+def _location(job: dict) -> str:
+    return job.get("location") or job.get("campus") or ""
+
+
+def _title(job: dict) -> str:
+    return job.get("title") or job.get("name") or ""
+
+
+def _stable_hash(*parts: str) -> str:
+    return hashlib.blake2b("\x1f".join(parts).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def exact_key(job: dict) -> str:
+    """Hash of the normalized identifying fields; equal for exact duplicates."""
+    return _stable_hash(
+        normalize_text(_title(job)), normalize_text(_company(job)), normalize_text(_location(job))
+    )
+
+
+def stable_job_id(job: dict) -> str:
+    """Content-derived id for jobs that carry no upstream id or url."""
+    url = job.get("url")
+    if url:
+        return "job_" + _stable_hash(str(url))
+    return "job_" + exact_key(job)
+
+
+def shingles(text: str, k: int = SHINGLE_SIZE) -> set:
+    """Word unigrams plus word k-grams of already-normalized text."""
+    words = text.split()
+    out = set(words)
+    out.update(" ".join(words[i:i + k]) for i in range(len(words) - k + 1))
+    return out
+
+
+def minhash(tokens: Iterable[str]) -> Tuple[int, ...]:
+    hashes = [
+        int.from_bytes(hashlib.blake2b(t.encode("utf-8"), digest_size=8).digest(), "little")
+        for t in tokens
+    ]
+    if not hashes:
+        return _EMPTY_SIGNATURE
+    return tuple(min([h ^ m for h in hashes]) for m in _MASKS)
+
+
+def signature_similarity(sig_a: Tuple[int, ...], sig_b: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of the underlying shingle sets."""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_PERM
+
+
+def job_signature(job: dict) -> Tuple[int, ...]:
+    text = " ".join(
+        normalize_text(v) for v in (_title(job), _company(job), job.get("short_description"))
+    )
+    return minhash(shingles(text))
+
+
+class JobDeduper:
+    """Incrementally cluster jobs; one cluster per distinct posting."""
+
+    def __init__(self, threshold: float = SIMILARITY_THRESHOLD):
+        self.threshold = threshold
+        self.clusters: List[List[dict]] = []
+        self._signatures: List[Tuple[int, ...]] = []
+        self._exact: Dict[str, int] = {}
+        self._ids: List[Dict[Optional[str], set]] = []  # per cluster: source -> ids
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = {}
+
+    def add(self, job: dict) -> Tuple[int, bool]:
+        """Add a job; return (cluster index, True if it started a new cluster)."""
+        key = exact_key(job)
+        cid = self._exact.get(key)
+        if cid is not None and self._compatible(cid, job):
+            self._join(cid, job)
+            return cid, False
+
+        sig = job_signature(job)
+        bands = [
+            (b, sig[b * _ROWS_PER_BAND:(b + 1) * _ROWS_PER_BAND]) for b in range(BANDS)
+        ]
+        best, best_sim = None, self.threshold
+        seen = set()
+        for band in bands:
+            for candidate in self._buckets.get(band, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                if not self._compatible(candidate, job):
+                    continue
+                sim = signature_similarity(sig, self._signatures[candidate])
+                if sim >= best_sim:
+                    best, best_sim = candidate, sim
+
+        if best is not None:
+            self._exact.setdefault(key, best)
+            self._join(best, job)
+            return best, False
+
+        cid = len(self.clusters)
+        self.clusters.append([])
+        self._ids.append({})
+        self._signatures.append(sig)
+        self._exact.setdefault(key, cid)
+        self._join(cid, job)
+        for band in bands:
+            self._buckets.setdefault(band, []).append(cid)
+        return cid, True
+
+    def _compatible(self, cid: int, job: dict) -> bool:
+        ids = self._ids[cid].get(job.get("source"))
+        job_id = job.get("id")
+        return ids is None or job_id is None or str(job_id) in ids
+
+    def _join(self, cid: int, job: dict) -> None:
+        self.clusters[cid].append(job)
+        if job.get("id") is not None:
+            self._ids[cid].setdefault(job.get("source"), set()).add(str(job["id"]))
+
+    def add_batch(self, jobs: Iterable[dict]) -> List[dict]:
+        """Add jobs and return only those that were not duplicates of earlier ones."""
+        return [job for job in jobs if self.add(job)[1]]
+
+    def canonical_records(self) -> List[dict]:
+        return [merge_cluster(c) for c in self.clusters]
+
+
+def merge_cluster(cluster: List[dict]) -> dict:
+    """One record per cluster: the first-seen job, gaps filled from the others."""
+    canonical = dict(cluster[0])
+    if len(cluster) == 1:
+        return canonical
+    skills: List[str] = list(canonical.get("skills") or [])
+    for other in cluster[1:]:
+        for key, value in other.items():
+            if canonical.get(key) in (None, "", []) and value not in (None, "", []):
+                canonical[key] = value
+        for s in other.get("skills") or []:
+            if s not in skills:
+                skills.append(s)
+    canonical["skills"] = skills
+    canonical["duplicate_ids"] = [str(j.get("id")) for j in cluster[1:] if j.get("id")]
+    canonical["sources"] = sorted({j.get("source") for j in cluster if j.get("source")})
+    return canonical
+
+
+def dedupe_jobs(jobs: Iterable[dict], threshold: Optional[float] = None) -> List[dict]:
+    """Collapse near-identical postings, preserving first-seen order."""
+    deduper = JobDeduper() if threshold is None else JobDeduper(threshold)
+    for job in jobs:
+        deduper.add(job)
+    return deduper.canonical_records()
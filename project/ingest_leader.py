@@ -0,0 +1,204 @@
+"""
+Single-leader background ingestion shared by all worker processes.
+
+Every worker runs an IngestionWorker thread, but only the one holding the
+"ingest" lease in jobs.db scrapes. The leader renews the lease (heartbeat)
+every ttl/3 seconds, including while fetches are in flight. If it dies or
+stalls, the lease expires after ttl seconds and another worker takes over
+on its next poll. Results go to source_snapshots, and the write is fenced
+on still holding the lease; every worker serves /get_jobs from there.
+Each snapshot written is also upserted into the jobs table (which feeds
+/api/jobs/recent and the skill demand rollups), after which the source's
+postings missing from it are archived. Age-based retention runs after
+every refresh and ANALYZE/incremental vacuum every OPTIMIZE_INTERVAL.
+"""
+from __future__ import annotations
+
+import os
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from uuid import uuid4
+
+import database_helpers as dbh
+import metrics
+
+LEASE_NAME = "ingest"
+DEFAULT_TTL = 30.0  # seconds a lease survives without a heartbeat
+OPTIMIZE_INTERVAL = 6 * 3600.0  # seconds between optimize_db runs by the leader
+
+Source = Tuple[str, Callable[[], List[dict]]]
+
+
+def make_holder_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+
+
+class Lease:
+    """A named lease row in jobs.db held by one process at a time."""
+
+    def __init__(self, name: str = LEASE_NAME, ttl: float = DEFAULT_TTL, holder: Optional[str] = None):
+        self.name = name
+        self.ttl = ttl
+        self.holder = holder or make_holder_id()
+        self.held = False
+
+    def acquire(self, conn) -> bool:
+        """Take the lease if free or expired, or renew it if already ours."""
+        self.held = dbh.acquire_lease(conn, self.name, self.holder, self.ttl, time.time())
+        return self.held
+
+    heartbeat = acquire
+
+    def release(self, conn) -> None:
+        if self.held:
+            dbh.release_lease(conn, self.name, self.holder)
+            self.held = False
+
+
+class IngestionWorker(threading.Thread):
+    """Polls for the lease; while leader, refreshes every source each interval."""
+
+    def __init__(self, sources: Sequence[Source], interval: float, ttl: float = DEFAULT_TTL,
+                 on_batch: Optional[Callable[[str, List[dict]], None]] = None,
+                 on_demote: Optional[Callable[[], None]] = None):
+        super().__init__(name="ingest-leader", daemon=True)
+        self.sources = list(sources)
+        self.interval = interval
+        self.lease = Lease(ttl=ttl)
+        self.on_batch = on_batch
+        self.on_demote = on_demote  # called when this process stops being the leader
+        self.last_refresh = 0.0
+        self.last_optimize = time.time()  # not at once: a new leader often follows a restart
+        self._stop_event = threading.Event()
+        self._pool = ThreadPoolExecutor(max_workers=max(len(self.sources), 1), thread_name_prefix="ingest")
+
+    @property
+    def poll_seconds(self) -> float:
+        return self.lease.ttl / 3
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def run(self) -> None:
+        conn = dbh.get_db_connection()
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    self._tick(conn)
+                except Exception as e:
+                    print(f"Ingestion leader error: {e}", file=sys.stderr)
+                self._stop_event.wait(self.poll_seconds)
+            if self.lease.held:
+                self._demote()
+            self.lease.release(conn)
+        finally:
+            dbh.close_db(conn)
+
+    def _tick(self, conn) -> None:
+        was_leader = self.lease.held
+        if not self.lease.heartbeat(conn):
+            if was_leader:
+                print(f"Lost ingestion lease ({self.lease.holder})", file=sys.stderr)
+                self._demote()
+            metrics.INGEST_LEADER.set(0)
+            return
+        metrics.INGEST_LEADER.set(1)
+        if not was_leader:
+            # Pick up where the previous leader left off instead of refetching at once
+            times = [dbh.get_source_snapshot_time(conn, name) for name, _ in self.sources]
+            self.last_refresh = min((t or 0.0) for t in times) if times else 0.0
+        if time.time() - self.last_refresh >= self.interval:
+            self.refresh(conn)
+
+    def _demote(self) -> None:
+        if self.on_demote is not None:
+            try:
+                self.on_demote()
+            except Exception as e:
+                print(f"Ingestion leader demote hook failed: {e}", file=sys.stderr)
+
+    def refresh(self, conn) -> int:
+        """Fetch every source once, heartbeating while waiting; returns snapshots written."""
+        started = time.time()
+        seen_before = dbh.db_timestamp(conn)
+        futures = {self._pool.submit(fetch): name for name, fetch in self.sources}
+        written = 0
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=self.poll_seconds, return_when=FIRST_COMPLETED)
+            if not self.lease.heartbeat(conn):
+                print("Lost ingestion lease during refresh; discarding results", file=sys.stderr)
+                return written
+            for fut in done:
+                name = futures[fut]
+                try:
+                    jobs = fut.result()
+                except Exception as e:
+                    print(f"Error fetching {name} jobs: {e}", file=sys.stderr)
+                    continue
+                # An empty result is most likely an upstream failure: keep the last snapshot
+                if jobs and dbh.save_source_snapshot(
+                    conn, name, jobs, time.time(), self.lease.name, self.lease.holder
+                ):
+                    written += 1
+                    self._store(conn, name, jobs, seen_before)
+        dbh.expire_jobs(conn)
+        if time.time() - self.last_optimize >= OPTIMIZE_INTERVAL:
+            dbh.optimize_db(conn)
+            self.last_optimize = time.time()
+        self.last_refresh = started
+        return written
+
+    def _store(self, conn, name: str, jobs: List[dict], seen_before: str) -> None:
+        """Upsert a source's full job list into the jobs table and archive what it no longer lists."""
+        stored = dbh.count_source_jobs(conn, name)
+        dbh.upsert_jobs_bulk(conn, jobs)
+        if self.on_batch is not None:
+            self.on_batch(name, jobs)
+        dbh.expire_missing(conn, name, len(jobs), stored, seen_before)
+
+
+class SnapshotReader:
+    """Per-process cache of source_snapshots; reparses JSON only when a snapshot changes."""
+
+    def __init__(self):
+        self._cache: Dict[str, Tuple[float, List[dict]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, conn, source: str, max_age: float) -> Optional[List[dict]]:
+        fetched_at = dbh.get_source_snapshot_time(conn, source)
+        if fetched_at is None or time.time() - fetched_at > max_age:
+            return None
+        cached = self._cache.get(source)
+        if cached is not None and cached[0] == fetched_at:
+            return cached[1]
+        snap = dbh.get_source_snapshot(conn, source)
+        if snap is None:
+            return None
+        jobs, fetched_at = snap
+        with self._lock:
+            self._cache[source] = (fetched_at, jobs)
+        return jobs
+
+
+_worker: Optional[IngestionWorker] = None
+_worker_pid: Optional[int] = None
+_start_lock = threading.Lock()
+
+
+def ensure_worker(sources: Sequence[Source], interval: float, ttl: float = DEFAULT_TTL,
+                  on_batch=None, on_demote=None) -> IngestionWorker:
+    """Start this process's IngestionWorker once (again after a fork)."""
+    global _worker, _worker_pid
+    if _worker is not None and _worker_pid == os.getpid() and _worker.is_alive():
+        return _worker
+    with _start_lock:
+        if _worker is None or _worker_pid != os.getpid() or not _worker.is_alive():
+            _worker = IngestionWorker(sources, interval, ttl, on_batch, on_demote)
+            _worker_pid = os.getpid()
+            _worker.start()
+    return _worker
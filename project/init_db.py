@@ -1,20 +1,15 @@
-import sqlite3
+import database_helpers as dbh
 from werkzeug.security import generate_password_hash
 
-conn = sqlite3.connect("users.db")
-c = conn.cursor()
+# The app migrates users.db itself on startup; this only seeds a test user.
+dbh.setup_users_db()
 
-c.execute("""
-CREATE TABLE IF NOT EXISTS users (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    username TEXT UNIQUE NOT NULL,
-    password_hash TEXT NOT NULL
-)
-""")
+conn = dbh.get_users_connection()
+c = conn.cursor()
 
 # Example user
 c.execute(
-    "INSERT INTO users (username, password_hash) VALUES (?, ?)",
+    "INSERT OR IGNORE INTO users (username, password_hash) VALUES (?, ?)",
     ("test", generate_password_hash("password123"))
 )
 
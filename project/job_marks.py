@@ -0,0 +1,137 @@
+"""
+Per-user hidden and seen job sets, applied when jobs are queried or pushed.
+
+Job keys (the string ids the API returns) are interned to integers in
+jobs.db, and each user's set is held in memory as a sorted array of those
+integers, so a membership test is a dict lookup plus a bisect. Every write
+bumps the user's mark version; readers reload a set only when the stored
+version has moved, which keeps several worker processes consistent.
+The caches are bounded: least recently used sets are dropped past
+MAX_CACHED_SETS, and keys no cached set refers to are dropped once more
+than MAX_CACHED_KEYS are interned.
+"""
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import database_helpers as dbh
+
+HIDDEN = "hidden"
+SEEN = "seen"
+KINDS = (HIDDEN, SEEN)
+
+MAX_CACHED_SETS = 2048
+MAX_CACHED_KEYS = 200_000
+
+
+class MarkSet:
+    """Sorted array of interned job key ids."""
+
+    __slots__ = ("ids", "version")
+
+    def __init__(self, ids: Iterable[int] = (), version: int = 0):
+        self.ids = array("L", sorted(ids))
+        self.version = version
+
+    def __contains__(self, key_id: int) -> bool:
+        i = bisect_left(self.ids, key_id)
+        return i < len(self.ids) and self.ids[i] == key_id
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+# Process-wide caches. A key is only interned here once some loaded set
+# contains it, so a key missing from _key_ids cannot be in any cached set.
+_key_ids: Dict[str, int] = {}
+_key_names: Dict[int, str] = {}
+_sets: "OrderedDict[Tuple[str, str], MarkSet]" = OrderedDict()  # least recently used first
+_lock = Lock()
+
+
+def _load(conn, user: str, kind: str, version: int) -> MarkSet:
+    pairs = dbh.get_job_marks(conn, user, kind)
+    with _lock:
+        for key_id, key in pairs:
+            _key_ids[key] = key_id
+            _key_names[key_id] = key
+        marks = MarkSet((key_id for key_id, _ in pairs), version)
+        _sets[(user, kind)] = marks
+        _sets.move_to_end((user, kind))
+        _evict()
+    return marks
+
+
+def _evict() -> None:
+    """Trim the caches to their limits (caller holds _lock).
+
+    The key maps are replaced rather than cleared, so a reader still
+    holding the old dicts sees a complete mapping.
+    """
+    global _key_ids, _key_names
+    while len(_sets) > MAX_CACHED_SETS:
+        _sets.popitem(last=False)
+    if len(_key_ids) <= MAX_CACHED_KEYS:
+        return
+    # Re-intern only the keys the remaining sets use, dropping whole sets
+    # (oldest first) if even those are too many
+    while len(_sets) > 1 and sum(len(m) for m in _sets.values()) > MAX_CACHED_KEYS:
+        _sets.popitem(last=False)
+    live = {key_id for m in _sets.values() for key_id in m.ids}
+    _key_names = {key_id: _key_names[key_id] for key_id in live}
+    _key_ids = {key: key_id for key_id, key in _key_names.items()}
+
+
+def marks_for(conn, user: str, kind: str) -> MarkSet:
+    version = dbh.get_job_mark_version(conn, user)
+    marks = _sets.get((user, kind))
+    if marks is None or marks.version != version:
+        return _load(conn, user, kind, version)
+    with _lock:
+        if (user, kind) in _sets:
+            _sets.move_to_end((user, kind))
+    return marks
+
+
+def marked_keys(conn, user: str, kind: str) -> List[str]:
+    marks = marks_for(conn, user, kind)
+    with _lock:
+        names = _key_names
+        if all(key_id in names for key_id in marks.ids):
+            return [names[key_id] for key_id in marks.ids]
+    # The set was evicted since marks_for and its keys dropped: read them afresh
+    return [key for _, key in dbh.get_job_marks(conn, user, kind)]
+
+
+def job_key(job: dict) -> str:
+    return str(job.get("id") or "")
+
+
+def filter_jobs(conn, user: str, jobs: Sequence[dict], kinds: Sequence[str] = (HIDDEN,)) -> List[dict]:
+    """Drop jobs that user has marked with any of kinds."""
+    sets = [m for m in (marks_for(conn, user, kind) for kind in kinds) if len(m)]
+    if not sets:
+        return list(jobs)
+    out = []
+    for job in jobs:
+        key_id = _key_ids.get(job_key(job))
+        if key_id is None or not any(key_id in m for m in sets):
+            out.append(job)
+    return out
+
+
+def mark(conn, user: str, kind: str, keys: Iterable[str]) -> None:
+    keys = [k for k in keys if k]
+    if keys:
+        # Reload rather than patch: the version may also cover other processes' writes
+        _load(conn, user, kind, dbh.add_job_marks(conn, user, kind, keys))
+
+
+def unmark(conn, user: str, kind: str, keys: Optional[Iterable[str]] = None) -> None:
+    """Remove keys from user's kind set (the whole set when keys is None)."""
+    version = dbh.remove_job_marks(conn, user, kind, None if keys is None else list(keys))
+    _load(conn, user, kind, version)
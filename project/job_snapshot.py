@@ -0,0 +1,175 @@
+"""
+Job store snapshots for warm starts and offline analysis.
+
+A snapshot holds the normalized jobs, skills, job-skill links, the
+leader's per-source job lists and the extracted KU detail text (stored
+in jobs.db by an export with --fetch or by an import, plus whatever
+this process has cached), each
+table stored column-major ({column: [values]}) so repeated values sit
+together and compress well. The file is one header line naming the
+encoding, then the compressed payload: msgpack when installed (else
+JSON) and zstd when installed (else gzip). load_snapshot() returns the
+plain column dicts, which pandas or pyarrow take as-is.
+
+Usage:
+  python job_snapshot.py export jobs.snap [--fetch]   # --fetch scrapes KU + RemoteOK (and detail pages) first
+  python job_snapshot.py import jobs.snap
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import database_helpers as dbh
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MAGIC = b"JOBSNAP/1"
+
+
+def _encode(payload: dict) -> bytes:
+    if msgpack is not None:
+        body, serializer = msgpack.packb(payload, use_bin_type=True), "msgpack"
+    else:
+        body, serializer = json.dumps(payload, separators=(",", ":")).encode(), "json"
+    if zstandard is not None:
+        body, compressor = zstandard.ZstdCompressor(level=10).compress(body), "zstd"
+    else:
+        body, compressor = gzip.compress(body, compresslevel=6), "gzip"
+    return MAGIC + f" {serializer}+{compressor}\n".encode() + body
+
+
+def _decode(data: bytes) -> dict:
+    header, _, body = data.partition(b"\n")
+    magic, _, encoding = header.partition(b" ")
+    if magic != MAGIC:
+        raise ValueError("not a job store snapshot")
+    serializer, _, compressor = encoding.decode().partition("+")
+    if compressor == "zstd":
+        if zstandard is None:
+            raise RuntimeError("snapshot is zstd-compressed; install zstandard to read it")
+        body = zstandard.ZstdDecompressor().decompress(body)
+    elif compressor == "gzip":
+        body = gzip.decompress(body)
+    else:
+        raise ValueError(f"unknown snapshot compression: {compressor}")
+    if serializer == "msgpack":
+        if msgpack is None:
+            raise RuntimeError("snapshot is msgpack-encoded; install msgpack to read it")
+        return msgpack.unpackb(body, raw=False)
+    if serializer == "json":
+        return json.loads(body)
+    raise ValueError(f"unknown snapshot encoding: {serializer}")
+
+
+def export_snapshot(path, conn=None) -> Dict[str, int]:
+    """Write the job store, its detail text and this process's detail cache to path."""
+    import ku_jobs_scraper
+
+    own = conn is None
+    conn = conn or dbh.get_db_connection()
+    try:
+        tables = dbh.export_job_store(conn)
+        stored = dbh.get_job_details(conn)
+    finally:
+        if own:
+            dbh.close_db(conn)
+    details = {url: (text, fetched_at) for url, text, fetched_at in stored}
+    for url, text, fetched_at in ku_jobs_scraper.detail_cache_entries():
+        if url not in details or fetched_at > details[url][1]:
+            details[url] = (text, fetched_at)
+    tables["details"] = {
+        "url": list(details),
+        "text": [text for text, _ in details.values()],
+        "fetched_at": [fetched_at for _, fetched_at in details.values()],
+    }
+    Path(path).write_bytes(_encode({"created_at": time.time(), "tables": tables}))
+    return {name: len(next(iter(cols.values()), [])) for name, cols in tables.items()}
+
+
+def load_snapshot(path) -> Dict[str, Dict[str, list]]:
+    """{table: {column: [values]}} from a snapshot file."""
+    return _decode(Path(path).read_bytes())["tables"]
+
+
+def import_snapshot(path, conn=None, only_if_empty=False) -> Optional[Dict[str, int]]:
+    """Bulk-load a snapshot into jobs.db and seed this process's detail cache.
+
+    With only_if_empty, the job tables are skipped (and None returned)
+    when jobs already has rows; detail text is stored and cached either way.
+    """
+    import ku_jobs_scraper
+
+    snapshot = _decode(Path(path).read_bytes())
+    tables = snapshot["tables"]
+    details = tables.get("details") or {}
+    urls = details.get("url", [])
+    # snapshots from before fetched_at was recorded: date the text by the snapshot
+    fetched = details.get("fetched_at") or [snapshot.get("created_at", 0)] * len(urls)
+    entries = list(zip(urls, details.get("text", []), fetched))
+    own = conn is None
+    conn = conn or dbh.get_db_connection()
+    try:
+        counts = dbh.import_job_store(conn, tables, only_if_empty=only_if_empty)
+        dbh.save_job_details(conn, entries)
+    finally:
+        if own:
+            dbh.close_db(conn)
+    loaded = ku_jobs_scraper.load_detail_cache(entries)
+    if counts is not None:
+        counts["details"] = loaded
+    return counts
+
+
+def _fetch_into_store(conn):
+    """Scrape KU (with detail pages) and the RemoteOK feed into jobs.db."""
+    import davidsscraper
+    import ku_jobs_scraper
+
+    session = ku_jobs_scraper.get_session()
+    rows = ku_jobs_scraper.parse_listings_table(
+        ku_jobs_scraper.fetch_html_text(session, ku_jobs_scraper.LIST_URL)
+    )
+    texts = {}
+    ku_jobs_scraper.enrich_rows_with_skills(session, rows, texts=texts)
+    dbh.upsert_jobs_bulk(conn, [r.to_api_format() for r in rows])
+    now = time.time()
+    dbh.save_job_details(conn, [(url, text, now) for url, text in texts.items()])
+    davidsscraper.ingest_remoteok(conn)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export or import a job store snapshot")
+    parser.add_argument("action", choices=("export", "import"))
+    parser.add_argument("path")
+    parser.add_argument("--fetch", action="store_true", help="scrape all sources before exporting")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    conn = dbh.setup_db()
+    try:
+        if args.action == "export":
+            if args.fetch:
+                _fetch_into_store(conn)
+            counts = export_snapshot(args.path, conn)
+        else:
+            counts = import_snapshot(args.path, conn)
+    finally:
+        dbh.close_db(conn)
+    size = Path(args.path).stat().st_size
+    print(f"{args.action}ed {counts} ({size / 1024:.0f} KiB) in {time.perf_counter() - started:.2f}s",
+          file=sys.stderr)
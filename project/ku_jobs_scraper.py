@@ -4,16 +4,36 @@ KU Jobs Scraper
 """
 from __future__ import annotations
 
+import os
 import re
+import hashlib
 import sys
-from time import time
-from threading import Lock
+import queue
+import multiprocessing
+from time import perf_counter, time
+from threading import Event, Lock
 from dataclasses import dataclass
-from typing import List, Optional, Iterable, Tuple
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from io import BytesIO
+from typing import Dict, List, Optional, Iterable, Iterator, Tuple
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from concurrent.futures.process import BrokenProcessPool
 
 import requests
 from bs4 import BeautifulSoup
+from lxml import etree
+from lxml import html as lxml_html
+
+import metrics
+import posting_dates
+import tracing
+# SKILL_TOKENS/SKILL_NORM_MAP/extract_skills_from_text live in skill_tokens and are re-exported here
+from skill_tokens import SKILL_NORM_MAP, SKILL_TOKENS, extract_skills_from_text
 
 # Constants and minimal config
 BASE_URL = "https://employment.ku.edu"
@@ -29,27 +49,69 @@ CACHE_TTL_SEC = 1800  # 30 minutes
 MAX_CACHE_SIZE = 300
 _DETAIL_CACHE_LOCK = Lock()
 
+_CACHE_HIT = metrics.DETAIL_CACHE_EVENTS.labels("hit")
+_CACHE_MISS = metrics.DETAIL_CACHE_EVENTS.labels("miss")
+_CACHE_EXPIRED = metrics.DETAIL_CACHE_EVENTS.labels("expired")
+_CACHE_EVICTION = metrics.DETAIL_CACHE_EVENTS.labels("eviction")
+
 def _get_cached_detail(url: str) -> Optional[str]:
     with _DETAIL_CACHE_LOCK:
         entry = DETAIL_CACHE.get(url)
         if not entry:
+            _CACHE_MISS.inc()
             return None
         ts = entry.get("ts", 0)
         if not isinstance(ts, (int, float)) or time() - ts > CACHE_TTL_SEC:
             DETAIL_CACHE.pop(url, None)
+            _CACHE_EXPIRED.inc()
+            _CACHE_MISS.inc()
             return None
+        _CACHE_HIT.inc()
         return entry.get("text") if isinstance(entry.get("text"), str) else None
 
 def _set_cached_detail(url: str, text: str) -> None:
     with _DETAIL_CACHE_LOCK:
-        if len(DETAIL_CACHE) >= MAX_CACHE_SIZE:
+        if len(DETAIL_CACHE) >= MAX_CACHE_SIZE and url not in DETAIL_CACHE:
             # Drop oldest
             oldest = min(DETAIL_CACHE.items(), key=lambda kv: kv[1].get("ts", 0))[0]
             DETAIL_CACHE.pop(oldest, None)
+            _CACHE_EVICTION.inc()
         DETAIL_CACHE[url] = {"text": text, "ts": time()}
 
+def detail_cache_entries() -> List[Tuple[str, str, float]]:
+    """(url, text, fetched_at) for every live DETAIL_CACHE entry, for snapshots."""
+    now = time()
+    with _DETAIL_CACHE_LOCK:
+        return [
+            (url, entry["text"], entry.get("ts", 0)) for url, entry in DETAIL_CACHE.items()
+            if isinstance(entry.get("text"), str) and now - entry.get("ts", 0) <= CACHE_TTL_SEC
+        ]
+
+def load_detail_cache(entries: Iterable[Tuple[str, str, float]]) -> int:
+    """Seed DETAIL_CACHE from (url, text, fetched_at), keeping each entry's age.
 
-@dataclass
+    Entries already past CACHE_TTL_SEC are skipped; stops at MAX_CACHE_SIZE.
+    Returns the number loaded.
+    """
+    now = time()
+    loaded = 0
+    with _DETAIL_CACHE_LOCK:
+        for url, text, fetched_at in entries:
+            if now - fetched_at > CACHE_TTL_SEC:
+                continue
+            if len(DETAIL_CACHE) >= MAX_CACHE_SIZE and url not in DETAIL_CACHE:
+                break
+            DETAIL_CACHE[url] = {"text": text, "ts": fetched_at}
+            loaded += 1
+    return loaded
+
+
+def _stable_url_hash(url: str) -> str:
+    # hash() is salted per process, so it cannot be used for ids
+    return hashlib.blake2b(url.encode("utf-8"), digest_size=8).hexdigest()
+
+
+@dataclass(slots=True)
 class JobRow:
     title: str
     job_url: str
@@ -64,7 +126,7 @@ class JobRow:
     def to_api_format(self) -> dict:
         """Convert to the format expected by app.py"""
         return {
-            "id": self.posting_id or f"ku_{hash(self.job_url)}",
+            "id": self.posting_id or f"ku_{_stable_url_hash(self.job_url)}",
             "name": self.title,
             "title": self.title,
             "short_description": f"{self.department} - {self.primary_campus}" if self.department else "KU Job Posting",
@@ -75,7 +137,7 @@ class JobRow:
             "campus": self.primary_campus,
             "type": self.reg_temp,
             "review_begins": self.review_begins,
-            "posted_at": self.review_begins,
+            "posted_at": posting_dates.iso_date(self.review_begins),
             "skills": self.skills or []
         }
 
@@ -87,6 +149,10 @@ def get_session(timeout: int = 20) -> requests.Session:
     s = requests.Session()
     # Simple retry/backoff omitted to keep within minimal scope
     s.headers.update(DEFAULT_HEADERS)
+    # Room for every detail fetcher thread to keep its connection alive
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=32)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
 
     # Attach default timeout via wrapper
     original_request = s.request
@@ -100,23 +166,111 @@ def get_session(timeout: int = 20) -> requests.Session:
     return s
 
 
+@tracing.traced("ku.fetch_html_text")
 def fetch_html_text(session: requests.Session, url: str) -> str:
     resp = session.get(url)
     resp.raise_for_status()
     return resp.text
 
 
-def parse_listings_table(html: str) -> List[JobRow]:
+LISTING_HEADER_LABELS = [
+    "Posting Title",
+    "ID",
+    "Department",
+    "Primary Campus",
+    "Reg/Temp",
+    "Review Begins",
+]
+
+# Precompiled XPath for the lxml fast path
+_XP_HEADER_ROW = etree.XPath("(./thead/tr)[1] | (.//tr)[1]")
+_XP_HEADER_CELLS = etree.XPath(".//th | .//td")
+_XP_BODY_ROWS = etree.XPath("(.//tbody)[1]//tr")
+_XP_ALL_ROWS = etree.XPath(".//tr")
+_XP_CELLS = etree.XPath(".//td | .//th")
+_XP_LINK = etree.XPath(".//a[@href][1]")
+
+
+def _make_job_row(title: str, href: str, cell_texts: List[str]) -> JobRow:
+    title = re.sub(r"^\[\*\*Internal Only\*\*\]\s*", "", title, flags=re.I)
+    url = href if href.startswith("http") else f"{BASE_URL.rstrip('/')}{href}"
+
+    def cell(i: int) -> Optional[str]:
+        return (cell_texts[i] or None) if len(cell_texts) > i else None
+
+    return JobRow(
+        title=title,
+        job_url=url,
+        posting_id=cell(1),
+        department=cell(2),
+        primary_campus=cell(3),
+        reg_temp=cell(4),
+        review_begins=cell(5),
+        category=_extract_category_from_url(url),
+        skills=None,
+    )
+
+
+def _lx_text(el) -> str:
+    # Same result as BeautifulSoup get_text(strip=True)
+    return "".join(t.strip() for t in el.itertext())
+
+
+def iter_listings_table(html: str | bytes) -> Iterator[JobRow]:
+    """Stream JobRows out of the listings table using lxml iterparse.
+
+    Tables are inspected as soon as their closing tag is parsed; non-matching
+    tables are cleared and parsing stops after the target table, so the rest
+    of the page is never built. Yields nothing if no listings table exists.
+    """
+    data = html.encode("utf-8") if isinstance(html, str) else html
+    for _, tbl in etree.iterparse(
+        BytesIO(data), events=("end",), tag="table", html=True, encoding="utf-8"
+    ):
+        header = _XP_HEADER_ROW(tbl)
+        header_text = ""
+        if header:
+            header_text = " ".join(_lx_text(c) for c in _XP_HEADER_CELLS(header[0]))
+        if not (header_text and all(h in header_text for h in LISTING_HEADER_LABELS)):
+            tbl.clear()
+            continue
+
+        for tr in _XP_BODY_ROWS(tbl) or _XP_ALL_ROWS(tbl):
+            cells = _XP_CELLS(tr)
+            if not cells:
+                continue
+            link = _XP_LINK(cells[0])
+            if not link:
+                continue
+            yield _make_job_row(
+                _lx_text(link[0]),
+                link[0].get("href"),
+                [_lx_text(c) for c in cells],
+            )
+        return
+
+
+@tracing.traced("ku.parse_listings_table")
+def parse_listings_table(html: str, fast: bool = True) -> List[JobRow]:
+    """Parse the KU listings page into JobRows.
+
+    With fast=True the lxml streaming parser is tried first; the
+    BeautifulSoup parser (which also handles pages without the table)
+    is used when it finds nothing.
+    """
+    if fast:
+        try:
+            rows = list(iter_listings_table(html))
+        except (etree.LxmlError, ValueError):
+            rows = []
+        if rows:
+            return rows
+    return _parse_listings_table_soup(html)
+
+
+def _parse_listings_table_soup(html: str) -> List[JobRow]:
     soup = BeautifulSoup(html, "lxml")
     # Try to find a table with expected headers
-    header_labels = [
-        "Posting Title",
-        "ID",
-        "Department",
-        "Primary Campus",
-        "Reg/Temp",
-        "Review Begins",
-    ]
     target_table = None
     for tbl in soup.find_all("table"):
         thead = tbl.find("thead")
@@ -127,7 +281,7 @@ def parse_listings_table(html: str) -> List[JobRow]:
             first_row = tbl.find("tr")
             if first_row:
                 header_text = " ".join([cell.get_text(strip=True) for cell in first_row.find_all(["th", "td"])])
-        if header_text and all(h in header_text for h in header_labels):
+        if header_text and all(h in header_text for h in LISTING_HEADER_LABELS):
             target_table = tbl
             break
 
@@ -158,30 +312,14 @@ def parse_listings_table(html: str) -> List[JobRow]:
         cells = tr.find_all(["td", "th"])
         if not cells:
             continue
-        title_cell = cells[0]
-        link = title_cell.find("a", href=True)
+        link = cells[0].find("a", href=True)
         if not link:
             continue
-        title = re.sub(r"^\[\*\*Internal Only\*\*\]\s*", "", link.get_text(strip=True), flags=re.I)
-        href = link["href"]
-        url = href if href.startswith("http") else f"{BASE_URL.rstrip('/')}{href}"
-        posting_id = cells[1].get_text(strip=True) if len(cells) > 1 else None
-        department = cells[2].get_text(strip=True) if len(cells) > 2 else None
-        primary_campus = cells[3].get_text(strip=True) if len(cells) > 3 else None
-        reg_temp = cells[4].get_text(strip=True) if len(cells) > 4 else None
-        review_begins = cells[5].get_text(strip=True) if len(cells) > 5 else None
-
         rows.append(
-            JobRow(
-                title=title,
-                job_url=url,
-                posting_id=posting_id or None,
-                department=department or None,
-                primary_campus=primary_campus or None,
-                reg_temp=reg_temp or None,
-                review_begins=review_begins or None,
-                category=_extract_category_from_url(url),
-                skills=None,
+            _make_job_row(
+                link.get_text(strip=True),
+                link["href"],
+                [c.get_text(strip=True) for c in cells],
             )
         )
     return rows
@@ -195,84 +333,92 @@ def _extract_category_from_url(url: str) -> Optional[str]:
 def fetch_detail_and_extract_skills(session: requests.Session, url: str) -> List[str]:
     """Test fetching KU job detail page and extract skills via keyword matching.
     """
-    cached = _get_cached_detail(url)
-    if cached is None:
-        try:
-            resp = requests.get(url, headers=DEFAULT_HEADERS, timeout=12)
-            resp.raise_for_status()
-        except Exception:
-            return []
-        soup = BeautifulSoup(resp.text, "lxml")
-        text_raw = _detail_text(soup)
-        _set_cached_detail(url, text_raw)
-    else:
-        text_raw = cached
-    text = text_raw.lower()
-
-    # Curated skill tokens. Keep lowercase; match as whole words where sensible.
-    tokens = [
-        # languages
-        "python", "java", "c++", "c#", "javascript", "typescript", "go", "rust", "ruby", "php", "scala", "r ", " r",
-        # web/fe
-        "html", "css", "react", "angular", "vue", "node", "node.js", "nodejs", "next.js", "nextjs",
-        # data/ai
-        "sql", "nosql", "postgres", "mysql", "sqlite", "oracle", "mongodb", "pandas", "numpy", "scikit-learn",
-        "tensorflow", "pytorch", "spark", "hadoop", "tableau", "power bi", "excel",
-        # devops/cloud
-        "aws", "azure", "gcp", "docker", "kubernetes", "linux", "bash", "git", "ci/cd", "jenkins", "terraform",
-        # backend/web
-        "flask", "django", "fastapi", "graphql", "rest ", " rest", "api",
-        # misc
-        "matlab", "sas", "snowflake",
-    ]
-
-    found: List[str] = []
-    for t in tokens:
-        # coarse matching: word boundary if simple token; otherwise substring
-        tt = t.strip()
-        if not tt:
-            continue
-        if any(ch in tt for ch in ['+', '#', '/', '.', ' ']):
-            if tt in text:
-                found.append(tt.replace(' ', ' ').replace('.js', ''))
-        else:
-            if re.search(rf"\b{re.escape(tt)}\b", text):
-                found.append(tt)
-
-    # normalize variants
-    norm_map = {
-        "node": "node.js",
-        "nodejs": "node.js",
-        "nextjs": "next.js",
-        "rest": "rest",
-        " r": "r",
-        "r ": "r",
-    }
-    out = []
-    for f in found:
-        key = norm_map.get(f, f)
-        if key not in out:
-            out.append(key)
-    return out
+    try:
+        text_raw = get_detail_text(url)
+    except Exception:
+        return []
+    return extract_skills_from_text(text_raw)
+
+
+# Common content wrappers, most specific first; mirrored by _XP_DETAIL_REGIONS
+DETAIL_SELECTORS = [
+    "main",
+    "article",
+    "[role='main']",
+    ".region-content",
+    ".field--name-body",
+    ".node__content",
+]
+
+_XP_DETAIL_REGIONS = [
+    etree.XPath("(//main)[1]"),
+    etree.XPath("(//article)[1]"),
+    etree.XPath("(//*[@role='main'])[1]"),
+    etree.XPath("(//*[contains(concat(' ', normalize-space(@class), ' '), ' region-content ')])[1]"),
+    etree.XPath("(//*[contains(concat(' ', normalize-space(@class), ' '), ' field--name-body ')])[1]"),
+    etree.XPath("(//*[contains(concat(' ', normalize-space(@class), ' '), ' node__content ')])[1]"),
+]
+
+# Elements whose text BeautifulSoup's get_text() leaves out
+_NON_TEXT_TAGS = {"script", "style", "template", "noscript"}
 
 
 def _detail_text(soup: BeautifulSoup) -> str:
     # Try common content wrappers; fallback to all readable text
-    selectors = [
-        "main",
-        "article",
-        ".[role='main']",
-        ".region-content",
-        ".field--name-body",
-        ".node__content",
-    ]
-    for sel in selectors:
+    for sel in DETAIL_SELECTORS:
         el = soup.select_one(sel)
         if el:
             return el.get_text(separator=" ", strip=True)
     return soup.get_text(separator=" ", strip=True)
 
 
+def _lx_text_spaced(el) -> str:
+    # Same result as BeautifulSoup get_text(separator=" ", strip=True)
+    parts: List[str] = []
+    for node in el.iter():
+        if isinstance(node.tag, str) and node.tag not in _NON_TEXT_TAGS and node.text:
+            t = node.text.strip()
+            if t:
+                parts.append(t)
+        if node is not el and node.tail:
+            t = node.tail.strip()
+            if t:
+                parts.append(t)
+    return " ".join(parts)
+
+
+def extract_detail_text(html: str | bytes) -> str:
+    """Return the readable text of a detail page's main content region.
+
+    Parses with lxml directly and evaluates precompiled XPath for the
+    DETAIL_SELECTORS in order; falls back to the whole document's text.
+    """
+    try:
+        root = lxml_html.fromstring(html)
+    except (etree.LxmlError, ValueError):
+        return _detail_text(BeautifulSoup(html, "lxml"))
+    for xp in _XP_DETAIL_REGIONS:
+        found = xp(root)
+        if found:
+            return _lx_text_spaced(found[0])
+    return _lx_text_spaced(root)
+
+
+def get_detail_text(url: str) -> str:
+    """Main-content text of a detail page, from DETAIL_CACHE or the network.
+
+    Raises on network/HTTP errors.
+    """
+    cached = _get_cached_detail(url)
+    if cached is not None:
+        return cached
+    resp = requests.get(url, headers=DEFAULT_HEADERS, timeout=12)
+    resp.raise_for_status()
+    text_raw = extract_detail_text(resp.content)
+    _set_cached_detail(url, text_raw)
+    return text_raw
+
+
 def _extract_given_skills_from_text(text: str, given: List[str]) -> List[str]:
     text = text.lower()
     found: List[str] = []
@@ -310,14 +456,215 @@ def _extract_given_skills_from_text(text: str, given: List[str]) -> List[str]:
     return found
 
 
+def _skills_for_text(text_raw: str, input_skills: Optional[List[str]]) -> List[str]:
+    if input_skills:
+        return _extract_given_skills_from_text(text_raw, input_skills)
+    return extract_skills_from_text(text_raw)
+
+
+def _parse_detail_batch(
+    batch: List[Tuple[str, bytes]], input_skills: Optional[List[str]]
+) -> List[Tuple[str, Optional[str], List[str]]]:
+    """CPU stage of the detail pipeline; runs inside a parse worker process."""
+    out = []
+    for url, body in batch:
+        try:
+            text_raw = extract_detail_text(body)
+        except Exception:
+            out.append((url, None, []))
+            continue
+        out.append((url, text_raw, _skills_for_text(text_raw, input_skills)))
+    return out
+
+
+# Parse worker processes, shared by all callers in this process; started on
+# first use (only the ingestion leader enriches rows in the web app)
+PARSE_BATCH_SIZE = 8
+MAX_PARSE_PROCESSES = 4  # upper bound on the pool, whatever processes asks for
+_PARSE_POOL: Optional[ProcessPoolExecutor] = None
+_PARSE_POOL_WORKERS = 0
+_PARSE_POOL_LOCK = Lock()
+
+
+def _get_parse_pool(processes: Optional[int]) -> Tuple[Optional[ProcessPoolExecutor], int]:
+    """Return (pool, worker count); (None, 1) means parse in this process."""
+    global _PARSE_POOL, _PARSE_POOL_WORKERS
+    if processes == 0:
+        return None, 1
+    with _PARSE_POOL_LOCK:
+        if _PARSE_POOL is None:
+            workers = min(processes or os.cpu_count() or 1, MAX_PARSE_PROCESSES)
+            try:
+                _PARSE_POOL = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            except (OSError, NotImplementedError):
+                return None, 1
+            _PARSE_POOL_WORKERS = workers
+        return _PARSE_POOL, _PARSE_POOL_WORKERS
+
+
+def _discard_parse_pool(pool: ProcessPoolExecutor) -> None:
+    global _PARSE_POOL
+    with _PARSE_POOL_LOCK:
+        if _PARSE_POOL is pool:
+            _PARSE_POOL = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_parse_pool() -> None:
+    """Stop the parse worker processes, if any; the next pipeline run restarts them."""
+    pool = _PARSE_POOL
+    if pool is not None:
+        _discard_parse_pool(pool)
+
+
+_DETAIL_FETCH_SECONDS = metrics.SOURCE_SECONDS.labels("KU Jobs detail", "fetch")
+
+
+@tracing.traced("ku.detail_fetch")
+def _fetch_detail_bytes(url: str, session: Optional[requests.Session] = None) -> Optional[bytes]:
+    http = session or requests
+    try:
+        with _DETAIL_FETCH_SECONDS.time():
+            resp = http.get(url, headers=DEFAULT_HEADERS, timeout=12)
+            resp.raise_for_status()
+    except requests.Timeout:
+        metrics.record_source("KU Jobs detail", "timeout")
+        return None
+    except Exception:
+        metrics.record_source("KU Jobs detail", "error")
+        return None
+    metrics.record_source("KU Jobs detail", "success")
+    return resp.content
+
+
+def _detail_pipeline(
+    rows: List[JobRow],
+    input_skills: Optional[List[str]],
+    fetch_workers: int,
+    processes: Optional[int],
+    batch_size: int,
+    session: Optional[requests.Session] = None,
+) -> Iterator[Tuple[JobRow, List[str], Optional[str]]]:
+    """Yield (row, skills, detail text) as detail pages are fetched and parsed.
+
+    Stage 1 is a thread pool that only downloads bytes into a bounded queue
+    (fetchers block when parsing falls behind). Stage 2 drains the queue in
+    batches into a process pool that extracts text and skills, so parsing
+    is not serialized behind the GIL. Cached pages skip both stages.
+    If the consumer stops early or a parse fails, the fetchers are
+    cancelled and the queue drained, so no thread stays blocked on it.
+    """
+    by_url: dict[str, List[JobRow]] = {}
+    for row in rows:
+        cached = _get_cached_detail(row.job_url)
+        if cached is not None:
+            yield row, _skills_for_text(cached, input_skills), cached
+        else:
+            by_url.setdefault(row.job_url, []).append(row)
+    if not by_url:
+        return
+
+    pool, workers = _get_parse_pool(processes)
+    max_in_flight = 2 * workers
+    fetched: "queue.Queue[Tuple[str, Optional[bytes]]]" = queue.Queue(maxsize=batch_size * max_in_flight)
+
+    cancelled = Event()
+
+    def fetch(url: str) -> None:
+        if cancelled.is_set():
+            return
+        item = (url, _fetch_detail_bytes(url, session))
+        while not cancelled.is_set():
+            try:
+                fetched.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def finish(
+        results: List[Tuple[str, Optional[str], List[str]]]
+    ) -> Iterator[Tuple[JobRow, List[str], Optional[str]]]:
+        for url, text_raw, skills in results:
+            if text_raw is not None:
+                _set_cached_detail(url, text_raw)
+            for row in by_url[url]:
+                yield row, skills, text_raw
+
+    def submit(batch: List[Tuple[str, bytes]]) -> Future:
+        nonlocal pool
+        if pool is not None:
+            try:
+                return pool.submit(_parse_detail_batch, batch, input_skills)
+            except (BrokenProcessPool, RuntimeError):
+                _discard_parse_pool(pool)
+                pool = None
+        # No usable process pool: parse inline
+        done: Future = Future()
+        done.set_result(_parse_detail_batch(batch, input_skills))
+        return done
+
+    in_flight: dict[Future, Tuple[List[Tuple[str, bytes]], float]] = {}
+    batch: List[Tuple[str, bytes]] = []
+    io_pool = ThreadPoolExecutor(max_workers=fetch_workers)
+    try:
+        for url in by_url:
+            io_pool.submit(tracing.propagate(fetch), url)
+
+        for remaining in range(len(by_url) - 1, -1, -1):
+            url, body = fetched.get()
+            if body is None:
+                yield from finish([(url, None, [])])
+            else:
+                batch.append((url, body))
+            if batch and (len(batch) >= batch_size or remaining == 0):
+                in_flight[submit(batch)] = (batch, perf_counter())
+                batch = []
+            while len(in_flight) >= max_in_flight or (remaining == 0 and in_flight):
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                trace = tracing.current()
+                for fut in done:
+                    sent, submitted = in_flight.pop(fut)
+                    if trace is not None:
+                        trace.add_span("ku.detail_parse_batch", submitted, perf_counter())
+                    try:
+                        results = fut.result()
+                    except BrokenProcessPool:
+                        if pool is not None:
+                            _discard_parse_pool(pool)
+                            pool = None
+                        results = _parse_detail_batch(sent, input_skills)
+                    yield from finish(results)
+    finally:
+        cancelled.set()
+        for fut in in_flight:
+            fut.cancel()
+        while True:
+            try:
+                fetched.get_nowait()
+            except queue.Empty:
+                break
+        io_pool.shutdown(wait=False, cancel_futures=True)
+
+
+@tracing.traced("ku.enrich_rows_with_skills")
 def enrich_rows_with_skills(
     session: requests.Session,
     rows: Iterable[JobRow],
     limit: Optional[int] = None,
     input_skills: Optional[List[str]] = None,
-    max_workers: int = 8,
+    max_workers: int = 32,
+    processes: Optional[int] = None,
+    batch_size: int = PARSE_BATCH_SIZE,
+    texts: Optional[Dict[str, str]] = None,
 ) -> None:
     """Mutates rows to populate .skills by scraping the detail page.
+
+    max_workers bounds concurrent downloads; processes sizes the parse pool
+    (None = one per core, 0 = parse in this process), up to MAX_PARSE_PROCESSES.
+    texts, when given, receives {url: detail text} for every page read.
     """
     selected: List[JobRow] = []
     for r in rows:
@@ -325,39 +672,24 @@ def enrich_rows_with_skills(
             break
         selected.append(r)
 
-    def worker(row: JobRow) -> Tuple[JobRow, List[str]]:
-        try:
-            cached = _get_cached_detail(row.job_url)
-            if cached is None:
-                resp = requests.get(row.job_url, headers=DEFAULT_HEADERS, timeout=12)
-                resp.raise_for_status()
-                soup = BeautifulSoup(resp.text, "lxml")
-                text_raw = _detail_text(soup)
-                _set_cached_detail(row.job_url, text_raw)
-            else:
-                text_raw = cached
-            if input_skills:
-                skills = _extract_given_skills_from_text(text_raw, input_skills)
-            else:
-                # token extraction will handle caching internally too
-                skills = fetch_detail_and_extract_skills(session, row.job_url)
-            return row, skills
-        except Exception:
-            return row, []
-
-    with ThreadPoolExecutor(max_workers=max_workers) as ex:
-        futures = [ex.submit(worker, r) for r in selected]
-        for fut in as_completed(futures):
-            row, skills = fut.result()
-            row.skills = skills
+    for row in selected:
+        row.skills = []
+    pipeline = _detail_pipeline(selected, input_skills, max_workers, processes, batch_size, session)
+    for row, skills, text_raw in pipeline:
+        row.skills = skills
+        if texts is not None and text_raw is not None:
+            texts[row.job_url] = text_raw
 
 
+@tracing.traced("ku.filter_rows_by_input_skills")
 def filter_rows_by_input_skills(
     session: requests.Session,
     rows: Iterable[JobRow],
     input_skills: List[str],
     limit: Optional[int] = None,
-    max_workers: int = 8,
+    max_workers: int = 32,
+    processes: Optional[int] = None,
+    batch_size: int = PARSE_BATCH_SIZE,
 ) -> List[JobRow]:
     """Return only rows whose detail page text contains at least one input skill.
     """
@@ -367,28 +699,8 @@ def filter_rows_by_input_skills(
             break
         selected.append(r)
 
-    def worker(row: JobRow) -> Tuple[JobRow, bool]:
-        try:
-            cached = _get_cached_detail(row.job_url)
-            if cached is None:
-                resp = requests.get(row.job_url, headers=DEFAULT_HEADERS, timeout=12)
-                resp.raise_for_status()
-                soup = BeautifulSoup(resp.text, "lxml")
-                text_raw = _detail_text(soup)
-                _set_cached_detail(row.job_url, text_raw)
-            else:
-                text_raw = cached
-            matched = bool(_extract_given_skills_from_text(text_raw, input_skills))
-            return row, matched
-        except Exception:
-            return row, False
-
     kept: List[JobRow] = []
-    with ThreadPoolExecutor(max_workers=max_workers) as ex:
-        futures = [ex.submit(worker, r) for r in selected]
-        for fut in as_completed(futures):
-            row, matched = fut.result()
-            if matched:
-                kept.append(row)
+    for row, skills, _ in _detail_pipeline(selected, input_skills, max_workers, processes, batch_size, session):
+        if skills:
+            kept.append(row)
     return kept
-
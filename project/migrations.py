@@ -0,0 +1,653 @@
+"""
+Versioned schema migrations for jobs.db and users.db.
+
+Each database records the last applied step in SQLite's header
+(PRAGMA user_version), so on an up-to-date file migrate() costs a single
+pragma read. Steps are idempotent because databases created before
+versioning existed start at version 0 with some tables already present.
+Add new steps to the end of a list; never edit a released one.
+"""
+import sqlite3
+import time
+
+import posting_dates
+
+# Columns added to jobs for feed-ingested postings (step 2)
+_JOB_FEED_COLUMNS = ("external_id", "source", "url", "company", "location", "posted_at", "last_seen_at")
+
+
+# ---------------- jobs.db ----------------
+
+def _enable_incremental_vacuum(conn):
+    # Lets maintenance hand pages freed by retention back to the filesystem;
+    # converting an existing file takes one VACUUM, which cannot run in a transaction.
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+
+
+def _jobs_1_base(cur):
+    # --- existing jobs/skills tables ---
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        description TEXT
+    )
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS skills (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL UNIQUE
+    )
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS job_skills (
+      id INTEGER PRIMARY KEY AUTOINCREMENT,
+      job_id INTEGER NOT NULL,
+      skill_id INTEGER NOT NULL,
+      FOREIGN KEY (job_id) REFERENCES jobs(id),
+      FOREIGN KEY (skill_id) REFERENCES skills(id)
+    )
+    """)
+    cur.execute("""
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_job_skills_pair
+        ON job_skills(job_id, skill_id)
+    """)
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_job_skills_job
+        ON job_skills(job_id)
+    """)
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_job_skills_skill
+        ON job_skills(skill_id)
+    """)
+
+    # --- NEW: user_profile table (per-user rows) ---
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS user_profile (
+        user TEXT PRIMARY KEY,
+        name TEXT,
+        info TEXT,
+        soft_skills TEXT,
+        photo_path TEXT
+    )
+    """)
+
+    # If the table was created with the legacy integer id column, migrate it.
+    profile_cols = [row[1] for row in cur.execute("PRAGMA table_info(user_profile)").fetchall()]
+    if "user" not in profile_cols and "id" in profile_cols:
+        cur.execute("ALTER TABLE user_profile RENAME TO user_profile_legacy")
+        cur.execute("""
+        CREATE TABLE user_profile (
+            user TEXT PRIMARY KEY,
+            name TEXT,
+            info TEXT,
+            soft_skills TEXT,
+            photo_path TEXT
+        )
+        """)
+        cur.execute(
+            """
+            INSERT OR IGNORE INTO user_profile (user, name, info, soft_skills, photo_path)
+            SELECT 'default', name, info, soft_skills, photo_path
+            FROM user_profile_legacy
+            WHERE id = 1
+            """
+        )
+        cur.execute("DROP TABLE user_profile_legacy")
+
+    # --- NEW: saved jobs table ---
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS saved_jobs (
+        id TEXT PRIMARY KEY,
+        user TEXT NOT NULL,
+        job_json TEXT NOT NULL,
+        saved_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_saved_jobs_user
+        ON saved_jobs(user)
+    """)
+
+
+def _jobs_2_feed_columns(cur):
+    # Columns for feed-ingested jobs; older databases get them added in place.
+    job_cols = {row[1] for row in cur.execute("PRAGMA table_info(jobs)").fetchall()}
+    for col in _JOB_FEED_COLUMNS:
+        if col not in job_cols:
+            cur.execute(f"ALTER TABLE jobs ADD COLUMN {col} TEXT")
+    cur.execute("""
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_external_id
+        ON jobs(external_id)
+    """)
+
+
+def _jobs_3_saved_job_sync(cur):
+    # Delta sync: every change to a user's saved jobs gets the next value of
+    # that user's counter; deletions are kept as tombstones (deleted = 1).
+    saved_cols = {row[1] for row in cur.execute("PRAGMA table_info(saved_jobs)").fetchall()}
+    if "job_id" not in saved_cols:
+        cur.execute("ALTER TABLE saved_jobs ADD COLUMN job_id TEXT")
+    if "version" not in saved_cols:
+        cur.execute("ALTER TABLE saved_jobs ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+    if "deleted" not in saved_cols:
+        cur.execute("ALTER TABLE saved_jobs ADD COLUMN deleted INTEGER NOT NULL DEFAULT 0")
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_saved_jobs_user_version
+        ON saved_jobs(user, version)
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS saved_job_versions (
+        user TEXT PRIMARY KEY,
+        version INTEGER NOT NULL
+    )
+    """)
+
+
+def _jobs_4_job_marks(cur):
+    # --- per-user hidden/seen job sets (job keys interned to integers) ---
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS job_keys (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        key TEXT NOT NULL UNIQUE
+    )
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS job_marks (
+        user TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        key_id INTEGER NOT NULL REFERENCES job_keys(id),
+        PRIMARY KEY (user, kind, key_id)
+    ) WITHOUT ROWID
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS job_mark_versions (
+        user TEXT PRIMARY KEY,
+        version INTEGER NOT NULL
+    )
+    """)
+
+
+def _jobs_5_saved_searches(cur):
+    # --- saved searches and the jobs the percolator matched to them ---
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS saved_searches (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user TEXT NOT NULL,
+        name TEXT NOT NULL,
+        query_json TEXT NOT NULL,
+        created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_saved_searches_user
+        ON saved_searches(user)
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS saved_search_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL
+    )
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS saved_search_matches (
+        search_id INTEGER NOT NULL REFERENCES saved_searches(id) ON DELETE CASCADE,
+        job_key TEXT NOT NULL,
+        job_json TEXT NOT NULL,
+        matched_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        delivered INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (search_id, job_key)
+    )
+    """)
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_saved_search_matches_pending
+        ON saved_search_matches(delivered, search_id)
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS percolated_jobs (
+        job_key TEXT PRIMARY KEY,
+        seen_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    ) WITHOUT ROWID
+    """)
+
+
+def _jobs_6_posting_dates(cur):
+    job_cols = {row[1] for row in cur.execute("PRAGMA table_info(jobs)").fetchall()}
+    # posted_at as days since 1970-01-01, for range queries and recency order
+    if "posted_day" not in job_cols:
+        cur.execute("ALTER TABLE jobs ADD COLUMN posted_day INTEGER")
+        rows = cur.execute("SELECT id, posted_at FROM jobs WHERE posted_at IS NOT NULL").fetchall()
+        cur.executemany(
+            "UPDATE jobs SET posted_day = ?, posted_at = ? WHERE id = ?",
+            [(posting_dates.day_number(p), posting_dates.iso_date(p) or p, i) for i, p in rows]
+        )
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_jobs_posted_day
+        ON jobs(posted_day)
+    """)
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_jobs_source_seen
+        ON jobs(source, last_seen_at)
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS jobs_archive (
+        external_id TEXT PRIMARY KEY,
+        source TEXT,
+        name TEXT,
+        url TEXT,
+        company TEXT,
+        posted_at TEXT,
+        last_seen_at TEXT,
+        archived_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+
+def _jobs_7_ingest_lease(cur):
+    # One row per lease; whoever holds an unexpired row is the leader
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS leases (
+        name TEXT PRIMARY KEY,
+        holder TEXT NOT NULL,
+        acquired_at REAL NOT NULL,
+        heartbeat_at REAL NOT NULL,
+        expires_at REAL NOT NULL
+    )
+    """)
+    # Latest job list per source written by the leader, read by every worker
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS source_snapshots (
+        source TEXT PRIMARY KEY,
+        jobs_json TEXT NOT NULL,
+        job_count INTEGER NOT NULL,
+        fetched_at REAL NOT NULL,
+        holder TEXT NOT NULL
+    )
+    """)
+
+
+# Days since 1970-01-01 in SQL, the same numbering as posting_dates.day_number()
+_TODAY = "CAST(julianday('now') - 2440587.5 AS INTEGER)"
+
+
+def _jobs_8_skill_demand(cur):
+    job_cols = {row[1] for row in cur.execute("PRAGMA table_info(jobs)").fetchall()}
+    if "category" not in job_cols:
+        cur.execute("ALTER TABLE jobs ADD COLUMN category TEXT")
+    # Skill links per posting day: posted counts links added for jobs posted
+    # that day (jobs without a date count on the day they were stored),
+    # expired counts links removed that day.
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS skill_demand_daily (
+        day INTEGER NOT NULL,
+        skill_id INTEGER NOT NULL,
+        source TEXT NOT NULL,
+        category TEXT NOT NULL,
+        posted INTEGER NOT NULL DEFAULT 0,
+        expired INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, skill_id, source, category)
+    ) WITHOUT ROWID
+    """)
+    # Links currently in the store
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS skill_demand_current (
+        skill_id INTEGER NOT NULL,
+        source TEXT NOT NULL,
+        category TEXT NOT NULL,
+        active INTEGER NOT NULL,
+        PRIMARY KEY (skill_id, source, category)
+    ) WITHOUT ROWID
+    """)
+
+    # Both tables are kept up to date by triggers, so every writer
+    # (bulk upserts, add_skill_to_job, expiry, snapshot imports) maintains them.
+    cur.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_job_skills_demand_insert AFTER INSERT ON job_skills
+    BEGIN
+        INSERT INTO skill_demand_daily (day, skill_id, source, category, posted)
+        SELECT COALESCE(j.posted_day, {_TODAY}), NEW.skill_id, COALESCE(j.source, ''), COALESCE(j.category, ''), 1
+        FROM jobs j WHERE j.id = NEW.job_id
+        ON CONFLICT DO UPDATE SET posted = posted + 1;
+        INSERT INTO skill_demand_current (skill_id, source, category, active)
+        SELECT NEW.skill_id, COALESCE(j.source, ''), COALESCE(j.category, ''), 1
+        FROM jobs j WHERE j.id = NEW.job_id
+        ON CONFLICT DO UPDATE SET active = active + 1;
+    END
+    """)
+    cur.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_job_skills_demand_delete AFTER DELETE ON job_skills
+    BEGIN
+        INSERT INTO skill_demand_daily (day, skill_id, source, category, expired)
+        SELECT {_TODAY}, OLD.skill_id, COALESCE(j.source, ''), COALESCE(j.category, ''), 1
+        FROM jobs j WHERE j.id = OLD.job_id
+        ON CONFLICT DO UPDATE SET expired = expired + 1;
+        INSERT INTO skill_demand_current (skill_id, source, category, active)
+        SELECT OLD.skill_id, COALESCE(j.source, ''), COALESCE(j.category, ''), -1
+        FROM jobs j WHERE j.id = OLD.job_id
+        ON CONFLICT DO UPDATE SET active = active - 1;
+    END
+    """)
+    # A re-ingested posting can change date, source or category: move its links' counts
+    cur.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_jobs_demand_update AFTER UPDATE OF posted_day, source, category ON jobs
+    WHEN OLD.posted_day IS NOT NEW.posted_day OR OLD.source IS NOT NEW.source OR OLD.category IS NOT NEW.category
+    BEGIN
+        INSERT INTO skill_demand_daily (day, skill_id, source, category, posted)
+        SELECT COALESCE(OLD.posted_day, {_TODAY}), skill_id, COALESCE(OLD.source, ''), COALESCE(OLD.category, ''), -1
+        FROM job_skills WHERE job_id = NEW.id
+        ON CONFLICT DO UPDATE SET posted = posted + excluded.posted;
+        INSERT INTO skill_demand_daily (day, skill_id, source, category, posted)
+        SELECT COALESCE(NEW.posted_day, {_TODAY}), skill_id, COALESCE(NEW.source, ''), COALESCE(NEW.category, ''), 1
+        FROM job_skills WHERE job_id = NEW.id
+        ON CONFLICT DO UPDATE SET posted = posted + excluded.posted;
+        INSERT INTO skill_demand_current (skill_id, source, category, active)
+        SELECT skill_id, COALESCE(OLD.source, ''), COALESCE(OLD.category, ''), -1
+        FROM job_skills WHERE job_id = NEW.id
+        ON CONFLICT DO UPDATE SET active = active + excluded.active;
+        INSERT INTO skill_demand_current (skill_id, source, category, active)
+        SELECT skill_id, COALESCE(NEW.source, ''), COALESCE(NEW.category, ''), 1
+        FROM job_skills WHERE job_id = NEW.id
+        ON CONFLICT DO UPDATE SET active = active + excluded.active;
+    END
+    """)
+
+    # Backfill from the links already stored (earlier expiries are not recoverable)
+    cur.execute("DELETE FROM skill_demand_daily")
+    cur.execute("DELETE FROM skill_demand_current")
+    cur.execute(f"""
+    INSERT INTO skill_demand_daily (day, skill_id, source, category, posted)
+    SELECT COALESCE(j.posted_day, {_TODAY}), js.skill_id, COALESCE(j.source, ''), COALESCE(j.category, ''), COUNT(*)
+    FROM job_skills js JOIN jobs j ON j.id = js.job_id
+    GROUP BY 1, 2, 3, 4
+    """)
+    cur.execute("""
+    INSERT INTO skill_demand_current (skill_id, source, category, active)
+    SELECT js.skill_id, COALESCE(j.source, ''), COALESCE(j.category, ''), COUNT(*)
+    FROM job_skills js JOIN jobs j ON j.id = js.job_id
+    GROUP BY 1, 2, 3
+    """)
+
+
+def _jobs_9_profile_skills(cur):
+    # Skills found in the profile text, as a profile_skills bitset; vectors
+    # for existing profiles are built on first read (skill_vocab IS NULL).
+    profile_cols = {row[1] for row in cur.execute("PRAGMA table_info(user_profile)").fetchall()}
+    if "version" not in profile_cols:
+        cur.execute("ALTER TABLE user_profile ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+    if "skill_vector" not in profile_cols:
+        cur.execute("ALTER TABLE user_profile ADD COLUMN skill_vector BLOB")
+    if "skill_vocab" not in profile_cols:
+        cur.execute("ALTER TABLE user_profile ADD COLUMN skill_vocab TEXT")
+
+
+def _jobs_10_percolated_retention(cur):
+    # percolated_jobs rows are refreshed whenever a key is seen again and
+    # pruned with the jobs retention window
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_percolated_jobs_seen
+        ON percolated_jobs(seen_at)
+    """)
+
+
+def _jobs_11_job_details(cur):
+    # Extracted KU detail page text, so snapshots can carry it without a fresh scrape
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS job_details (
+        url TEXT PRIMARY KEY,
+        text TEXT NOT NULL,
+        fetched_at REAL NOT NULL
+    ) WITHOUT ROWID
+    """)
+
+
+def _jobs_12_skill_case(cur):
+    # Skill names are stored lowercased (database_helpers.skill_key); merge
+    # rows add_skill_to_job stored in other cases into the lowercase one.
+    groups = {}
+    for skill_id, name in cur.execute("SELECT id, name FROM skills ORDER BY id").fetchall():
+        groups.setdefault(name.strip().lower(), []).append((skill_id, name))
+    for key, rows in groups.items():
+        if len(rows) == 1 and rows[0][1] == key:
+            continue
+        keep = next((skill_id for skill_id, name in rows if name == key), rows[0][0])
+        for old, _ in rows:
+            if old != keep:
+                _merge_skill(cur, old, keep)
+        cur.execute("UPDATE skills SET name = ? WHERE id = ?", (key, keep))
+    # Current counts follow from the links, so rebuild them
+    cur.execute("DELETE FROM skill_demand_current")
+    cur.execute("""
+    INSERT INTO skill_demand_current (skill_id, source, category, active)
+    SELECT js.skill_id, COALESCE(j.source, ''), COALESCE(j.category, ''), COUNT(*)
+    FROM job_skills js JOIN jobs j ON j.id = js.job_id
+    GROUP BY 1, 2, 3
+    """)
+
+
+def _merge_skill(cur, old, keep):
+    # Daily history moves to the kept id...
+    cur.execute("""
+    INSERT INTO skill_demand_daily (day, skill_id, source, category, posted, expired)
+    SELECT day, ?, source, category, posted, expired FROM skill_demand_daily WHERE skill_id = ?
+    ON CONFLICT DO UPDATE SET posted = posted + excluded.posted, expired = expired + excluded.expired
+    """, (keep, old))
+    # ...less the links a job had under both ids, which were counted twice
+    cur.execute(f"""
+    INSERT INTO skill_demand_daily (day, skill_id, source, category, posted)
+    SELECT COALESCE(j.posted_day, {_TODAY}), ?, COALESCE(j.source, ''), COALESCE(j.category, ''), -COUNT(*)
+    FROM job_skills js JOIN jobs j ON j.id = js.job_id
+    WHERE js.skill_id = ? AND js.job_id IN (SELECT job_id FROM job_skills WHERE skill_id = ?)
+    GROUP BY 1, 3, 4
+    ON CONFLICT DO UPDATE SET posted = posted + excluded.posted
+    """, (keep, old, keep))
+    cur.execute(
+        "DELETE FROM job_skills WHERE skill_id = ? AND job_id IN (SELECT job_id FROM job_skills WHERE skill_id = ?)",
+        (old, keep)
+    )
+    cur.execute("UPDATE job_skills SET skill_id = ? WHERE skill_id = ?", (keep, old))
+    # drops what the delete trigger just recorded under the old id too
+    cur.execute("DELETE FROM skill_demand_daily WHERE skill_id = ?", (old,))
+    cur.execute("DELETE FROM skills WHERE id = ?", (old,))
+
+
+def _jobs_13_skill_demand_totals(cur):
+    # All-time posted/expired per (skill, source, category) next to the
+    # active count, so all-time demand reads one row per key instead of
+    # summing every day of skill_demand_daily.
+    current_cols = {row[1] for row in cur.execute("PRAGMA table_info(skill_demand_current)").fetchall()}
+    for col in ("posted", "expired"):
+        if col not in current_cols:
+            cur.execute(f"ALTER TABLE skill_demand_current ADD COLUMN {col} INTEGER NOT NULL DEFAULT 0")
+    for trigger in ("trg_job_skills_demand_insert", "trg_job_skills_demand_delete", "trg_jobs_demand_update"):
+        cur.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    cur.execute(f"""
+    CREATE TRIGGER trg_job_skills_demand_insert AFTER INSERT ON job_skills
+    BEGIN
+        INSERT INTO skill_demand_daily (day, skill_id, source, category, posted)
+        SELECT COALESCE(j.posted_day, {_TODAY}), NEW.skill_id, COALESCE(j.source, ''), COALESCE(j.category, ''), 1
+        FROM jobs j WHERE j.id = NEW.job_id
+        ON CONFLICT DO UPDATE SET posted = posted + 1;
+        INSERT INTO skill_demand_current (skill_id, source, category, active, posted)
+        SELECT NEW.skill_id, COALESCE(j.source, ''), COALESCE(j.category, ''), 1, 1
+        FROM jobs j WHERE j.id = NEW.job_id
+        ON CONFLICT DO UPDATE SET active = active + 1, posted = posted + 1;
+    END
+    """)
+    cur.execute(f"""
+    CREATE TRIGGER trg_job_skills_demand_delete AFTER DELETE ON job_skills
+    BEGIN
+        INSERT INTO skill_demand_daily (day, skill_id, source, category, expired)
+        SELECT {_TODAY}, OLD.skill_id, COALESCE(j.source, ''), COALESCE(j.category, ''), 1
+        FROM jobs j WHERE j.id = OLD.job_id
+        ON CONFLICT DO UPDATE SET expired = expired + 1;
+        INSERT INTO skill_demand_current (skill_id, source, category, active, expired)
+        SELECT OLD.skill_id, COALESCE(j.source, ''), COALESCE(j.category, ''), -1, 1
+        FROM jobs j WHERE j.id = OLD.job_id
+        ON CONFLICT DO UPDATE SET active = active - 1, expired = expired + 1;
+    END
+    """)
+    cur.execute(f"""
+    CREATE TRIGGER trg_jobs_demand_update AFTER UPDATE OF posted_day, source, category ON jobs
+    WHEN OLD.posted_day IS NOT NEW.posted_day OR OLD.source IS NOT NEW.source OR OLD.category IS NOT NEW.category
+    BEGIN
+        INSERT INTO skill_demand_daily (day, skill_id, source, category, posted)
+        SELECT COALESCE(OLD.posted_day, {_TODAY}), skill_id, COALESCE(OLD.source, ''), COALESCE(OLD.category, ''), -1
+        FROM job_skills WHERE job_id = NEW.id
+        ON CONFLICT DO UPDATE SET posted = posted + excluded.posted;
+        INSERT INTO skill_demand_daily (day, skill_id, source, category, posted)
+        SELECT COALESCE(NEW.posted_day, {_TODAY}), skill_id, COALESCE(NEW.source, ''), COALESCE(NEW.category, ''), 1
+        FROM job_skills WHERE job_id = NEW.id
+        ON CONFLICT DO UPDATE SET posted = posted + excluded.posted;
+        INSERT INTO skill_demand_current (skill_id, source, category, active, posted)
+        SELECT skill_id, COALESCE(OLD.source, ''), COALESCE(OLD.category, ''), -1, -1
+        FROM job_skills WHERE job_id = NEW.id
+        ON CONFLICT DO UPDATE SET active = active + excluded.active, posted = posted + excluded.posted;
+        INSERT INTO skill_demand_current (skill_id, source, category, active, posted)
+        SELECT skill_id, COALESCE(NEW.source, ''), COALESCE(NEW.category, ''), 1, 1
+        FROM job_skills WHERE job_id = NEW.id
+        ON CONFLICT DO UPDATE SET active = active + excluded.active, posted = posted + excluded.posted;
+    END
+    """)
+    # Backfill the totals from the daily history
+    cur.execute("""
+    INSERT INTO skill_demand_current (skill_id, source, category, active, posted, expired)
+    SELECT skill_id, source, category, 0, SUM(posted), SUM(expired)
+    FROM skill_demand_daily GROUP BY 1, 2, 3
+    ON CONFLICT DO UPDATE SET posted = excluded.posted, expired = excluded.expired
+    """)
+
+
+def _jobs_14_unique_skill_names(cur):
+    # skills.name was never UNIQUE, so every INSERT OR IGNORE of a known skill
+    # added another row; merge those and let the index keep names unique.
+    groups = {}
+    for skill_id, name in cur.execute("SELECT id, name FROM skills ORDER BY id").fetchall():
+        groups.setdefault(name, []).append(skill_id)
+    for ids in groups.values():
+        for old in ids[1:]:
+            _merge_skill(cur, old, ids[0])
+    cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_skills_name ON skills(name)")
+    # Merged ids leave totals behind, so rebuild them from the history and links
+    cur.execute("DELETE FROM skill_demand_current")
+    cur.execute("""
+    INSERT INTO skill_demand_current (skill_id, source, category, active, posted, expired)
+    SELECT skill_id, source, category, 0, SUM(posted), SUM(expired)
+    FROM skill_demand_daily GROUP BY 1, 2, 3
+    """)
+    cur.execute("""
+    INSERT INTO skill_demand_current (skill_id, source, category, active)
+    SELECT js.skill_id, COALESCE(j.source, ''), COALESCE(j.category, ''), COUNT(*)
+    FROM job_skills js JOIN jobs j ON j.id = js.job_id
+    GROUP BY 1, 2, 3
+    ON CONFLICT DO UPDATE SET active = excluded.active
+    """)
+
+
+JOBS_DB = {
+    "name": "jobs.db",
+    "prepare": _enable_incremental_vacuum,
+    "steps": [
+        (1, _jobs_1_base),
+        (2, _jobs_2_feed_columns),
+        (3, _jobs_3_saved_job_sync),
+        (4, _jobs_4_job_marks),
+        (5, _jobs_5_saved_searches),
+        (6, _jobs_6_posting_dates),
+        (7, _jobs_7_ingest_lease),
+        (8, _jobs_8_skill_demand),
+        (9, _jobs_9_profile_skills),
+        (10, _jobs_10_percolated_retention),
+        (11, _jobs_11_job_details),
+        (12, _jobs_12_skill_case),
+        (13, _jobs_13_skill_demand_totals),
+        (14, _jobs_14_unique_skill_names),
+    ],
+}
+
+
+# ---------------- users.db ----------------
+
+def _users_1_base(cur):
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        password_hash TEXT NOT NULL
+    )
+    """)
+
+
+USERS_DB = {
+    "name": "users.db",
+    "prepare": None,
+    "steps": [
+        (1, _users_1_base),
+    ],
+}
+
+
+# ---------------- runner ----------------
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+# How long a booting worker keeps retrying while another one holds the database
+LOCK_TIMEOUT = 120.0
+
+
+def _is_locked(e):
+    return "locked" in str(e) or "busy" in str(e)
+
+
+def migrate(conn, schema, timeout=LOCK_TIMEOUT):
+    """Apply the steps of schema newer than conn's version; returns how many ran.
+
+    prepare runs outside the IMMEDIATE transaction (VACUUM cannot run in
+    one), so workers booting together race for it and can find the file
+    locked for longer than the busy timeout. Everything here re-checks
+    before acting, so on "database is locked" the whole pass is retried
+    until the worker that won is done and nothing is left to do.
+    """
+    deadline = time.monotonic() + timeout
+    delay = 0.05
+    while True:
+        try:
+            return _migrate(conn, schema)
+        except sqlite3.OperationalError as e:
+            if not _is_locked(e) or time.monotonic() + delay > deadline:
+                raise
+            if conn.in_transaction:
+                conn.rollback()
+            time.sleep(delay)
+            delay = min(delay * 2, 1.0)
+
+
+def _migrate(conn, schema):
+    target = schema["steps"][-1][0]
+    if schema_version(conn) >= target:
+        return 0
+
+    if conn.in_transaction:
+        conn.commit()
+    if schema["prepare"] is not None:
+        schema["prepare"](conn)
+    cur = conn.cursor()
+    # IMMEDIATE takes the write lock up front, so workers booting together
+    # migrate one at a time and the rest find the work already done.
+    cur.execute("BEGIN IMMEDIATE")
+    try:
+        current = schema_version(conn)
+        applied = 0
+        for version, step in schema["steps"]:
+            if version > current:
+                step(cur)
+                applied += 1
+        cur.execute(f"PRAGMA user_version = {int(target)}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return applied
@@ -0,0 +1,201 @@
+"""
+Saved searches matched against new postings (a percolator).
+
+Instead of re-running every saved search, the searches themselves are
+indexed: each one is filed under the terms that can make it match (every
+skill, since any skill is enough, or one keyword when it has no skills,
+since all keywords are required). A new job looks up the postings for its
+own terms, so it only ever touches searches sharing a term with it, and
+each candidate is then checked in full. Searches with filters only are
+checked against every job.
+
+Only jobs never percolated before are matched, so the cost follows the
+number of new postings, not the number of searches.
+"""
+from __future__ import annotations
+
+import re
+from collections import defaultdict
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Set
+
+import database_helpers as dbh
+
+FILTER_FIELDS = ("source", "company", "location")
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+
+# Spellings treated as the same term (mirrors the KU skill variants)
+TERM_ALIASES = {
+    "py": "python",
+    "nodejs": "node",
+    "node.js": "node",
+    "js": "javascript",
+    "ts": "typescript",
+}
+
+
+def normalize_term(term) -> str:
+    term = str(term).strip().lower().rstrip(".")
+    return TERM_ALIASES.get(term, term)
+
+
+def _tokens(text: str) -> List[str]:
+    return [normalize_term(t) for t in _TOKEN_RE.findall(text.lower())]
+
+
+def parse_query(data: dict) -> dict:
+    """Normalize a saved-search body: {"skills", "keywords", "filters"}."""
+    def terms(value):
+        if isinstance(value, str):
+            value = value.split(",")
+        return sorted({normalize_term(v) for v in value or [] if str(v).strip()})
+
+    filters = data.get("filters") or {}
+    return {
+        "skills": terms(data.get("skills")),
+        "keywords": terms(data.get("keywords")),
+        "filters": {
+            f: str(filters[f]).strip().lower()
+            for f in FILTER_FIELDS
+            if isinstance(filters, dict) and str(filters.get(f) or "").strip()
+        },
+    }
+
+
+class JobTerms:
+    """The searchable view of one job, computed once per job."""
+
+    __slots__ = ("tokens", "phrase_text", "fields")
+
+    def __init__(self, job: dict):
+        text = " ".join(
+            str(job.get(k) or "") for k in ("title", "name", "short_description", "description")
+        ).lower()
+        skills = [normalize_term(s) for s in job.get("skills") or []]
+        words = _tokens(" ".join([text, *skills]))
+        self.tokens: Set[str] = set(words) | set(skills)
+        self.phrase_text = " ".join(words)
+        self.fields = {f: str(job.get(f) or "").lower() for f in FILTER_FIELDS}
+
+    def has(self, term: str) -> bool:
+        if term in self.tokens:
+            return True
+        # multi-word terms ("power bi") are matched as phrases
+        return " " in term and f" {term} " in f" {self.phrase_text} "
+
+
+class SavedSearch:
+    __slots__ = ("id", "user", "name", "skills", "keywords", "filters")
+
+    def __init__(self, id: int, user: str, name: str, skills=(), keywords=(), filters=None):
+        self.id = id
+        self.user = user
+        self.name = name
+        self.skills = tuple(skills)
+        self.keywords = tuple(keywords)
+        self.filters = dict(filters or {})
+
+    def index_terms(self) -> List[str]:
+        if self.skills:
+            return list(self.skills)
+        if self.keywords:
+            return [self.keywords[0]]
+        return []
+
+    def matches(self, terms: JobTerms) -> bool:
+        for field, wanted in self.filters.items():
+            value = terms.fields.get(field, "")
+            if (wanted not in value) if field == "location" else (value != wanted):
+                return False
+        if self.skills and not any(terms.has(s) for s in self.skills):
+            return False
+        return all(terms.has(k) for k in self.keywords)
+
+
+def _posting_key(term: str) -> str:
+    # phrases are filed under their first word, which every matching job has as a token
+    return term.split(" ", 1)[0]
+
+
+class Percolator:
+    """Reverse index from terms to the saved searches that may match them."""
+
+    def __init__(self, searches: Iterable[SavedSearch] = ()):
+        self.searches: Dict[int, SavedSearch] = {}
+        self.postings: Dict[str, Set[int]] = defaultdict(set)
+        self.match_all: Set[int] = set()
+        for search in searches:
+            self.add(search)
+
+    def __len__(self) -> int:
+        return len(self.searches)
+
+    def add(self, search: SavedSearch) -> None:
+        self.searches[search.id] = search
+        terms = search.index_terms()
+        if not terms:
+            self.match_all.add(search.id)
+        for term in terms:
+            self.postings[_posting_key(term)].add(search.id)
+
+    def candidates(self, terms: JobTerms) -> Set[int]:
+        found = set(self.match_all)
+        for token in terms.tokens:
+            ids = self.postings.get(token)
+            if ids:
+                found |= ids
+        return found
+
+    def match(self, job: dict) -> List[SavedSearch]:
+        terms = JobTerms(job)
+        return [
+            self.searches[sid]
+            for sid in sorted(self.candidates(terms))
+            if self.searches[sid].matches(terms)
+        ]
+
+
+_index: Optional[Percolator] = None
+_index_version = -1
+_lock = Lock()
+
+
+def get_index(conn) -> Percolator:
+    """Process-wide index, rebuilt when any saved search was added or removed."""
+    global _index, _index_version
+    version = dbh.get_saved_search_version(conn)
+    if _index is None or version != _index_version:
+        with _lock:
+            searches = [
+                SavedSearch(s["id"], s["user"], s["name"], s["skills"], s["keywords"], s["filters"])
+                for s in dbh.list_saved_searches(conn)
+            ]
+            _index, _index_version = Percolator(searches), version
+    return _index
+
+
+def percolate(conn, jobs: Iterable[dict]) -> int:
+    """Match jobs not seen before against every saved search; returns the number of matches stored.
+
+    Keys are claimed even when there are no saved searches, so a search
+    created later only ever sees postings that are new after it exists.
+    """
+    jobs = [j for j in jobs if j.get("id")]
+    if not jobs:
+        return 0
+    new_keys = set(dbh.claim_new_job_keys(conn, [str(j["id"]) for j in jobs]))
+    index = get_index(conn)
+    if not new_keys or not len(index):
+        return 0
+    matches = []
+    for job in jobs:
+        key = str(job["id"])
+        if key not in new_keys:
+            continue
+        new_keys.discard(key)
+        for search in index.match(job):
+            matches.append((search.id, key, job))
+    if matches:
+        dbh.add_saved_search_matches(conn, matches)
+    return len(matches)
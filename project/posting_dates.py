@@ -0,0 +1,90 @@
+"""
+Posting date parsing.
+
+Sources report dates in different shapes (KU "11/15/2025", RemoteOK ISO
+timestamps or epoch seconds). Everything is turned into a calendar date so
+posted_at is always "YYYY-MM-DD" (sortable as text) and the jobs table can
+keep an integer day number for range queries.
+"""
+from __future__ import annotations
+
+import re
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+_EPOCH = date(1970, 1, 1)
+
+_FORMATS = (
+    "%m/%d/%Y",
+    "%m/%d/%y",
+    "%Y/%m/%d",
+    "%B %d, %Y",
+    "%b %d, %Y",
+    "%d %B %Y",
+    "%d %b %Y",
+)
+
+_ISO_PREFIX = re.compile(r"^\d{4}-\d{2}-\d{2}")
+
+# Epoch values at or above this are milliseconds (13 digits)
+_EPOCH_MS = 10 ** 12
+
+
+def _from_epoch(value) -> Optional[date]:
+    try:
+        if value >= _EPOCH_MS:
+            value /= 1000
+        return datetime.fromtimestamp(value, tz=timezone.utc).date()
+    except (ValueError, OverflowError, OSError):
+        return None  # NaN, or outside the platform's time range
+
+
+def parse_posting_date(value) -> Optional[date]:
+    """Best-effort calendar date for a posting; None when it cannot be read."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value.astimezone(timezone.utc).date() if value.tzinfo else value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, (int, float)):
+        return _from_epoch(value)
+
+    text = str(value).strip()
+    if text.isdigit() and len(text) >= 9:
+        return _from_epoch(int(text))
+    if _ISO_PREFIX.match(text):
+        try:
+            dt = datetime.fromisoformat(text.replace("Z", "+00:00"))
+        except ValueError:
+            try:
+                return date.fromisoformat(text[:10])
+            except ValueError:
+                return None
+        return dt.astimezone(timezone.utc).date() if dt.tzinfo else dt.date()
+    for fmt in _FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def iso_date(value) -> Optional[str]:
+    d = parse_posting_date(value)
+    return d.isoformat() if d else None
+
+
+def day_number(value) -> Optional[int]:
+    """Days since 1970-01-01, the integer stored in jobs.posted_day."""
+    d = parse_posting_date(value)
+    return (d - _EPOCH).days if d else None
+
+
+def day_to_iso(day: int) -> str:
+    """Inverse of day_number()."""
+    return (_EPOCH + timedelta(days=day)).isoformat()
+
+
+def today_day_number() -> int:
+    return (datetime.now(timezone.utc).date() - _EPOCH).days
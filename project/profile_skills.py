@@ -0,0 +1,78 @@
+"""
+Profile skill vectors.
+
+A profile's info and soft_skills text is scanned once, when the profile
+is saved, with the KU scraper's skill vocabulary (skill_tokens). The skills found are
+stored as a bitset (one bit per vocabulary skill) next to the profile's
+version, so matching a job at search time is a few dict lookups and an
+AND, not a text scan. The vocabulary id is stored with the bits; a
+vector built from another vocabulary is recomputed on read (and stored
+on the next save).
+"""
+from __future__ import annotations
+
+import hashlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import skill_tokens
+
+_vocab: Optional[Tuple[Tuple[str, ...], Dict[str, int], str]] = None
+
+
+def vocabulary() -> Tuple[Tuple[str, ...], Dict[str, int], str]:
+    """(skill names, name -> bit, vocabulary id) from skill_tokens.SKILL_TOKENS."""
+    global _vocab
+    if _vocab is None:
+        names: List[str] = []
+        for token in skill_tokens.SKILL_TOKENS:
+            name = _normalize(token)
+            if name and name not in names:
+                names.append(name)
+        bits = {name: i for i, name in enumerate(names)}
+        # other spellings of the same skill (extract_skills_from_text drops ".js")
+        for variant, name in skill_tokens.SKILL_NORM_MAP.items():
+            if name in bits:
+                bits.setdefault(variant.strip(), bits[name])
+        for name, i in list(bits.items()):
+            bits.setdefault(name.replace(".js", ""), i)
+        vocab_id = hashlib.sha1("\n".join(names).encode()).hexdigest()[:12]
+        _vocab = (tuple(names), bits, vocab_id)
+    return _vocab
+
+
+def _normalize(skill) -> str:
+    s = str(skill).strip().lower()
+    return skill_tokens.SKILL_NORM_MAP.get(s, s)
+
+
+def extract(*texts: str) -> List[str]:
+    """Vocabulary skills mentioned in texts, in vocabulary order."""
+    return skills_of(mask_of(skill_tokens.extract_skills_from_text("\n".join(t or "" for t in texts))))
+
+
+def mask_of(skills: Iterable[str]) -> int:
+    bits = vocabulary()[1]
+    mask = 0
+    for skill in skills:
+        bit = bits.get(str(skill).strip().lower())
+        if bit is not None:
+            mask |= 1 << bit
+    return mask
+
+
+def encode(mask: int) -> bytes:
+    return mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+
+
+def decode(blob: Optional[bytes]) -> int:
+    return int.from_bytes(blob or b"", "little")
+
+
+def skills_of(mask: int) -> List[str]:
+    names = vocabulary()[0]
+    return [name for i, name in enumerate(names) if mask >> i & 1]
+
+
+def score(mask: int, job: dict) -> int:
+    """Number of the profile's skills this job asks for."""
+    return (mask & mask_of(job.get("skills") or [])).bit_count() if mask else 0
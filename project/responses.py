@@ -0,0 +1,123 @@
+"""
+Response encoding helpers: fast JSON, compression and columnar job payloads.
+"""
+from __future__ import annotations
+
+import gzip
+from typing import Iterable, List
+
+from flask import Response, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional speedup
+    brotli = None
+
+
+# Only compress bodies big enough for it to pay off
+COMPRESS_MIN_BYTES = 1024
+COMPRESSIBLE_MIMETYPES = {"application/json", "application/x-ndjson", "text/html"}
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 5
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that uses orjson when it is installed.
+
+    Falls back to the stdlib encoder when orjson is missing or when the
+    caller asks for pretty-printing (debug mode).
+    """
+
+    def dumps(self, obj, **kwargs) -> str:
+        if orjson is None or kwargs.get("indent"):
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs) -> Response:
+        if orjson is None or self._app.debug or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def _pick_encoding() -> str | None:
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return None
+
+
+def compress_response(response: Response) -> Response:
+    """after_request hook: gzip/brotli-encode large JSON responses."""
+    if (
+        response.status_code < 200
+        or response.status_code >= 300
+        or response.direct_passthrough
+        or response.is_streamed
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_BYTES:
+        return response
+
+    encoding = _pick_encoding()
+    if encoding is None:
+        return response
+
+    if encoding == "br":
+        compressed = brotli.compress(data, quality=BROTLI_QUALITY)
+    else:
+        compressed = gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+    response.set_data(compressed)
+    response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+# ---------------- columnar job payloads ----------------
+
+def wants_columnar() -> bool:
+    """True when the client opted into the columnar job format."""
+    fmt = request.values.get("format") or ""
+    return fmt.lower() == "columnar"
+
+
+def to_columnar(jobs: Iterable[dict]) -> dict:
+    """Pack a list of job dicts as field names once plus one value array per job.
+
+    Fields are the union of keys in first-seen order; missing values are None.
+    """
+    jobs = list(jobs)
+    fields: List[str] = []
+    seen = set()
+    for job in jobs:
+        for key in job:
+            if key not in seen:
+                seen.add(key)
+                fields.append(key)
+    rows = [[job.get(f) for f in fields] for job in jobs]
+    return {"fields": fields, "rows": rows}
+
+
+def from_columnar(payload: dict) -> List[dict]:
+    """Inverse of to_columnar (mainly for tests and benchmarks)."""
+    fields = payload.get("fields") or []
+    return [dict(zip(fields, row)) for row in payload.get("rows") or []]
@@ -1,2 +1,4 @@
 #!/bin/bash
-gunicorn -b 0.0.0.0:5000 app:app
+# Workers elect one ingestion leader through jobs.db; the rest serve its snapshots
+export JOBS_INGEST_INTERVAL="${JOBS_INGEST_INTERVAL:-300}"
+gunicorn -b 0.0.0.0:5000 "app:create_app()"
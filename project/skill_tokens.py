@@ -0,0 +1,74 @@
+"""
+Skill vocabulary shared by the KU scraper and profile skill vectors.
+
+Kept free of the scraper's HTTP/HTML dependencies so reading a profile's
+skills does not import them.
+"""
+from __future__ import annotations
+
+import re
+from typing import List, Optional, Tuple
+
+
+# Curated skill tokens. Keep lowercase; match as whole words where sensible.
+SKILL_TOKENS = [
+    # languages
+    "python", "java", "c++", "c#", "javascript", "typescript", "go", "rust", "ruby", "php", "scala", "r ", " r",
+    # web/fe
+    "html", "css", "react", "angular", "vue", "node", "node.js", "nodejs", "next.js", "nextjs",
+    # data/ai
+    "sql", "nosql", "postgres", "mysql", "sqlite", "oracle", "mongodb", "pandas", "numpy", "scikit-learn",
+    "tensorflow", "pytorch", "spark", "hadoop", "tableau", "power bi", "excel",
+    # devops/cloud
+    "aws", "azure", "gcp", "docker", "kubernetes", "linux", "bash", "git", "ci/cd", "jenkins", "terraform",
+    # backend/web
+    "flask", "django", "fastapi", "graphql", "rest ", " rest", "api",
+    # misc
+    "matlab", "sas", "snowflake",
+]
+
+# normalize variants
+SKILL_NORM_MAP = {
+    "node": "node.js",
+    "nodejs": "node.js",
+    "nextjs": "next.js",
+    "rest": "rest",
+    " r": "r",
+    "r ": "r",
+}
+
+
+def _build_skill_matchers() -> List[Tuple[str, Optional[re.Pattern]]]:
+    # coarse matching: word boundary if simple token; otherwise substring
+    matchers = []
+    for t in SKILL_TOKENS:
+        tt = t.strip()
+        if not tt:
+            continue
+        if any(ch in tt for ch in ['+', '#', '/', '.', ' ']):
+            matchers.append((tt, None))
+        else:
+            matchers.append((tt, re.compile(rf"\b{re.escape(tt)}\b")))
+    return matchers
+
+
+_SKILL_MATCHERS = _build_skill_matchers()
+
+
+def extract_skills_from_text(text_raw: str) -> List[str]:
+    """Match SKILL_TOKENS against already-extracted detail text."""
+    text = text_raw.lower()
+    found: List[str] = []
+    for tt, pattern in _SKILL_MATCHERS:
+        if pattern is None:
+            if tt in text:
+                found.append(tt.replace('.js', ''))
+        elif pattern.search(text):
+            found.append(tt)
+
+    out = []
+    for f in found:
+        key = SKILL_NORM_MAP.get(f, f)
+        if key not in out:
+            out.append(key)
+    return out
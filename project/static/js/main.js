@@ -1,6 +1,8 @@
 // --- Persistent stores in localStorage ---
 const LS_SAVED = "savedJobs";       // array of job objects
-const LS_HIDDEN = "hiddenJobIds";   // array of string ids
+const LS_HIDDEN = "hiddenJobIds";   // legacy local hidden ids, moved to the server on load
+const LS_SYNC = "savedSyncToken";   // server version of savedJobs last synced
+const LS_PENDING = "savedPending";  // {save: {id: job}, unsave: [ids]} not yet sent
 
 const $ = (sel) => document.querySelector(sel);
 const resultsEl = $("#results");
@@ -9,6 +11,7 @@ const alertEl = $("#alert");
 const savedCountEl = $("#savedCount");
 
 let currentJobs = []; // last search results (array of jobs)
+let lastSkills = "";  // skills of the last search, re-run when the hidden filter changes
 
 // -----------------------------------------
 // Helpers
@@ -19,6 +22,18 @@ function readLS(key, fallback) {
 }
 function writeLS(key, value) { localStorage.setItem(key, JSON.stringify(value)); }
 
+// Rebuild job objects from a columnar payload ({fields: [...], rows: [[...]]})
+function fromColumnar(data) {
+  const fields = data.fields || [];
+  return (data.rows || []).map(row => {
+    const job = {};
+    for (let i = 0; i < fields.length; i++) {
+      if (row[i] !== null && row[i] !== undefined) job[fields[i]] = row[i];
+    }
+    return job;
+  });
+}
+
 // Fallback title resolver — UNIVERSAL
 function getJobTitle(job) {
   return (
@@ -40,10 +55,101 @@ function jobId(job) {
 }
 
 function getSaved() { return readLS(LS_SAVED, []); }
-function getHidden() { return new Set(readLS(LS_HIDDEN, [])); }
 
 function setSaved(arr) { writeLS(LS_SAVED, arr); updateSavedCount(); }
-function setHidden(setObj) { writeLS(LS_HIDDEN, Array.from(setObj)); }
+
+// Hidden/seen sets live on the server and are applied by /get_jobs
+async function postJobMarks(body) {
+  const res = await fetch("/api/job_marks", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify(body),
+  });
+  if (!res.ok) throw new Error(`Updating hidden jobs failed (${res.status})`);
+  return res.json();
+}
+
+// -----------------------------------------
+// Saved-job sync: local changes are queued and sent as one delta
+// -----------------------------------------
+let syncTimer = null;
+
+function getPending() {
+  const p = readLS(LS_PENDING, {});
+  return { save: p.save || {}, unsave: p.unsave || [] };
+}
+
+function queueSavedChange(id, job) {
+  const pending = getPending();
+  if (job) {
+    pending.save[id] = { ...job, id };
+    pending.unsave = pending.unsave.filter(x => x !== id);
+  } else {
+    delete pending.save[id];
+    if (!pending.unsave.includes(id)) pending.unsave.push(id);
+  }
+  writeLS(LS_PENDING, pending);
+  clearTimeout(syncTimer);
+  syncTimer = setTimeout(syncSaved, 400);
+}
+
+async function postSync(body) {
+  const res = await fetch("/saved_jobs/sync", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify(body),
+  });
+  if (!res.ok) throw new Error(`Sync failed (${res.status})`);
+  return res.json();
+}
+
+async function syncSaved() {
+  const pending = getPending();
+  writeLS(LS_PENDING, {});
+  try {
+    let data = await postSync({
+      sync_token: readLS(LS_SYNC, null),
+      save: Object.values(pending.save),
+      unsave: pending.unsave,
+    });
+    // Large lists come in pages ordered oldest change first; the token arrives with the last one
+    const full = data.full;
+    const pages = [data];
+    while (data.cursor) {
+      data = await postSync({ cursor: data.cursor });
+      pages.push(data);
+    }
+    // Replay the pages in order so a job changed between pages ends in its latest state
+    const latest = new Map();
+    const changed = new Set();
+    for (const page of pages) {
+      for (const job of page.saved) {
+        latest.delete(jobId(job));
+        latest.set(jobId(job), job);
+        changed.add(jobId(job));
+      }
+      for (const id of page.removed) {
+        latest.delete(id);
+        changed.add(id);
+      }
+    }
+
+    let saved = full ? [] : getSaved();
+    saved = saved.filter(j => !changed.has(jobId(j)));
+    setSaved([...[...latest.values()].reverse(), ...saved]);
+    writeLS(LS_SYNC, data.sync_token);
+    renderSavedList();
+    renderJobs(currentJobs);
+  } catch (err) {
+    // Put the unsent changes back (newer local edits win) and retry on the next change
+    const now = getPending();
+    writeLS(LS_PENDING, {
+      save: { ...pending.save, ...now.save },
+      unsave: [...new Set([...pending.unsave.filter(id => !now.save[id]), ...now.unsave])],
+    });
+    console.warn(err);
+  }
+}
 
 function updateSavedCount() {
   savedCountEl.textContent = getSaved().length;
@@ -65,19 +171,14 @@ function setLoading(on) {
 // Rendering Jobs
 // -----------------------------------------
 function renderJobs(jobs) {
-  const hidden = getHidden();
-  const hideEnabled = $("#toggleHidden").checked;
-
   resultsEl.innerHTML = "";
 
-  const visible = jobs.filter(j => (hideEnabled ? !hidden.has(jobId(j)) : true));
-
-  if (visible.length === 0) {
+  if (jobs.length === 0) {
     resultsEl.innerHTML = `<div class="text-muted text-center py-5">No jobs to display.</div>`;
     return;
   }
 
-  for (const job of visible) {
+  for (const job of jobs) {
     const id = jobId(job);
     const title = getJobTitle(job);
     const saved = getSaved().some(j => jobId(j) === id);
@@ -131,10 +232,11 @@ function renderJobs(jobs) {
   resultsEl.querySelectorAll(".btn-hide").forEach(btn => {
     btn.addEventListener("click", () => {
       const id = btn.dataset.id;
-      const hidden = getHidden();
-      hidden.add(id);
-      setHidden(hidden);
+      if ($("#toggleHidden").checked) {
+        currentJobs = currentJobs.filter(j => jobId(j) !== id);
+      }
       renderJobs(currentJobs);
+      postJobMarks({ hide: [id] }).catch(err => showAlert("danger", err.message));
     });
   });
 
@@ -147,9 +249,13 @@ function renderJobs(jobs) {
 
       if (found) {
         setSaved(existing.filter(j => jobId(j) !== id));
+        queueSavedChange(id, null);
       } else {
         const job = currentJobs.find(j => jobId(j) === id);
-        if (job) setSaved([job, ...existing]);
+        if (job) {
+          setSaved([job, ...existing]);
+          queueSavedChange(id, job);
+        }
       }
 
       renderJobs(currentJobs);
@@ -207,6 +313,7 @@ function renderSavedList() {
     btn.addEventListener("click", () => {
       const id = btn.dataset.id;
       setSaved(getSaved().filter(j => jobId(j) !== id));
+      queueSavedChange(id, null);
       renderSavedList();
       renderJobs(currentJobs);
     });
@@ -219,28 +326,76 @@ function renderSavedList() {
 // -----------------------------------------
 // Networking / Search
 // -----------------------------------------
+function jobsFromPayload(data) {
+  if (data.format === "columnar") return fromColumnar(data);
+  if (Array.isArray(data)) return data;
+  if (Array.isArray(data.jobs)) return data.jobs;
+  return null;
+}
+
+// Read an NDJSON response line by line, calling onLine for each parsed object
+async function readNDJSON(res, onLine) {
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buf = "";
+  while (true) {
+    const { value, done } = await reader.read();
+    buf += decoder.decode(value || new Uint8Array(), { stream: !done });
+    let nl;
+    while ((nl = buf.indexOf("\n")) >= 0) {
+      const line = buf.slice(0, nl).trim();
+      buf = buf.slice(nl + 1);
+      if (line) onLine(JSON.parse(line));
+    }
+    if (done) break;
+  }
+  if (buf.trim()) onLine(JSON.parse(buf));
+}
+
 async function searchJobs(skills) {
+  lastSkills = skills;
+  const includeHidden = $("#toggleHidden").checked ? "" : "&include_hidden=1";
   setLoading(true);
   hideAlert();
+  currentJobs = [];
+  renderJobs(currentJobs);
   try {
     const res = await fetch("/get_jobs", {
       method: "POST",
       headers: { "Content-Type": "application/x-www-form-urlencoded" },
-      body: `skills=${encodeURIComponent(skills)}`
+      body: `skills=${encodeURIComponent(skills)}&format=columnar&stream=1${includeHidden}`
     });
 
-    const data = await res.json();
-
-    if (Array.isArray(data)) {
-      currentJobs = data;
-    } else if (Array.isArray(data.jobs)) {
-      currentJobs = data.jobs;
+    const streamed = (res.headers.get("Content-Type") || "").includes("ndjson");
+    if (streamed && res.body) {
+      const stale = [];
+      // Render each source's batch as soon as it arrives
+      await readNDJSON(res, (msg) => {
+        if (msg.type === "batch") {
+          currentJobs = currentJobs.concat(jobsFromPayload(msg) || []);
+          if (msg.stale) {
+            stale.push(msg.stale.unavailable
+              ? `${msg.source} (no saved copy)`
+              : `${msg.source} (${Math.round(msg.stale.age_seconds / 60)} min old)`);
+          }
+          renderJobs(currentJobs);
+          setLoading(false);
+        } else if (msg.type === "done" && msg.count === 0) {
+          showAlert("warning", "No job list returned.");
+        } else if (msg.type === "done" && stale.length) {
+          showAlert("info", `Source unavailable, showing saved listings: ${stale.join(", ")}`);
+        }
+      });
     } else {
-      currentJobs = [];
-      showAlert("warning", "No job list returned.");
+      const jobs = jobsFromPayload(await res.json());
+      if (jobs) {
+        currentJobs = jobs;
+      } else {
+        currentJobs = [];
+        showAlert("warning", "No job list returned.");
+      }
+      renderJobs(currentJobs);
     }
-
-    renderJobs(currentJobs);
   } catch (e) {
     showAlert("danger", "Network/server error.");
     console.error(e);
@@ -255,6 +410,21 @@ async function searchJobs(skills) {
 // -----------------------------------------
 document.addEventListener("DOMContentLoaded", () => {
   updateSavedCount();
+  if (readLS(LS_SYNC, null) === null) {
+    // First sync from this browser: upload what was saved locally before sync existed
+    const pending = getPending();
+    for (const job of getSaved()) pending.save[jobId(job)] = { ...job, id: jobId(job) };
+    writeLS(LS_PENDING, pending);
+  }
+  syncSaved();
+
+  // Hidden ids used to be kept only in this browser; hand them to the server once
+  const legacyHidden = readLS(LS_HIDDEN, []);
+  if (legacyHidden.length) {
+    postJobMarks({ hide: legacyHidden })
+      .then(() => localStorage.removeItem(LS_HIDDEN))
+      .catch(err => console.warn(err));
+  }
 
   $("#skillForm").addEventListener("submit", (e) => {
     e.preventDefault();
@@ -267,12 +437,16 @@ document.addEventListener("DOMContentLoaded", () => {
   });
 
   $("#toggleHidden").addEventListener("change", () => {
-    renderJobs(currentJobs);
+    if (lastSkills) searchJobs(lastSkills);
   });
 
-  $("#btnClearHidden").addEventListener("click", () => {
-    setHidden(new Set());
-    renderJobs(currentJobs);
+  $("#btnClearHidden").addEventListener("click", async () => {
+    try {
+      await postJobMarks({ clear: ["hidden"] });
+      if (lastSkills) searchJobs(lastSkills);
+    } catch (err) {
+      showAlert("danger", err.message);
+    }
   });
 
   const savedDrawer = new bootstrap.Offcanvas($("#savedDrawer"));
@@ -282,6 +456,7 @@ document.addEventListener("DOMContentLoaded", () => {
   });
 
   $("#btnClearSaved").addEventListener("click", () => {
+    getSaved().forEach(j => queueSavedChange(jobId(j), null));
     setSaved([]);
     renderSavedList();
     renderJobs(currentJobs);
@@ -0,0 +1,39 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_DIR))
+
+import database_helpers as dbh  # noqa: E402
+import job_marks  # noqa: E402
+
+
+@pytest.fixture
+def db_paths(tmp_path, monkeypatch):
+    """Point jobs.db and users.db at files under tmp_path (created on first use)."""
+    monkeypatch.setattr(dbh, "DB_PATH", tmp_path / "jobs.db")
+    monkeypatch.setattr(dbh, "USERS_DB_PATH", str(tmp_path / "users.db"))
+    # mark caches are per process and keyed by version, not by database
+    job_marks._sets.clear()
+    job_marks._key_ids.clear()
+    job_marks._key_names.clear()
+    return tmp_path
+
+
+@pytest.fixture
+def client(db_paths):
+    """Test client logged in as "alice" on a fresh app and databases."""
+    import app as app_module
+
+    app = app_module.create_app({
+        "TESTING": True,
+        "INGEST_INTERVAL": 0,
+        "UPLOAD_FOLDER": str(db_paths / "uploads"),
+    })
+    client = app.test_client()
+    client.post("/register", data={"username": "alice", "password": "secret"})
+    response = client.post("/login", data={"username": "alice", "password": "secret"})
+    assert response.status_code == 302
+    return client
@@ -0,0 +1,64 @@
+import database_helpers as dbh
+import job_marks
+
+
+def _marks(client, **payload):
+    response = client.post("/api/job_marks", json=payload)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def test_hide_and_unhide(client):
+    assert client.get("/api/job_marks").get_json() == {"ok": True, "hidden": [], "seen_count": 0}
+
+    body = _marks(client, hide=["job-1", "job-2"], seen=["job-3"])
+    assert sorted(body["hidden"]) == ["job-1", "job-2"]
+    assert body["seen_count"] == 1
+
+    body = _marks(client, unhide=["job-1"])
+    assert body["hidden"] == ["job-2"]
+
+
+def test_clear_kind(client):
+    _marks(client, hide=["job-1"], seen=["job-2", "job-3"])
+    body = _marks(client, clear=["seen"])
+    assert body["hidden"] == ["job-1"]
+    assert body["seen_count"] == 0
+
+
+def test_invalid_payload(client):
+    assert client.post("/api/job_marks", json=["job-1"]).status_code == 400
+
+
+def test_marks_filter_jobs(client):
+    _marks(client, hide=["job-1"], seen=["job-2"])
+    jobs = [{"id": "job-1"}, {"id": "job-2"}, {"id": "job-3"}]
+    conn = dbh.get_db_connection()
+    try:
+        assert [j["id"] for j in job_marks.filter_jobs(conn, "alice", jobs)] == ["job-2", "job-3"]
+        assert [j["id"] for j in job_marks.filter_jobs(conn, "alice", jobs, job_marks.KINDS)] == ["job-3"]
+    finally:
+        dbh.close_db(conn)
+
+
+def test_writes_from_another_process_are_picked_up(client):
+    _marks(client, hide=["job-1"])
+    # another worker writes straight to jobs.db, bumping the mark version
+    conn = dbh.get_db_connection()
+    try:
+        dbh.add_job_marks(conn, "alice", job_marks.HIDDEN, ["job-9"])
+    finally:
+        dbh.close_db(conn)
+    assert sorted(client.get("/api/job_marks").get_json()["hidden"]) == ["job-1", "job-9"]
+
+
+def test_marked_keys_after_eviction(client, monkeypatch):
+    monkeypatch.setattr(job_marks, "MAX_CACHED_SETS", 1)
+    _marks(client, hide=["job-1"])
+    conn = dbh.get_db_connection()
+    try:
+        # loading bob's set pushes alice's out of the cache
+        job_marks.mark(conn, "bob", job_marks.HIDDEN, ["job-2"])
+        assert job_marks.marked_keys(conn, "alice", job_marks.HIDDEN) == ["job-1"]
+    finally:
+        dbh.close_db(conn)
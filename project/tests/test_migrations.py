@@ -0,0 +1,90 @@
+import shutil
+import sqlite3
+
+import database_helpers as dbh
+import migrations
+
+from conftest import PROJECT_DIR
+
+LATEST = max(version for version, _ in migrations.JOBS_DB["steps"])
+
+
+def _tables(conn):
+    # sqlite_autoindex_* only reflects how a constraint was declared: a fresh
+    # skills table has name UNIQUE, the legacy one relies on idx_skills_name
+    return {
+        row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger', 'index')")
+        if not row[0].startswith("sqlite_autoindex")
+    }
+
+
+def _legacy_db(db_paths):
+    """A copy of the checked-in jobs.db, which predates the migrations (user_version 0)."""
+    shutil.copy(PROJECT_DIR / "jobs.db", dbh.DB_PATH)
+    conn = sqlite3.connect(dbh.DB_PATH)
+    try:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == 0
+        jobs = conn.execute("SELECT id, name FROM jobs ORDER BY id").fetchall()
+        links = conn.execute("SELECT COUNT(*) FROM job_skills").fetchone()[0]
+    finally:
+        conn.close()
+    return jobs, links
+
+
+def test_legacy_db_migrates_to_latest(db_paths):
+    jobs, links = _legacy_db(db_paths)
+    conn = dbh.setup_db()
+    try:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == LATEST
+        # existing rows survive every step
+        assert [tuple(r) for r in conn.execute("SELECT id, name FROM jobs ORDER BY id")] == jobs
+        assert conn.execute("SELECT COUNT(*) FROM job_skills").fetchone()[0] == links
+        # skill names end up lowercased and unique
+        names = [r[0] for r in conn.execute("SELECT name FROM skills")]
+        assert names == [n.lower() for n in names]
+        assert len(names) == len(set(names))
+        # active demand is backfilled from the existing links
+        assert conn.execute("SELECT SUM(active) FROM skill_demand_current").fetchone()[0] == links
+    finally:
+        dbh.close_db(conn)
+
+
+def test_legacy_and_fresh_schemas_match(db_paths, tmp_path):
+    _legacy_db(db_paths)
+    dbh.close_db(dbh.setup_db())
+    legacy = sqlite3.connect(dbh.DB_PATH)
+    fresh = sqlite3.connect(tmp_path / "fresh.db")
+    try:
+        migrations.migrate(fresh, migrations.JOBS_DB)
+        assert _tables(legacy) == _tables(fresh)
+        assert fresh.execute("PRAGMA user_version").fetchone()[0] == LATEST
+    finally:
+        legacy.close()
+        fresh.close()
+
+
+def test_migrate_is_idempotent(db_paths):
+    _legacy_db(db_paths)
+    dbh.close_db(dbh.setup_db())
+    conn = dbh.setup_db()
+    try:
+        before = _tables(conn)
+        migrations.migrate(conn, migrations.JOBS_DB)
+        assert _tables(conn) == before
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == LATEST
+    finally:
+        dbh.close_db(conn)
+
+
+def test_reingesting_known_skills_keeps_one_row(db_paths):
+    conn = dbh.setup_db()
+    try:
+        job = {"id": "remote_1", "title": "Dev", "source": "RemoteOK", "skills": ["Python", "SQL"]}
+        dbh.upsert_jobs_bulk(conn, [job])
+        dbh.upsert_jobs_bulk(conn, [{**job, "id": "remote_2"}])
+        assert conn.execute("SELECT COUNT(*) FROM skills WHERE name = 'python'").fetchone()[0] == 1
+        demand = {row["skill"]: row for row in dbh.get_skill_demand(conn)}
+        assert demand["python"]["posted"] == 2
+        assert demand["python"]["active"] == 2
+    finally:
+        dbh.close_db(conn)
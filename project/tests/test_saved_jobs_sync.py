@@ -0,0 +1,71 @@
+import app as app_module
+
+
+def _job(i):
+    return {"id": f"job-{i}", "title": f"Job {i}"}
+
+
+def _sync(client, **payload):
+    response = client.post("/saved_jobs/sync", json=payload)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def test_first_sync_returns_full_list_and_token(client):
+    body = _sync(client, save=[_job(1), _job(2)])
+    assert body["full"] is True
+    assert [j["id"] for j in body["saved"]] == ["job-1", "job-2"]
+    assert body["cursor"] is None
+    assert body["sync_token"]
+
+
+def test_token_replay_returns_only_later_changes(client):
+    token = _sync(client, save=[_job(1), _job(2)])["sync_token"]
+
+    # nothing changed since the token
+    body = _sync(client, sync_token=token)
+    assert body["full"] is False
+    assert body["saved"] == [] and body["removed"] == []
+    assert body["sync_token"] == token
+
+    # another device saves one job and removes another
+    response = client.post("/saved_jobs/batch", json={"save": [_job(3)], "unsave": ["job-1"]})
+    assert response.status_code == 200
+
+    body = _sync(client, sync_token=token)
+    assert [j["id"] for j in body["saved"]] == ["job-3"]
+    assert body["removed"] == ["job-1"]
+    # replaying the same token again gives the same delta
+    assert _sync(client, sync_token=token)["removed"] == ["job-1"]
+
+
+def test_unknown_token_falls_back_to_full_list(client):
+    _sync(client, save=[_job(1)])
+    body = _sync(client, sync_token="999999")
+    assert body["full"] is True
+    assert [j["id"] for j in body["saved"]] == ["job-1"]
+
+
+def test_sync_pages_until_cursor_is_exhausted(client, monkeypatch):
+    monkeypatch.setattr(app_module, "SAVED_SYNC_PAGE", 2)
+    client.post("/saved_jobs/batch", json={"save": [_job(i) for i in range(5)]})
+
+    seen = []
+    body = _sync(client)
+    pages = 1
+    while body["cursor"]:
+        assert body["sync_token"] is None
+        seen.extend(j["id"] for j in body["saved"])
+        body = _sync(client, cursor=body["cursor"])
+        pages += 1
+    seen.extend(j["id"] for j in body["saved"])
+    assert pages == 3
+    assert seen == [f"job-{i}" for i in range(5)]
+    assert body["sync_token"]
+
+
+def test_bad_cursor_is_rejected(client):
+    assert client.post("/saved_jobs/sync", json={"cursor": "nope"}).status_code == 400
+    # a cursor cannot carry changes of its own
+    response = client.post("/saved_jobs/sync", json={"cursor": "1:1:0", "save": [_job(1)]})
+    assert response.status_code == 400
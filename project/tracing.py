@@ -0,0 +1,279 @@
+"""
+Opt-in request tracing and sampling profiler.
+
+A trace is attached to a request only when asked for (X-Trace / X-Profile
+header carrying PROFILING_TOKEN, or the admin sample rate). Instrumented
+code calls span()/@traced, which costs one ContextVar lookup when no trace
+is active.
+
+Profiled requests are sampled from a background thread via
+sys._current_frames() and written as collapsed stacks ("a;b;c count"),
+which flamegraph.pl, speedscope and inferno read directly.
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, List, Optional
+from uuid import uuid4
+
+_current: ContextVar[Optional["Trace"]] = ContextVar("current_trace", default=None)
+
+DEFAULT_SAMPLE_INTERVAL = 0.005  # seconds between profiler samples
+
+
+class Trace:
+    def __init__(self, name: str, profile: bool = False, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.id = uuid4().hex[:16]
+        self.name = name
+        self.started = time.perf_counter()
+        self.spans: List[dict] = []
+        self.thread_ids = {threading.get_ident()}
+        self._lock = threading.Lock()
+        self.profiler = SamplingProfiler(self, interval) if profile else None
+
+    def add_span(self, name: str, start: float, end: float) -> None:
+        with self._lock:
+            self.spans.append({
+                "name": name,
+                "start_ms": round((start - self.started) * 1000, 3),
+                "duration_ms": round((end - start) * 1000, 3),
+                "thread": threading.get_ident(),
+            })
+
+    def summary(self) -> Dict[str, float]:
+        """Total milliseconds per span name."""
+        totals: Dict[str, float] = {}
+        for s in self.spans:
+            totals[s["name"]] = totals.get(s["name"], 0.0) + s["duration_ms"]
+        return totals
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "duration_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "spans": sorted(self.spans, key=lambda s: s["start_ms"]),
+        }
+
+
+class SamplingProfiler:
+    """Samples the stacks of the threads taking part in one trace."""
+
+    def __init__(self, trace: Trace, interval: float):
+        self.trace = trace
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"profiler-{trace.id}", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for tid in list(self.trace.thread_ids):
+                frame = frames.get(tid)
+                if frame is not None:
+                    self.samples[_collapse(frame)] += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+def _collapse(frame) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+# ---------------- instrumentation API ----------------
+
+def current() -> Optional[Trace]:
+    return _current.get()
+
+
+@contextmanager
+def _span(trace: Trace, name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add_span(name, start, time.perf_counter())
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str):
+    """Context manager timing a block as a span of the active trace, if any."""
+    trace = _current.get()
+    if trace is None:
+        return _NOOP_SPAN
+    return _span(trace, name)
+
+
+def traced(name: str):
+    """Decorator form of span()."""
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            trace = _current.get()
+            if trace is None:
+                return fn(*args, **kwargs)
+            with _span(trace, name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def propagate(fn):
+    """Bind fn to the active trace so spans it opens in a worker thread are kept."""
+    trace = _current.get()
+    if trace is None:
+        return fn
+
+    @wraps(fn)
+    def run(*args, **kwargs):
+        trace.thread_ids.add(threading.get_ident())
+        token = _current.set(trace)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current.reset(token)
+    return run
+
+
+def bind_iter(iterable):
+    """Keep the active trace set while a streamed response body is produced."""
+    trace = _current.get()
+    if trace is None:
+        return iterable
+
+    def gen():
+        it = iter(iterable)
+        while True:
+            token = _current.set(trace)
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+            finally:
+                _current.reset(token)
+            yield item
+    return gen()
+
+
+# ---------------- Flask integration ----------------
+
+def init_app(app) -> None:
+    """Register request hooks and the /admin/profiling toggle on app.
+
+    Config: PROFILING_TOKEN (env, required to enable anything),
+    PROFILE_DIR (where traces and collapsed stacks are written).
+    """
+    from flask import g, jsonify, request
+
+    app.config.setdefault("PROFILING_TOKEN", os.environ.get("PROFILING_TOKEN"))
+    app.config.setdefault("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "jobs-profiles"))
+    state = {"sample_rate": 0.0, "profile": False}
+
+    def authorized(value) -> bool:
+        token = app.config.get("PROFILING_TOKEN")
+        return bool(token) and value == token
+
+    @app.before_request
+    def _start_trace():
+        profile = authorized(request.headers.get("X-Profile"))
+        wanted = profile or authorized(request.headers.get("X-Trace"))
+        if not wanted and state["sample_rate"] and random.random() < state["sample_rate"]:
+            wanted, profile = True, state["profile"]
+        if not wanted:
+            return
+        trace = Trace(f"{request.method} {request.path}", profile=profile)
+        g.trace = trace
+        g.trace_token = _current.set(trace)
+        if trace.profiler is not None:
+            trace.profiler.start()
+
+    @app.after_request
+    def _finish_trace(response):
+        trace = g.pop("trace", None)
+        token = g.pop("trace_token", None)
+        if trace is None:
+            return response
+        _current.reset(token)
+        response.headers["X-Trace-Id"] = trace.id
+        if response.is_streamed:
+            response.call_on_close(lambda: _write_trace(app, trace))
+        else:
+            timings = sorted(trace.summary().items(), key=lambda kv: -kv[1])[:10]
+            response.headers["Server-Timing"] = ", ".join(
+                f'span{i};desc="{name}";dur={ms:.1f}' for i, (name, ms) in enumerate(timings)
+            )
+            _write_trace(app, trace)
+        return response
+
+    @app.teardown_request
+    def _drop_trace(exc):
+        # after_request is skipped for some errors; never leak a trace into the next request
+        token = g.pop("trace_token", None)
+        if token is not None:
+            _current.reset(token)
+
+    @app.route("/admin/profiling", methods=["GET", "POST"])
+    def admin_profiling():
+        if not authorized(request.headers.get("X-Profile-Token")):
+            return jsonify({"error": "forbidden"}), 403
+        if request.method == "POST":
+            data = request.get_json(silent=True) or {}
+            if not isinstance(data, dict):
+                return jsonify({"error": "invalid_payload"}), 400
+            try:
+                rate = float(data.get("sample_rate", 0.0))
+            except (TypeError, ValueError):
+                return jsonify({"error": "invalid_sample_rate"}), 400
+            if math.isnan(rate):
+                return jsonify({"error": "invalid_sample_rate"}), 400
+            state["sample_rate"] = min(max(rate, 0.0), 1.0)
+            state["profile"] = bool(data.get("profile", False))
+        return jsonify({**state, "profile_dir": app.config["PROFILE_DIR"]})
+
+
+def _write_trace(app, trace: Trace) -> None:
+    if trace.profiler is not None:
+        trace.profiler.stop()
+    out_dir = app.config["PROFILE_DIR"]
+    os.makedirs(out_dir, exist_ok=True)
+    base = os.path.join(out_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{trace.id}")
+    with open(base + ".trace.json", "w") as f:
+        json.dump(trace.to_dict(), f, indent=2)
+    if trace.profiler is not None:
+        with open(base + ".collapsed", "w") as f:
+            f.write(trace.profiler.collapsed())